@@ -1,13 +1,16 @@
 import logging.config
 
-from flask import Flask, jsonify
+from flask import Flask
 from flask_cors import CORS
 from mongoengine import connect
 
 import customerio  # noqa
+import signals
 from errors import register_errors
+from flags import flags
 from routes import TokenConverter, load_blueprints
 from sentry import setup_sentry
+from serializer import jsonify
 
 _ = customerio  # noqa - make pycharm happy
 
@@ -29,6 +32,10 @@ def create_app(environment: str = 'prod') -> Flask:
     if not app.config['TESTING']:
         setup_sentry(app)
 
+    # Run background signal receivers inline in tests
+    signals.setup(app.config['SIGNALS_POOL_SIZE'])
+    flags.setup(app.config['FLAGS_TTL'])
+
     # Connect DB
     connect('default', host=app.config['MONGODB_URI'])
 
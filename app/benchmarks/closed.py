@@ -0,0 +1,70 @@
+"""
+``POST /v1/user`` of a new user while registration is closed: validating the payload and querying the user (as it
+used to be) against the fast path answering from cached error body after a covered ``eth_address`` query.
+
+Users collection is empty: mongomock doesn't use indexes, so query costs on a filled one say nothing about Mongo.
+
+Run from the app directory: ``python -m benchmarks.closed``
+"""
+import re
+import timeit
+
+from flask import request
+
+from app import create_app
+from errors import WhitelistClosed
+from flags import flags
+from serializer import jsonify
+from user.models import User
+from user.views import info_schema
+
+NUMBER = 2000
+
+app = create_app('testing')
+app.debug = False
+app.config['FLAGS_TTL'] = 60
+flags.setup(60)
+payload = {
+    'email': 'blop@example.com',
+    'dob': 631152000,
+    'dfp': '{"some": "data"}',
+    'phone': '+1234567890',
+    'eth_address': '0x29D7d1dd5B6f9C864d9db560D72a247c178aE86B',
+    'address': '1 Infinite Loop',
+    'city': 'Cupertino',
+    'zip_code': '95014',
+    'country_code': 'AU',
+    'telegram': '@blopsky',
+    'confirmed_location': True,
+    'first_name': 'Blop',
+    'last_name': 'Blopsky',
+}
+
+
+@app.route('/legacy/user', methods=['POST'])
+def legacy_provide_info():
+    data = info_schema.load(request)
+    User.objects(eth_address=data['eth_address']).first()
+    res = jsonify({
+        'error': re.sub(r'(?<=[a-z])(?=[A-Z])', '-', WhitelistClosed.__name__).lower(),
+        'key': None,
+        'details': None,
+    })
+    res.status_code = WhitelistClosed.code
+    return res
+
+
+def report(name: str, func):
+    elapsed = min(timeit.repeat(func, number=NUMBER, repeat=3))
+    print(f'{name:<32} {NUMBER / elapsed:>12,.0f} requests/s')
+
+
+if __name__ == '__main__':
+    client = app.test_client()
+
+    def post(url: str):
+        res = client.post(url, data=app.json_encoder().encode(payload), content_type='application/json')
+        assert res.status_code == 410, res.data
+
+    report('closed, legacy', lambda: post('/legacy/user'))
+    report('closed, fast path', lambda: post('/v1/user'))
@@ -0,0 +1,58 @@
+"""
+Whitelisted address lookups: set of hex strings read from ``eths.txt`` by every worker (as it used to be) against
+memory mapped `eth.index.AddressIndex`.
+
+Run from the app directory: ``python -m benchmarks.eth_index``
+"""
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+import timeit
+
+from eth.index import AddressIndex, build
+
+COUNT = 200000
+NUMBER = 100000
+
+
+def report(name: str, func):
+    elapsed = min(timeit.repeat(func, number=NUMBER, repeat=3))
+    print(f'{name:<32} {NUMBER / elapsed:>12,.0f} lookups/s')
+
+
+if __name__ == '__main__':
+    addresses = [os.urandom(20).hex() for _ in range(COUNT)]
+    misses = [os.urandom(20).hex() for _ in range(1000)]
+    hits = random.sample(addresses, 1000)
+
+    with tempfile.TemporaryDirectory() as directory:
+        text_path = os.path.join(directory, 'eths.txt')
+        index_path = os.path.join(directory, 'eths.idx')
+        with open(text_path, 'w') as fh:
+            fh.write('\n'.join(addresses))
+
+        started = time.perf_counter()
+        with open(text_path, 'r') as fh:
+            whitelisted = {itm.strip() for itm in fh}
+        print(f'set: loaded in {(time.perf_counter() - started) * 1000:.1f}ms, '
+              f'~{(sys.getsizeof(whitelisted) + sum(map(sys.getsizeof, whitelisted))) / 2 ** 20:.1f}MB per worker')
+
+        started = time.perf_counter()
+        build(addresses, index_path)
+        print(f'index: built in {(time.perf_counter() - started) * 1000:.1f}ms, '
+              f'{os.path.getsize(index_path) / 2 ** 20:.1f}MB shared')
+
+        index = AddressIndex(index_path)
+        started = time.perf_counter()
+        len(index)
+        print(f'index: mapped in {(time.perf_counter() - started) * 1000:.2f}ms')
+
+        hit, miss = itertools.cycle(hits), itertools.cycle(misses)
+        report('set, hit', lambda: next(hit) in whitelisted)
+        report('set, miss', lambda: next(miss) in whitelisted)
+        hit, miss = itertools.cycle(hits), itertools.cycle(misses)
+        report('index, hit', lambda: next(hit) in index)
+        report('index, miss', lambda: next(miss) in index)
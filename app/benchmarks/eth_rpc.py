@@ -0,0 +1,41 @@
+"""
+Checking eth addresses against a node with simulated latency: two serial requests per address (as it used to be,
+before its 500/min rate limit) against `eth.rpc.check_eth` batches sent concurrently.
+
+Run from the app directory: ``python -m benchmarks.eth_rpc``
+"""
+import time
+
+import gevent
+from mock import Mock, patch
+
+from eth import rpc
+
+LATENCY = 0.05  # Seconds per HTTP request
+PER_ITEM = 0.0002  # Seconds node spends on each call of a batch
+COUNT = 5000
+
+
+def node(json: list = None, **_) -> Mock:
+    gevent.sleep(LATENCY + PER_ITEM * len(json))
+    return Mock(json=Mock(return_value=[{'id': item['id'], 'result': '0x1'} for item in json]))
+
+
+def legacy(addresses: list):
+    for _ in addresses:
+        for method in ['eth_getBalance', 'eth_getTransactionCount']:
+            node([{'id': 1, 'method': method}])
+
+
+def report(name: str, func, count: int):
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    print(f'{name:<32} {count / elapsed * 60:>12,.0f} addresses/min')
+
+
+if __name__ == '__main__':
+    addresses = [f'{i:040x}' for i in range(COUNT)]
+    report('serial requests', lambda: legacy(addresses[:100]), 100)
+    with patch.object(rpc.session, 'post', side_effect=lambda url, **kwargs: node(**kwargs)):
+        report('batched, concurrent', lambda: rpc.check_eth(addresses), COUNT)
@@ -0,0 +1,76 @@
+"""
+Request validation per route: building voluptuous `Schema` inside the view on every request (as it used to be)
+against validators compiled once at import time and registered in `schema.validators`.
+
+Run from the app directory: ``python -m benchmarks.schemas``
+"""
+import timeit
+
+from bson import ObjectId
+from voluptuous import Invalid, Schema
+
+import ids.views  # noqa Registers validators
+import upload.views  # noqa
+import user.views  # noqa
+from errors import ValidationError
+from schema import validators
+
+NUMBER = 5000
+
+PAYLOADS = {
+    'provide_info': {
+        'first_name': 'Blop',
+        'last_name': 'Blopsky',
+        'email': 'blop@example.com',
+        'dob': '631152000',
+        'address': '1 Infinite Loop',
+        'city': 'Cupertino',
+        'state_code': 'CA',
+        'zip_code': '95014',
+        'country_code': 'AU',
+        'phone': '+1 555 0100',
+        'eth_address': '0x' + '0' * 40,
+        'eth_amount': 1.5,
+        'telegram': '@blopsky',
+        'confirmed_location': True,
+        'dfp': 'x' * 100,
+    },
+    'submit_ids': {
+        'upload1': str(ObjectId()),
+        'upload2': str(ObjectId()),
+        'doc_type': 'PP',
+        'doc_country': 'AU',
+    },
+    'new_upload': {
+        'filename': 'blop.jpg',
+        'content_type': 'image/jpeg',
+        'size': 500 * 1024,
+    },
+}
+
+
+def rejected(validate, data: dict):
+    try:
+        validate(data)
+    except (Invalid, ValidationError):
+        pass
+
+
+def report(name: str, func):
+    elapsed = min(timeit.repeat(func, number=NUMBER, repeat=3))
+    print(f'{name:<32} {NUMBER / elapsed:>12,.0f} validations/s')
+
+
+if __name__ == '__main__':
+    for name, data in PAYLOADS.items():
+        validator = validators[name]
+        raw = validator.schema.schema
+        extra, required = validator.schema.extra, validator.schema.required
+
+        def legacy(payload):
+            return Schema(raw, extra=extra, required=required)(payload)
+
+        report(f'{name}, per request', lambda: legacy(dict(data)))
+        report(f'{name}, compiled', lambda: validator(dict(data)))
+        report(f'{name}, empty, per request', lambda: rejected(legacy, {}))
+        report(f'{name}, empty, compiled', lambda: rejected(validator, {}))
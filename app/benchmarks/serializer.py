@@ -0,0 +1,75 @@
+"""
+Serialization of the ``/v1/user`` payload: hand built dict with ``strftime`` timestamps encoded by `flask.jsonify` (as
+it used to be) against compiled `serializer.Serializer` plan encoded by `serializer.jsonify`.
+
+Run from the app directory: ``python -m benchmarks.serializer``
+"""
+import datetime
+import timeit
+
+import flask
+from bson import ObjectId
+
+from app import create_app
+from serializer import jsonify
+from tokens import get_token
+from user.models import User
+
+NUMBER = 20000
+
+app = create_app('testing')
+app.debug = False  # Compact flask.jsonify output, as in production
+app.config['JSONIFY_PRETTYPRINT_REGULAR'] = False
+user = User(
+    id=ObjectId(),
+    email='blop@example.com',
+    first_name='Blop',
+    last_name='Blopsky',
+    phone='+1 555 0100',
+    address='1 Infinite Loop',
+    city='Cupertino',
+    state_code='CA',
+    zip_code='95014',
+    country_code='AU',
+    dob=datetime.datetime(1990, 1, 1),
+    confirmed_location=True,
+    eth_address='0000000000000000000000000000000000000000',
+    eth_amount=1.5,
+    state='info_verified',
+)
+
+
+def legacy_to_json(user: User) -> dict:
+    return {
+        'address': user.address,
+        'city': user.city,
+        'state_code': user.state_code,
+        'zip_code': user.zip_code,
+        'country_code': user.country_code,
+        'dob': int(user.dob.strftime('%s')) if user.dob else None,
+        'email': user.email,
+        'confirmed_location': user.confirmed_location,
+        'eth_address': user.eth_address,
+        'eth_amount': user.eth_amount,
+        'state': user.state,
+        'eth_cap': user.eth_cap,
+        'decline_reason': user.decline_reason,
+        'id': str(user.id),
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'phone': user.phone,
+        'token': get_token(user.id),
+    }
+
+
+def report(name: str, func):
+    elapsed = min(timeit.repeat(func, number=NUMBER, repeat=3))
+    print(f'{name:<32} {NUMBER / elapsed:>12,.0f} responses/s')
+
+
+if __name__ == '__main__':
+    with app.app_context():
+        report('to_json, legacy', lambda: legacy_to_json(user))
+        report('to_json, serializer', lambda: user.to_json())
+        report('response, legacy', lambda: flask.jsonify(legacy_to_json(user)))
+        report('response, serializer', lambda: jsonify(user.to_json()))
@@ -0,0 +1,80 @@
+"""
+Tokens issued and verified per second: legacy itsdangerous tokens (with a new serializer per call as it used to be, and
+with the shared one) against v2 binary tokens, uncached and cached.
+
+Run from the app directory: ``python -m benchmarks.tokens``
+"""
+import time
+import timeit
+
+from bson import ObjectId
+from itsdangerous import URLSafeSerializer
+
+from config import SALT, TOKEN_TTL
+from tokens import _issue, _verify, get_token, signer, verify_token
+
+NUMBER = 20000
+IDS = [ObjectId() for _ in range(1000)]
+EXPIRES = int(time.time()) + TOKEN_TTL
+LEGACY_TOKENS = [signer().dumps([str(user_id)]) for user_id in IDS]
+TOKENS = [get_token(user_id) for user_id in IDS]
+
+
+def legacy_get():
+    for user_id in IDS:
+        URLSafeSerializer(SALT, salt='whitelist').dumps([str(user_id)])
+
+
+def legacy_verify():
+    for token in LEGACY_TOKENS:
+        ObjectId(URLSafeSerializer(SALT, salt='whitelist').loads(token)[0])
+
+
+def legacy_shared_get():
+    for user_id in IDS:
+        signer().dumps([str(user_id)])
+
+
+def legacy_shared_verify():
+    for token in LEGACY_TOKENS:
+        _verify.__wrapped__(token)
+
+
+def v2_get():
+    for user_id in IDS:
+        _issue.__wrapped__(user_id, EXPIRES)
+
+
+def v2_verify():
+    for token in TOKENS:
+        _verify.__wrapped__(token)
+
+
+def cached_get():
+    for user_id in IDS:
+        get_token(user_id)
+
+
+def cached_verify():
+    for token in TOKENS:
+        verify_token(token)
+
+
+def report(name: str, func):
+    rounds = max(NUMBER // len(IDS), 1)
+    elapsed = min(timeit.repeat(func, number=rounds, repeat=3))
+    print(f'{name:<36} {rounds * len(IDS) / elapsed:>12,.0f} tokens/s')
+
+
+if __name__ == '__main__':
+    for name, func in [
+        ('get_token, legacy, new serializer', legacy_get),
+        ('get_token, legacy, shared serializer', legacy_shared_get),
+        ('get_token, v2', v2_get),
+        ('get_token, v2, cached', cached_get),
+        ('verify_token, legacy, new serializer', legacy_verify),
+        ('verify_token, legacy, shared', legacy_shared_verify),
+        ('verify_token, v2', v2_verify),
+        ('verify_token, v2, cached', cached_verify),
+    ]:
+        report(name, func)
@@ -9,12 +9,17 @@ from telegram.ext import CommandHandler
 
 from bot.client import dispatcher
 from bot.helpers import restricted
+from config import S3_SIGNED_URLS_CACHE_SIZE
 from control import export
+from flags import flags
+from idm.limiter import limiter
 from ids.models import IDUpload
+from jobs.models import Job
 from onfid.models import Check
+import signals
 from upload.models import Upload
 from upload.s3 import s3
-from user.models import User
+from user.models import StateCount, User
 from user.state import ALL_STATES
 from user.views import to_eth
 
@@ -106,6 +111,96 @@ def count(_: telegram.Bot, update: telegram.Update):
     )
 
 
+@restricted
+def s3_stats(_: telegram.Bot, update: telegram.Update):
+    update.message.reply_text(
+        '\n'.join(f'* <b>{key}</b>: {value}' for key, value in s3.stats().items()),
+        parse_mode=telegram.ParseMode.HTML,
+        quote=False,
+    )
+
+
+@restricted
+def idm_stats(_: telegram.Bot, update: telegram.Update):
+    update.message.reply_text(
+        '\n'.join(f'* <b>{key}</b>: {value}' for key, value in limiter.stats().items()),
+        parse_mode=telegram.ParseMode.HTML,
+        quote=False,
+    )
+
+
+@restricted
+def jobs(_: telegram.Bot, update: telegram.Update):
+    stats = Job.stats()
+    age = stats.pop('age')
+
+    update.message.reply_text(
+        '\n'.join(
+            [f'* <b>{key}</b>: {value}' for key, value in stats.items()] +
+            [f'Oldest queued job is waiting for <b>{age:.0f}s</b>']
+        ),
+        parse_mode=telegram.ParseMode.HTML,
+        quote=False,
+    )
+
+
+@restricted
+def signals_stats(_: telegram.Bot, update: telegram.Update):
+    stats = signals.stats()
+    lines = [f'Pool: <b>{stats["pool"]["running"]}</b> of {stats["pool"]["size"]} running']
+    for name, item in stats['receivers'].items():
+        lines.append(
+            f'* <b>{name}</b>: {item["calls"]} calls, {item["errors"]} errors, '
+            f'{item["avg_time"]:.3f}s avg, {item["max_time"]:.3f}s max'
+        )
+    for name, item in stats['transitions'].items():
+        lines.append(
+            f'* <b>{name}</b>: {item["calls"]} calls, {item["total"] / item["calls"]:.3f}s avg, {item["max"]:.3f}s max'
+        )
+
+    update.message.reply_text('\n'.join(lines), parse_mode=telegram.ParseMode.HTML, quote=False)
+
+
+@restricted
+def reconcile(_: telegram.Bot, update: telegram.Update):
+    diff = StateCount.reconcile()
+    if not diff:
+        update.message.reply_text('State counters are correct', quote=False)
+        return
+
+    update.message.reply_text(
+        'Fixed state counters:\n' + '\n'.join(f'* <b>{key}</b>: {value:+}' for key, value in diff.items()),
+        parse_mode=telegram.ParseMode.HTML,
+        quote=False,
+    )
+
+
+@restricted
+def flag(_: telegram.Bot, update: telegram.Update, args: list = None):
+    """ ``/flag`` lists flags, ``/flag NAME VALUE`` changes one, ``/flag NAME`` resets it to default. """
+    if args:
+        name = args[0].upper()
+        if name not in flags.flags:
+            update.message.reply_text(f'Unknown flag. Possible values are: {", ".join(flags.flags)}')
+            return
+
+        try:
+            if len(args) > 1:
+                flags.set(name, flags.parse(name, args[1]))
+            else:
+                flags.reset(name)
+        except ValueError as ex:
+            update.message.reply_text(f'Invalid value: {ex}')
+            return
+
+    flags.refresh()
+    update.message.reply_text(
+        '\n'.join(f'* <b>{key}</b>: {value}' for key, value in flags.to_json().items()),
+        parse_mode=telegram.ParseMode.HTML,
+        quote=False,
+    )
+
+
 @restricted
 def do_export(_: telegram.Bot, update: telegram.Update, args: list = None):
     state = args[0] if args else None
@@ -128,6 +223,11 @@ def export_async(update: telegram.Update, state: str):
     filename = f'Export.{now}.{ObjectId()}.csv'
     signed_url = s3.sign_url(filename, method='GET', expire=1800)
 
+    # Export reads `Upload.url` of every user, sign them in bulk beforehand so it gets them from the cache
+    users = User.objects(state=state) if state else User.objects
+    uploads = Upload.objects(user__in=list(users.scalar('id'))).no_dereference()
+    Upload.urls(uploads.limit(S3_SIGNED_URLS_CACHE_SIZE))
+
     with StringIO() as fh:
         export_count = export(fh, state=state)
         fh.seek(0)
@@ -177,6 +277,12 @@ handlers = [
     CommandHandler('countries', countries),
     CommandHandler('status', status),
     CommandHandler('onfido', onfido),
+    CommandHandler('s3', s3_stats),
+    CommandHandler('jobs', jobs),
+    CommandHandler('idm', idm_stats),
+    CommandHandler('reconcile', reconcile),
+    CommandHandler('signals', signals_stats),
+    CommandHandler('flag', flag, pass_args=True),
     CommandHandler('export', do_export, pass_args=True),
     CommandHandler('info', info, pass_args=True),
 ]
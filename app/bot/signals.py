@@ -4,7 +4,7 @@ from bot.client import bot
 from config import TELEGRAM_ADMIN_CHANNEL, TELEGRAM_PUBLIC_CHANNEL
 from idm.models import IDMResponse
 from signals import Transition, connect, transition, log_exception
-from user.models import User
+from user.models import StateCount, User
 from user.state import ID_DECLINED, ID_FAILED, ID_VERIFIED, INFO_FAILED, INFO_NOT_VERIFIED
 
 
@@ -14,7 +14,7 @@ def public_stats_announcements(user: User, transition: Transition):
     if not TELEGRAM_PUBLIC_CHANNEL:
         return
 
-    count = User.objects(state=ID_VERIFIED).count()
+    count = StateCount.get(ID_VERIFIED)
     if count % 1000:
         bot.send_message(
             TELEGRAM_PUBLIC_CHANNEL,
@@ -75,7 +75,7 @@ def failed_id_verification(user: User, transition: Transition):
     )
 
 
-@connect(IDMResponse.on_received)
+@connect(IDMResponse.on_received, background=True)
 def notify_about_missing_user(response: IDMResponse, **_):
     if not response.user:
         bot.send_message(
@@ -1,10 +1,11 @@
 import logging
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, request
 from telegram import Update
 
 from bot.client import bot, dispatcher
 from config import TELEGRAM_TOKEN
+from serializer import jsonify
 
 log = logging.getLogger(__name__)
 blueprint = Blueprint('bot', __name__)
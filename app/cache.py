@@ -0,0 +1,82 @@
+import functools
+import time
+from typing import Any, Callable, Hashable
+
+from gevent.event import AsyncResult
+
+
+class TTLCache(object):
+    """
+    In-process cache of values that may be a bit stale (e.g. counters shown to users), each kept for ``ttl`` seconds.
+
+    Oldest entries are dropped once there's more than ``max_size`` of them.
+    """
+
+    def __init__(self, ttl: float, max_size: int = 1024):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._values = {}  # key -> (expires_at, value)
+        self.version = 0  #: Bumped by every `invalidate`, so loads started before it know not to store their result
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._values.get(key)
+        if not item or item[0] < time.time():
+            return default
+        return item[1]
+
+    def set(self, key: Hashable, value: Any, ttl: float = None):
+        if len(self._values) >= self.max_size and key not in self._values:
+            self._values.pop(next(iter(self._values)))
+        self._values[key] = (time.time() + (self.ttl if ttl is None else ttl), value)
+
+    def invalidate(self, key: Hashable = None):
+        """ Drop cached value of ``key`` or the whole cache if key is not given. """
+        self.version += 1
+        if key is None:
+            self._values.clear()
+        else:
+            self._values.pop(key, None)
+
+
+def cached(ttl: float, max_size: int = 1024, negative_ttl: float = None) -> Callable:
+    """
+    Decorator to cache function results by its positional arguments for ``ttl`` seconds.
+
+    `None` results are cached for ``negative_ttl`` seconds instead if it's set. Concurrent calls with the same
+    arguments share a single call of the function, others just wait for its result.
+
+    Cache is available as ``cache`` attribute of the decorated function.
+    """
+    def decorator(func):
+        cache = TTLCache(ttl, max_size)
+        missing = object()
+        loading = {}  # args -> AsyncResult of the call in progress
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            value = cache.get(args, missing)
+            if value is not missing:
+                return value
+
+            if args in loading:
+                return loading[args].get()
+
+            result = loading[args] = AsyncResult()
+            version = cache.version
+            try:
+                value = func(*args)
+            except BaseException as ex:
+                result.set_exception(ex)
+                raise
+            finally:
+                del loading[args]
+
+            if cache.version == version:  # Otherwise value may be already stale
+                cache.set(args, value, negative_ttl if value is None else None)
+            result.set(value)
+            return value
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
@@ -31,13 +31,15 @@ LOGGING = {
 
 DOCK_PER_ETH = 1 / 0.00009333  # Amount of DOCK tokens one can get for a single ETH
 
-
-with open('eths.txt', 'r') as fh:
-    WHITELISTED_ADDRESSES = {itm.strip() for itm in fh}
-
 ETH_BALANCE_ADDRESS = os.environ.get('ETH_BALANCE_ADDRESS', '')
 ETH_ADDRESS = os.environ.get('ETH_ADDRESS')
 ETH_MAX_CONTRIBUTION = float(os.environ.get('ETH_MAX_CONTRIBUTION', '0.01'))
+ETH_INDEX_PATH = os.environ.get('ETH_INDEX_PATH', 'eths.idx')  # Whitelisted addresses index, see `eth.index`
+ETH_INDEX_CHECK_INTERVAL = float(os.environ.get('ETH_INDEX_CHECK_INTERVAL', 5))  # Seconds between index file checks
+ETH_RPC_URL = os.environ.get('ETH_RPC_URL', 'https://mainnet.infura.io/')  # JSON-RPC endpoint of ethereum node
+ETH_RPC_BATCH_SIZE = int(os.environ.get('ETH_RPC_BATCH_SIZE', 100))  # Addresses checked by a single batch request
+ETH_RPC_CONCURRENCY = int(os.environ.get('ETH_RPC_CONCURRENCY', 8))  # Max number of batch requests sent at once
+ETH_RPC_TIMEOUT = float(os.environ.get('ETH_RPC_TIMEOUT', 30))  # Seconds to wait for response to a batch request
 
 ONFIDO_TOKEN = os.environ.get('ONFIDO_TOKEN')
 IDM_USERNAME = os.environ.get('IDM_USERNAME')
@@ -47,12 +49,41 @@ IDM_URL = 'https://edna.identitymind.com/im/account/consumer'  # PROD
 # IDM_URL = 'https://sandbox.identitymind.com/im/account/consumer'  # SANDBOX
 IDM_WEBHOOK_USERNAME = os.environ.get('IDM_WEBHOOK_USERNAME')
 IDM_WEBHOOK_PASSWORD = os.environ.get('IDM_WEBHOOK_PASSWORD')
+IDM_CONCURRENCY = int(os.environ.get('IDM_CONCURRENCY', 16))  # Initial number of concurrent requests to IDM
+IDM_CONCURRENCY_MIN = int(os.environ.get('IDM_CONCURRENCY_MIN', 1))  # Concurrency isn't lowered below that
+IDM_CONCURRENCY_MAX = int(os.environ.get('IDM_CONCURRENCY_MAX', 256))  # Concurrency isn't raised above that
+IDM_LATENCY_TARGET = float(os.environ.get('IDM_LATENCY_TARGET', 10))  # Slower responses are treated as overload
+IDM_MAX_WAIT = float(os.environ.get('IDM_MAX_WAIT', 30))  # Seconds to wait for a free slot before giving up
 
-VERIFIED_IDS_CAP = os.environ.get('VERIFIED_IDS_CAP', 25000)  # Don't submit ids to idm after we've reached this cap
+VERIFIED_IDS_CAP = int(os.environ.get('VERIFIED_IDS_CAP', 25000))  # Don't submit ids to idm once this many are verified
+STATE_COUNTS_TTL = float(os.environ.get('STATE_COUNTS_TTL', 5))  # Seconds number of users in a state is cached for
+ETH_STATUS_TTL = float(os.environ.get('ETH_STATUS_TTL', 60))  # Seconds status of a known eth address is cached for
+ETH_STATUS_NEGATIVE_TTL = float(os.environ.get('ETH_STATUS_NEGATIVE_TTL', 10))  # Same for addresses without a user
+ETH_STATUS_CACHE_SIZE = int(os.environ.get('ETH_STATUS_CACHE_SIZE', 100000))  # Max number of cached address statuses
+ETH_STATUS_SYNC_INTERVAL = float(os.environ.get('ETH_STATUS_SYNC_INTERVAL', 2))  # Seconds between polls of changes
 
 AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
 AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
 AWS_BUCKET = os.environ.get('AWS_BUCKET')
+AWS_POOL_SIZE = int(os.environ.get('AWS_POOL_SIZE', 64))  # Max number of s3 connections per process
+AWS_POOL_TIMEOUT = float(os.environ.get('AWS_POOL_TIMEOUT', 10))  # Seconds to wait for a free s3 connection
+S3_FETCH_POOL_SIZE = int(os.environ.get('S3_FETCH_POOL_SIZE', 64))  # Max number of concurrent s3 downloads
+S3_FETCH_TIMEOUT = float(os.environ.get('S3_FETCH_TIMEOUT', 30))  # Seconds to wait for all images of a package
+S3_CACHE_DIR = os.environ.get('S3_CACHE_DIR', '')  # Local cache of downloaded ID images (PII), disabled if empty
+S3_PART_SIZE = int(os.environ.get('S3_PART_SIZE', 8 * 1024 * 1024))  # Part size of multipart uploads, 5MB minimum
+S3_UPLOAD_CONCURRENCY = int(os.environ.get('S3_UPLOAD_CONCURRENCY', 4))  # Parts of multipart upload sent at once
+S3_SIGNED_URLS_CACHE_SIZE = int(os.environ.get('S3_SIGNED_URLS_CACHE_SIZE', 10000))  # Max number of cached urls
+S3_SIGNED_URLS_MIN_TTL = float(os.environ.get('S3_SIGNED_URLS_MIN_TTL', 0.5))  # Part of lifetime cached url must have
+S3_CACHE_SIZE = int(os.environ.get('S3_CACHE_SIZE', 1024 * 1024 * 1024))  # Max size of local cache in bytes
+
+SIGNALS_POOL_SIZE = int(os.environ.get('SIGNALS_POOL_SIZE', 64))  # Max number of signal receivers run in background
+
+JOBS_CONCURRENCY = int(os.environ.get('JOBS_CONCURRENCY', 32))  # Max number of jobs processed at once by a worker
+JOBS_POLL_INTERVAL = float(os.environ.get('JOBS_POLL_INTERVAL', 1))  # Seconds to sleep when the queue is empty
+JOBS_VISIBILITY_TIMEOUT = int(os.environ.get('JOBS_VISIBILITY_TIMEOUT', 300))  # Seconds before stuck job is retaken
+JOBS_TIMEOUT = int(os.environ.get('JOBS_TIMEOUT', 240))  # Seconds job may run, less than visibility timeout
+JOBS_MAX_ATTEMPTS = int(os.environ.get('JOBS_MAX_ATTEMPTS', 5))  # Attempts before job is marked as failed
+JOBS_RETRY_DELAY = int(os.environ.get('JOBS_RETRY_DELAY', 10))  # Seconds before first retry, doubled on each next one
 
 CUSTOMER_IO_SITE_ID = os.environ.get('CUSTOMER_IO_SITE_ID')
 CUSTOMER_IO_API_KEY = os.environ.get('CUSTOMER_IO_API_KEY')
@@ -63,6 +94,8 @@ TELEGRAM_ADMIN_CHANNEL = os.environ.get('TELEGRAM_ADMIN_CHANNEL')
 TELEGRAM_PUBLIC_CHANNEL = os.environ.get('TELEGRAM_PUBLIC_CHANNEL')
 
 WHITELIST_CLOSED = os.environ.get('WHITELIST_CLOSED', False) in ['yes', 'true', '1', 'y', 't']
+# Only users who already provided their info can proceed
+REGISTRATION_CLOSED = os.environ.get('REGISTRATION_CLOSED', 'yes') in ['yes', 'true', '1', 'y', 't']
 
 # UTC timestamp of when  whitelist should be opened
 WHITELIST_OPEN_DATE = os.environ.get('WHITELIST_OPEN_TS', None)
@@ -72,4 +105,10 @@ if WHITELIST_OPEN_DATE:
     except:
         WHITELIST_OPEN_DATE = None
 
+FLAGS_TTL = float(os.environ.get('FLAGS_TTL', 5))  # Seconds flags (see `flags`) are used for before refresh
+
 SALT = os.environ.get('SALT', 'salt')
+TOKEN_TTL = int(os.environ.get('TOKEN_TTL', 60 * 60 * 24 * 30))  # Seconds issued auth tokens are valid for
+EMAIL_TOKEN_TTL = int(os.environ.get('EMAIL_TOKEN_TTL', 60 * 60 * 24 * 365))  # Same for tokens in emailed links
+LEGACY_TOKENS_EXPIRE_TS = int(os.environ.get('LEGACY_TOKENS_EXPIRE_TS', 0))  # UTC timestamp, 0 to accept them forever
+TOKENS_CACHE_SIZE = int(os.environ.get('TOKENS_CACHE_SIZE', 64 * 1024))  # Number of issued and verified tokens cached
@@ -4,3 +4,6 @@ TESTING = True
 DEBUG = True
 
 SALT = 'salt'
+
+SIGNALS_POOL_SIZE = 0  # Run background signal receivers inline
+FLAGS_TTL = 0  # Read flags from DB every time
@@ -12,7 +12,8 @@ from mongoengine import Document
 from app import create_app
 from errors import AppError
 from tokens import get_token
-from user.models import User
+from user.models import StateCount, User
+from user.status import eth_status
 
 
 @pytest.fixture(scope='function')
@@ -23,6 +24,8 @@ def app() -> Flask:
     db = Document._get_db()
     for name in db._collections.keys():
         db._collections[name]._documents = OrderedDict()
+    StateCount.get.cache.invalidate()
+    eth_status.cache.invalidate()
 
 
 class TestClient(object):
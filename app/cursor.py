@@ -0,0 +1,180 @@
+"""
+Keyset pagination over big collections for batch scripts, resumable after a crash.
+
+Documents are read by ``_id`` ranges (``_id > last seen``), so every page costs the same no matter how deep into the
+collection it is, unlike ``skip``. Progress is saved into a `Checkpoint` after each processed chunk::
+
+    for chunk in resumable('eth.batch', User.objects, 800):
+        process(chunk)
+
+Documents which couldn't be processed can be recorded with `Checkpoint.fail`, they are yielded again by a retry pass
+at the end of the run.
+
+Collection can be split into `shared_partitions` to be processed by several scripts at once, each with its own
+checkpoint.
+"""
+import datetime
+import logging
+from typing import Iterator, List, Optional, Tuple
+
+from bson import ObjectId
+from mongoengine import BooleanField, DateTimeField, Document, IntField, ListField, ObjectIdField, QuerySet, StringField
+
+log = logging.getLogger(__name__)
+
+#: Range of ids (start exclusive, stop inclusive), `None` for an open end
+Range = Tuple[Optional[ObjectId], Optional[ObjectId]]
+
+MIN_ID = ObjectId('0' * 24)  # Bound of empty partitions
+
+
+class Checkpoint(Document):
+    name = StringField(primary_key=True)
+
+    # Range is stored with the progress, so a resumed run keeps it even if the collection changed
+    start_id = ObjectIdField()
+    stop_id = ObjectIdField()
+    last_id = ObjectIdField()
+    processed = IntField(default=0)
+    done = BooleanField(default=False)
+    updated_at = DateTimeField(default=datetime.datetime.utcnow)
+
+    # Ids of documents to retry, `failed` are moved to `retrying` when a retry pass starts
+    failed = ListField(ObjectIdField())
+    retrying = ListField(ObjectIdField())
+
+    @classmethod
+    def load(cls, name: str, id_range: Range = (None, None)) -> 'Checkpoint':
+        """ Return saved checkpoint or a new one for ``id_range``. """
+        obj = cls.objects(name=name).first()
+        if obj:
+            return obj
+        start, stop = id_range
+        return cls(name=name, start_id=start, stop_id=stop, last_id=start)
+
+    def advance(self, last_id: ObjectId, count: int):
+        self.last_id = last_id
+        self.processed += count
+        self.updated_at = datetime.datetime.utcnow()
+        self.save()
+
+    @classmethod
+    def fail(cls, name: str, ids: List[ObjectId]):
+        """ Record documents which failed to be processed, so the retry pass yields them again. """
+        if ids:
+            cls.objects(name=name).update_one(add_to_set__failed=list(ids))
+
+
+class Partitions(Document):
+    """ Boundaries of `shared_partitions`, stored once for all the processes. """
+    name = StringField(primary_key=True)
+    bounds = ListField(ObjectIdField())
+
+
+def iter_chunks(queryset: QuerySet, chunk_size: int, id_range: Range = (None, None)) -> Iterator[List[Document]]:
+    """ Yield documents of ``queryset`` in ``id_range`` by chunks, ordered by id. """
+    start, stop = id_range
+    while True:
+        query = queryset.order_by('id')
+        if start is not None:
+            query = query.filter(id__gt=start)
+        if stop is not None:
+            query = query.filter(id__lte=stop)
+
+        chunk = list(query.limit(chunk_size).no_cache())
+        if not chunk:
+            return
+
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        start = chunk[-1].id
+
+
+def partitions(queryset: QuerySet, count: int) -> List[Range]:
+    """
+    Split ``queryset`` into ``count`` id ranges of about the same size.
+
+    Boundaries are found with one ``skip`` each, so it's cheap enough for a handful of partitions. Last range is open
+    ended, so documents added meanwhile are processed too.
+    """
+    total = queryset.count()
+    ids = queryset.order_by('id').scalar('id')
+    bounds = [None]
+    for idx in range(1, count):
+        position = total * idx // count
+        bounds.append(ids.skip(position - 1).first() if position else MIN_ID)
+    bounds.append(None)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def shared_partitions(name: str, queryset: QuerySet, count: int) -> List[Range]:
+    """
+    Same as `partitions`, but boundaries are computed by the first process to ask and stored as ``name``.
+
+    Processes started at different times then split the collection the same way, with no gaps or overlaps between
+    their ranges even if documents were added meanwhile. Delete the `Partitions` document to split it anew.
+    """
+    obj = Partitions.objects(name=name).first()
+    if not obj:
+        bounds = [stop for _, stop in partitions(queryset, count)[:-1]]
+        # If another process got there first, its boundaries are kept
+        Partitions.objects(name=name).update_one(set_on_insert__bounds=bounds, upsert=True)
+        obj = Partitions.objects.get(name=name)
+
+    bounds = [None, *obj.bounds, None]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def resumable(
+        name: str,
+        queryset: QuerySet,
+        chunk_size: int,
+        id_range: Range = (None, None),
+        restart: bool = False,
+) -> Iterator[List[Document]]:
+    """
+    Same as `iter_chunks`, but continues from checkpoint ``name`` if there is one.
+
+    Chunk is recorded as processed once the next one is requested, so a chunk which was being processed when the
+    script crashed is yielded again on the next run. Pass ``restart`` to start over.
+
+    Documents recorded with `Checkpoint.fail` meanwhile are yielded once more after the whole range. Those failing
+    again are kept for the retry pass of the next run, which happens even if the checkpoint is done.
+    """
+    if restart:
+        Checkpoint.objects(name=name).delete()
+
+    checkpoint = Checkpoint.load(name, id_range)
+    if checkpoint.done:
+        log.info('%s is already done, %s processed', name, checkpoint.processed)
+    else:
+        if checkpoint.processed:
+            log.info('Resuming %s after %s, %s processed', name, checkpoint.last_id, checkpoint.processed)
+        checkpoint.save()  # Failures may be recorded while the first chunk is processed
+
+        for chunk in iter_chunks(queryset, chunk_size, (checkpoint.last_id, checkpoint.stop_id)):
+            yield chunk
+            checkpoint.advance(chunk[-1].id, len(chunk))
+
+        checkpoint.done = True
+        checkpoint.save()
+
+    yield from _retry(name, queryset, chunk_size)
+
+
+def _retry(name: str, queryset: QuerySet, chunk_size: int) -> Iterator[List[Document]]:
+    checkpoint = Checkpoint.objects.get(name=name)
+    if not checkpoint.retrying:  # Unless the previous retry pass crashed
+        if not checkpoint.failed:
+            return
+        Checkpoint.objects(name=name).update_one(set__retrying=checkpoint.failed, pull_all__failed=checkpoint.failed)
+        checkpoint.reload()
+
+    log.info('Retrying %s documents of %s', len(checkpoint.retrying), name)
+    for chunk in iter_chunks(queryset.filter(id__in=checkpoint.retrying), chunk_size):
+        yield chunk
+        Checkpoint.objects(name=name).update_one(pull_all__retrying=[obj.id for obj in chunk])
+
+    # Documents deleted meanwhile aren't retried
+    Checkpoint.objects(name=name).update_one(set__retrying=[])
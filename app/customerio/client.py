@@ -14,7 +14,8 @@ from typing import Optional, Union
 from bson import ObjectId
 from requests import HTTPError, Response
 
-from config import CUSTOMER_IO_API_KEY, CUSTOMER_IO_SITE_ID
+from config import CUSTOMER_IO_API_KEY, CUSTOMER_IO_SITE_ID, EMAIL_TOKEN_TTL
+from serializer import timestamp
 from session import build_session
 from tokens import get_token
 from user.models import User
@@ -69,9 +70,9 @@ class CustomerIO(object):
         data.update(
             email=user.email,
             telegram=user.telegram,
-            created_at=int(user.created_at.strftime('%s')),
-            dob=int(user.dob.strftime('%s')) if user.dob else None,
-            token=get_token(user.id),
+            created_at=timestamp(user.created_at),
+            dob=timestamp(user.dob),
+            token=get_token(user.id, EMAIL_TOKEN_TTL),  # Used in emailed links, which may be opened much later
         )
         data.update(kwargs)
         return self.request('PUT', user, **data)
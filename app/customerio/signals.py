@@ -13,7 +13,7 @@ from user.models import User
 log = logging.getLogger(__name__)
 
 
-@connect(User.on_create)
+@connect(User.on_create, background=True)
 def identify_user(user: User, **_):
     try:
         customerio.identify(user, ip=user.ip, idm_tid=user.idm_tid)
@@ -21,7 +21,7 @@ def identify_user(user: User, **_):
         log.exception('Customer error')
 
 
-@connect(User.on_transition)
+@connect(User.on_transition, background=True)
 def on_transition(user: User, transition: Transition):
     try:
         customerio.event(user, EVENT_TRANSITION, state_before=transition[0], state_now=transition[1])
@@ -29,7 +29,7 @@ def on_transition(user: User, transition: Transition):
         log.exception('Customer transition error')
 
 
-@connect(IDUpload.on_create)
+@connect(IDUpload.on_create, background=True)
 def id_uploaded(upload: IDUpload, **_):
     try:
         customerio.identify(
@@ -44,7 +44,7 @@ def id_uploaded(upload: IDUpload, **_):
         log.exception('Customer error')
 
 
-@connect(User.on_transition)
+@connect(User.on_transition, background=True)
 def update_users_state(user: User, transition: Transition):
     try:
         customerio.identify(user)
@@ -52,7 +52,7 @@ def update_users_state(user: User, transition: Transition):
         log.exception('Customer error')
 
 
-@connect(Check.on_update)
+@connect(Check.on_update, background=True)
 def update_user_status_on_complete_check(check: Check, **_):
     if check.status != CHECK_COMPLETE:
         return
@@ -64,7 +64,7 @@ def update_user_status_on_complete_check(check: Check, **_):
     customerio.identify(check.user)
 
 
-@connect(Check.on_update)
+@connect(Check.on_update, background=True)
 def store_check_event(check: Check, **_):
     if not check.user:
         log.exception('Check missing user: %s', check.id)
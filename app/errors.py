@@ -1,11 +1,18 @@
 import re
-from typing import Any
+from typing import Any, Dict, Tuple, Type
 
 import mongoengine.errors
 import voluptuous
-from flask import jsonify
+from flask import current_app
 from werkzeug.exceptions import HTTPException
 
+from serializer import jsonify
+
+
+#: Encoded bodies of errors without details by error class and key, errors are usually answered with these
+_bodies: Dict[Tuple[Type['AppError'], str], bytes] = {}
+MAX_CACHED_BODIES = 1024  # Keys of some errors (e.g. validation ones) aren't constant, don't let those fill memory
+
 
 class AppError(HTTPException):
     code = 400
@@ -19,21 +26,33 @@ class AppError(HTTPException):
 
     @classmethod
     def slugify_exception_name(cls):
-        return re.sub(r'(?<=[a-z])(?=[A-Z])', '-', cls.__name__).lower()
+        if '_slug' not in cls.__dict__:
+            cls._slug = re.sub(r'(?<=[a-z])(?=[A-Z])', '-', cls.__name__).lower()
+        return cls._slug
 
     def get_response(self, environ=None):
         return self.jsonify()
 
-    def jsonify(self):
-        error_obj = {
+    def to_json(self) -> dict:
+        return {
             'error': self.slugify_exception_name(),
             'key': self.key,
             'details': self.details,
         }
 
-        res = jsonify(error_obj)
-        res.status_code = self.code
+    def jsonify(self):
+        if self.details is not None:
+            res = jsonify(self.to_json())
+        else:
+            cache_key = (type(self), self.key)
+            body = _bodies.get(cache_key)
+            if body is None:
+                body = jsonify(self.to_json()).get_data()
+                if len(_bodies) < MAX_CACHED_BODIES:
+                    _bodies[cache_key] = body
+            res = current_app.response_class(body, mimetype='application/json')
 
+        res.status_code = self.code
         return res
 
 
@@ -58,6 +77,10 @@ class WhitelistClosed(AppError):
     code = 410
 
 
+class PayloadTooLarge(AppError):
+    code = 413
+
+
 def register_errors(app):
     @app.errorhandler(AppError)
     def handle_invalid_usage(error):
@@ -1,86 +1,67 @@
-import json
+from gevent import monkey
+monkey.patch_all()
+
 import logging
 import sys
-from typing import Tuple
-
-import requests
-from mongoengine import QuerySet
+from typing import List
 
 from app import create_app
-from chunks import chunks
+from config import ETH_RPC_BATCH_SIZE, ETH_RPC_CONCURRENCY
+from cursor import Checkpoint, resumable, shared_partitions
 from eth.models import Address
-from onfid.helpers import rate_limit
+from eth.rpc import check_eth
 from user.models import User
 
 _ = create_app('prod')
 log = logging.getLogger(__name__)
 
+CHUNK_SIZE = ETH_RPC_BATCH_SIZE * ETH_RPC_CONCURRENCY  # Enough to keep all concurrent requests busy
+
+
+def check_users(users: List[User]) -> List[User]:
+    """ Check addresses of ``users`` which weren't checked yet, all of them at once. Returns users left unchecked. """
+    addresses = {user.eth_address for user in users if user.eth_address}
+    stored = {address: (obj.balance, obj.transactions) for address, obj in Address.prefetch(addresses).items()}
+
+    checked = check_eth(sorted(addresses - set(stored)))
+    Address.store(checked)
+
+    unchecked = []
+    for user in users:
+        if not user.eth_address:
+            continue
 
-def get_users(start: int = None, limit: int = None) -> QuerySet:
-    res = User.objects.order_by('id')
-    if start:
-        res = res.skip(start)
-    if limit:
-        res = res.limit(limit)
-
-    return res.no_cache()
-
-
-@rate_limit(500)
-def check_eth(address: str) -> Tuple[float, int]:
-    try:
-        res = requests.get(
-            'https://api.infura.io/v1/jsonrpc/mainnet/eth_getBalance',
-            params={'params': json.dumps([f'0x{address}', 'latest'])},
-        )
-        value = res.json().get('result')
-        int_value = int(value, 16)
-        balance = float(int_value / (10 ** 18))
-    except Exception as ex:
-        log.exception('eth_getBalance: %s', ex)
-        balance = 0.
-
-    try:
-        res = requests.get(
-            'https://api.infura.io/v1/jsonrpc/mainnet/eth_getTransactionCount',
-            params={'params': json.dumps([f'0x{address}', 'latest'])},
-        )
-        value = res.json().get('result')
-        txes = int(value, 16)
-    except Exception as ex:
-        log.exception('eth_getBalance: %s', ex)
-        txes = 0
-
-    return balance, txes
-
-
-def check_user(user: User) -> bool:
-    eth = user.eth_address
-    stored = Address.objects(address=eth).first()
-    if not stored:
-        balance, txes = check_eth(eth)
-        stored = Address(address=eth, balance=balance, transactions=txes).save()
-        log.info('User %s has balance of %s and %s transactions', user.id, balance, txes)
-    else:
-        log.info('User %s has balance of %s and %s transactions [CACHED]', user.id, stored.balance, stored.transactions)
-    return stored.balance and stored.transactions
-
-
-def main(start: int, stop: int):
-    users = get_users(start, stop)
-
-    for chunk in chunks(users, 100):
-        for user in chunk:
-            check_user(user)
+        if user.eth_address in checked:
+            balance, txes = checked[user.eth_address]
+            log.info('User %s has balance of %s and %s transactions', user.id, balance, txes)
+        elif user.eth_address in stored:
+            balance, txes = stored[user.eth_address]
+            log.info('User %s has balance of %s and %s transactions [CACHED]', user.id, balance, txes)
+        else:
+            log.warning('User %s address %s was not checked', user.id, user.eth_address)
+            unchecked.append(user)
+    return unchecked
+
+
+def main(partition: int = 0, count: int = 1, restart: bool = False):
+    """
+    Check users of ``partition`` (out of ``count``), continuing from where the previous run stopped.
+
+    Users whose addresses failed to be checked are retried at the end, and on the next run if they fail again.
+    """
+    name = f'eth.batch:{partition}/{count}'
+    id_range = shared_partitions(f'eth.batch/{count}', User.objects, count)[partition] if count > 1 else (None, None)
+
+    users = User.objects.only('id', 'eth_address')
+    for chunk in resumable(name, users, CHUNK_SIZE, id_range, restart=restart):
+        Checkpoint.fail(name, [user.id for user in check_users(chunk)])
 
 
 if __name__ == '__main__':
-    start = count = 0
-    if len(sys.argv) == 3:
-        start = int(sys.argv[1])
-        count = int(sys.argv[2])
-    elif len(sys.argv) == 2:
-        start = int(sys.argv[1])
-
-    log.info('Doing items %s to %s', start, start + count)
-    main(start, count)
+    # python -m eth.batch [<partition> <number of partitions>] [--restart]
+    restart = '--restart' in sys.argv
+    args = [int(arg) for arg in sys.argv[1:] if arg != '--restart']
+    partition, count = args if args else (0, 1)
+
+    log.info('Checking partition %s of %s', partition, count)
+    main(partition, count, restart)
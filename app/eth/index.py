@@ -0,0 +1,190 @@
+"""
+Whitelisted eth addresses as a prebuilt binary index shared by all workers through mmap.
+
+File layout: `HEADER` (magic, number of addresses, bloom filter size in bytes and number of its hashes), bloom
+filter bits, fanout table, then sorted 20 byte addresses. Fanout table (as in git pack indexes) holds number of
+addresses with first two bytes up to its position, so lookups check the bloom filter first and then binary search
+only a handful of addresses sharing the prefix.
+
+Build it from a text file with one hex address per line::
+
+    python -m eth.index eths.txt eths.idx
+
+The index is written next to the target and moved into place with `os.replace`, so running workers never see a
+partial file and pick up the new one on their next check.
+"""
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from typing import Iterable, Optional, Tuple
+
+from config import ETH_INDEX_CHECK_INTERVAL, ETH_INDEX_PATH
+
+log = logging.getLogger(__name__)
+
+MAGIC = b'ETHX'
+HEADER = struct.Struct('>4sIIB')
+ADDRESS_SIZE = 20
+FANOUT = 1 << 16
+FANOUT_ENTRY = struct.Struct('>I')
+BLOOM_BITS = 10  # Bits of bloom filter per address, gives ~1% false positives with `BLOOM_HASHES`
+BLOOM_HASHES = 7
+
+
+def to_bytes(address: str) -> Optional[bytes]:
+    """ Convert hex address (with or without 0x prefix) to 20 bytes, `None` if it isn't a valid address. """
+    if address[:2] in ('0x', '0X'):
+        address = address[2:]
+    if len(address) != ADDRESS_SIZE * 2:
+        return None
+    try:
+        return bytes.fromhex(address)
+    except ValueError:
+        return None
+
+
+def _bloom_positions(address: bytes, bits: int, hashes: int) -> Iterable[int]:
+    # Addresses are keccak derived, so their own bytes are as good as a hash (double hashing scheme)
+    h1 = int.from_bytes(address[:8], 'big')
+    h2 = int.from_bytes(address[8:16], 'big') | 1
+    return ((h1 + i * h2) % bits for i in range(hashes))
+
+
+def build(addresses: Iterable[str], path: str, bloom_bits: int = BLOOM_BITS) -> int:
+    """ Write index of ``addresses`` to ``path`` atomically. Invalid addresses are skipped. Returns their count. """
+    items = sorted({address for address in map(to_bytes, (item.strip() for item in addresses)) if address})
+
+    bloom = bytearray((len(items) * bloom_bits + 7) // 8 if bloom_bits else 0)
+    if bloom:
+        bits = len(bloom) * 8
+        for address in items:
+            for pos in _bloom_positions(address, bits, BLOOM_HASHES):
+                bloom[pos >> 3] |= 1 << (pos & 7)
+
+    fanout = [0] * FANOUT
+    for address in items:
+        fanout[int.from_bytes(address[:2], 'big')] += 1
+    for i in range(1, FANOUT):
+        fanout[i] += fanout[i - 1]
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(HEADER.pack(MAGIC, len(items), len(bloom), BLOOM_HASHES if bloom else 0))
+            fh.write(bloom)
+            fh.write(struct.pack(f'>{FANOUT}I', *fanout))
+            fh.write(b''.join(items))
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    return len(items)
+
+
+class AddressIndex(object):
+    """
+    Read side of the index file at ``path``.
+
+    File is re-checked at most once per ``check_interval`` seconds and remapped if it was replaced or changed. While
+    there's no file, index is empty.
+    """
+
+    def __init__(self, path: str, check_interval: float = ETH_INDEX_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+
+        self._checked_at = 0.
+        self._signature = None  # (inode, mtime, size) of mapped file
+        self._data = None  # (mmap, count, bloom offset, bloom bits, bloom hashes, fanout offset, addresses offset)
+
+    def __contains__(self, address: str) -> bool:
+        return self.contains(to_bytes(address) or b'')
+
+    def __len__(self) -> int:
+        data = self._load()
+        return data[1] if data else 0
+
+    def contains(self, address: bytes) -> bool:
+        data = self._load()
+        if not data or len(address) != ADDRESS_SIZE:
+            return False
+
+        buf, count, bloom_offset, bloom_bits, bloom_hashes, fanout_offset, offset = data
+        if bloom_bits:
+            for pos in _bloom_positions(address, bloom_bits, bloom_hashes):
+                if not buf[bloom_offset + (pos >> 3)] & (1 << (pos & 7)):
+                    return False
+
+        prefix = fanout_offset + FANOUT_ENTRY.size * ((address[0] << 8) | address[1])
+        lo = FANOUT_ENTRY.unpack_from(buf, prefix - FANOUT_ENTRY.size)[0] if prefix > fanout_offset else 0
+        hi = FANOUT_ENTRY.unpack_from(buf, prefix)[0]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = offset + mid * ADDRESS_SIZE
+            item = buf[start:start + ADDRESS_SIZE]
+            if item < address:
+                lo = mid + 1
+            elif item > address:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def _load(self) -> Optional[Tuple]:
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            self.reload()
+        return self._data
+
+    def reload(self):
+        """ Map the file again if it was changed since it was mapped last time. """
+        try:
+            fh = open(self.path, 'rb')
+        except FileNotFoundError:
+            if self._data:
+                log.warning('Address index %s is gone, keeping the last one', self.path)
+            return
+
+        with fh:
+            stat = os.fstat(fh.fileno())
+            signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if signature == self._signature:
+                return
+
+            if stat.st_size < HEADER.size + FANOUT * FANOUT_ENTRY.size:
+                log.error('Address index %s is corrupted', self.path)
+                return
+
+            # Old mapping is closed once the last reference to it is gone
+            buf = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, count, bloom_size, bloom_hashes = HEADER.unpack_from(buf)
+        offset = HEADER.size + bloom_size + FANOUT * FANOUT_ENTRY.size
+        if magic != MAGIC or len(buf) != offset + count * ADDRESS_SIZE:
+            log.error('Address index %s is corrupted', self.path)
+            return
+
+        self._data = (buf, count, HEADER.size, bloom_size * 8, bloom_hashes, HEADER.size + bloom_size, offset)
+        self._signature = signature
+        log.info('Loaded %d addresses from %s', count, self.path)
+
+
+index = AddressIndex(ETH_INDEX_PATH)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    source, target = sys.argv[1:3] if len(sys.argv) > 2 else (sys.argv[1], ETH_INDEX_PATH)
+    with open(source, 'r') as fh:
+        total = build(fh, target)
+    log.info('Written %d addresses to %s', total, target)
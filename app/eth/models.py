@@ -1,7 +1,8 @@
 import datetime
-from typing import Any, Union
+from typing import Any, Dict, Iterable, Tuple, Union
 
 from mongoengine import DateTimeField, Document, DynamicField, StringField, FloatField, BooleanField, IntField
+from pymongo import UpdateOne
 
 
 class Cache(Document):
@@ -37,4 +38,20 @@ class Address(Document):
     transactions = IntField()
     valid = BooleanField()
 
-    comment = StringField()
\ No newline at end of file
+    comment = StringField()
+
+    @classmethod
+    def prefetch(cls, addresses: Iterable[str]) -> Dict[str, 'Address']:
+        """ Load stored ``addresses`` with a single ``$in`` query. Missing ones aren't in the result. """
+        return cls.objects.in_bulk(list(set(addresses)))
+
+    @classmethod
+    def store(cls, results: Dict[str, Tuple[float, int]]):
+        """ Save balance and number of transactions by address with a single unordered bulk upsert. """
+        if not results:
+            return
+
+        cls._get_collection().bulk_write([
+            UpdateOne({'_id': address}, {'$set': {'balance': balance, 'transactions': txes}}, upsert=True)
+            for address, (balance, txes) in results.items()
+        ], ordered=False)
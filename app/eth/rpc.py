@@ -0,0 +1,82 @@
+"""
+Client of an Ethereum JSON-RPC node (Infura by default), used to check balances of users' addresses.
+
+Calls are sent as JSON-RPC batches: one HTTP request covers ``ETH_RPC_BATCH_SIZE`` addresses with both
+``eth_getBalance`` and ``eth_getTransactionCount`` for each, and up to ``ETH_RPC_CONCURRENCY`` of them run at once
+over a pooled session.
+"""
+import logging
+from typing import Dict, List, Tuple
+
+import gevent.pool
+
+from chunks import chunks
+from config import ETH_RPC_BATCH_SIZE, ETH_RPC_CONCURRENCY, ETH_RPC_TIMEOUT, ETH_RPC_URL
+from session import build_session
+
+log = logging.getLogger(__name__)
+
+WEI_PER_ETH = 10 ** 18
+
+session = build_session(ETH_RPC_CONCURRENCY)
+
+
+class RPCError(Exception):
+    pass
+
+
+def call_batch(calls: List[Tuple[str, list]]) -> List[dict]:
+    """
+    Send ``calls`` (pairs of method and params) as a single batch request.
+
+    Returns responses in order of the calls, each either with ``result`` or ``error``.
+    """
+    payload = [
+        {'jsonrpc': '2.0', 'id': idx, 'method': method, 'params': params}
+        for idx, (method, params) in enumerate(calls)
+    ]
+    res = session.post(ETH_RPC_URL, json=payload, timeout=ETH_RPC_TIMEOUT)
+    res.raise_for_status()
+
+    data = res.json()
+    if not isinstance(data, list):  # Whole batch was rejected
+        raise RPCError(data.get('error') if isinstance(data, dict) else data)
+
+    # Node may answer batch items in any order
+    by_id = {item.get('id'): item for item in data}
+    return [by_id.get(idx, {'error': 'missing response'}) for idx in range(len(calls))]
+
+
+def _check_batch(addresses: List[str]) -> Dict[str, Tuple[float, int]]:
+    calls = []
+    for address in addresses:
+        calls.append(('eth_getBalance', [f'0x{address}', 'latest']))
+        calls.append(('eth_getTransactionCount', [f'0x{address}', 'latest']))
+
+    try:
+        responses = call_batch(calls)
+    except Exception as ex:
+        log.exception('JSON-RPC batch of %s addresses failed: %s', len(addresses), ex)
+        return {}
+
+    res = {}
+    for idx, address in enumerate(addresses):
+        balance, txes = responses[idx * 2], responses[idx * 2 + 1]
+        try:
+            res[address] = (int(balance['result'], 16) / WEI_PER_ETH, int(txes['result'], 16))
+        except (KeyError, TypeError, ValueError):
+            log.error('Failed to check %s: %s, %s', address, balance.get('error'), txes.get('error'))
+    return res
+
+
+def check_eth(addresses: List[str]) -> Dict[str, Tuple[float, int]]:
+    """
+    Return balance in ETH and number of transactions by address.
+
+    Addresses which failed to be checked are left out, so they aren't mistaken for empty ones.
+    """
+    pool = gevent.pool.Pool(ETH_RPC_CONCURRENCY)
+    res = {}
+    for checked in pool.imap_unordered(_check_batch, chunks(addresses, ETH_RPC_BATCH_SIZE)):
+        res.update(checked)
+    return res
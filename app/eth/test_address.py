@@ -0,0 +1,44 @@
+from mock import Mock, patch
+from pymongo import UpdateOne
+
+from eth.models import Address
+
+
+def bulk_collection() -> Mock:
+    """ Collection with `bulk_write` run request by request, mongomock can't run pymongo requests in bulk. """
+    collection = Address._get_collection()
+
+    def bulk_write(requests, ordered=True):
+        for request in requests:
+            collection.update_one(request._filter, request._doc, upsert=request._upsert)
+
+    return Mock(wraps=collection, bulk_write=Mock(side_effect=bulk_write))
+
+
+def test_prefetch(service):
+    Address(address='a' * 40, balance=1., transactions=2).save()
+    Address(address='b' * 40, balance=0., transactions=0).save()
+
+    with patch.object(Address, 'objects', wraps=Address.objects) as objects:
+        res = Address.prefetch(['a' * 40, 'b' * 40, 'c' * 40, 'a' * 40])
+        assert objects.in_bulk.call_count == 1
+
+    assert set(res) == {'a' * 40, 'b' * 40}
+    assert res['a' * 40].balance == 1.
+
+
+def test_store(service):
+    Address(address='a' * 40, balance=1., transactions=2, comment='blop').save()
+
+    with patch.object(Address, '_get_collection', return_value=bulk_collection()) as get_collection:
+        Address.store({'a' * 40: (3., 4), 'b' * 40: (5., 6)})
+        Address.store({})
+
+    get_collection.return_value.bulk_write.assert_called_once_with([
+        UpdateOne({'_id': 'a' * 40}, {'$set': {'balance': 3., 'transactions': 4}}, upsert=True),
+        UpdateOne({'_id': 'b' * 40}, {'$set': {'balance': 5., 'transactions': 6}}, upsert=True),
+    ], ordered=False)
+
+    a, b = Address.objects.order_by('address')
+    assert (a.balance, a.transactions, a.comment) == (3., 4, 'blop')
+    assert (b.balance, b.transactions) == (5., 6)
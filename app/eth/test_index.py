@@ -0,0 +1,72 @@
+import os
+
+from mock import patch
+
+from conftest import error
+from errors import RouteNotFound
+from eth.index import AddressIndex, build
+
+ADDRESSES = [f'{i:040x}' for i in range(1, 1000, 3)]
+
+
+def test_lookup(tmpdir):
+    path = str(tmpdir.join('eths.idx'))
+    assert build(ADDRESSES + ['0x' + 'f' * 40, 'blop', ''], path) == len(ADDRESSES) + 1
+
+    index = AddressIndex(path)
+    assert len(index) == len(ADDRESSES) + 1
+    assert all(address in index for address in ADDRESSES)
+    assert 'F' * 40 in index
+    assert '0x' + 'f' * 40 in index
+    assert f'{2:040x}' not in index
+    assert f'{1000:040x}' not in index
+    assert 'blop' not in index
+
+
+def test_without_bloom(tmpdir):
+    path = str(tmpdir.join('eths.idx'))
+    build(ADDRESSES, path, bloom_bits=0)
+
+    index = AddressIndex(path)
+    assert all(address in index for address in ADDRESSES)
+    assert not any(f'{i:040x}' in index for i in range(0, 1000, 3))
+
+
+def test_reload(tmpdir):
+    path = str(tmpdir.join('eths.idx'))
+    index = AddressIndex(path, check_interval=0)
+    assert len(index) == 0
+    assert ADDRESSES[0] not in index
+
+    build(ADDRESSES[:1], path)
+    assert ADDRESSES[0] in index
+    assert ADDRESSES[1] not in index
+
+    build(ADDRESSES, path)
+    assert ADDRESSES[1] in index
+
+    os.unlink(path)
+    assert ADDRESSES[1] in index  # Last good index is kept
+
+
+def test_corrupted(tmpdir):
+    path = str(tmpdir.join('eths.idx'))
+    build(ADDRESSES, path)
+    index = AddressIndex(path, check_interval=0)
+    assert ADDRESSES[0] in index
+
+    with open(path, 'ab') as fh:
+        fh.write(b'blop')
+    assert ADDRESSES[0] in index
+
+
+def test_whitelisted_route(service, tmpdir):
+    path = str(tmpdir.join('eths.idx'))
+    build(ADDRESSES, path)
+
+    with patch('user.views.whitelisted_addresses', AddressIndex(path)):
+        res = service.get(f'/v1/tokensale/0x{ADDRESSES[0]}')
+        assert res.status_code == 200, res.json
+        assert res.json['max_contribution']
+
+        assert error(service.get(f'/v1/tokensale/{2:040x}'), RouteNotFound)
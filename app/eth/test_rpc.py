@@ -0,0 +1,59 @@
+import json
+
+from mock import Mock, patch
+
+from eth import rpc
+from eth.rpc import check_eth
+
+ADDRESSES = [f'{i:040x}' for i in range(1, 6)]
+
+
+def node(payload: list) -> list:
+    """ Fake node answering batch in reverse order, failing calls for the last address. """
+    res = []
+    for item in reversed(payload):
+        address = int(item['params'][0], 16)
+        if address == 5:
+            res.append({'jsonrpc': '2.0', 'id': item['id'], 'error': {'code': -32000, 'message': 'blop'}})
+        elif item['method'] == 'eth_getBalance':
+            res.append({'jsonrpc': '2.0', 'id': item['id'], 'result': hex(address * 10 ** 18)})
+        else:
+            res.append({'jsonrpc': '2.0', 'id': item['id'], 'result': hex(address * 2)})
+    return res
+
+
+def post(url: str, json: list = None, **_) -> Mock:
+    return Mock(json=Mock(return_value=node(json)))
+
+
+def test_check_eth():
+    with patch.object(rpc.session, 'post', side_effect=post) as send, patch('eth.rpc.ETH_RPC_BATCH_SIZE', 2):
+        res = check_eth(ADDRESSES)
+
+    assert send.call_count == 3
+    assert all(len(call[1]['json']) <= 4 for call in send.call_args_list)
+    assert res == {
+        ADDRESSES[0]: (1., 2),
+        ADDRESSES[1]: (2., 4),
+        ADDRESSES[2]: (3., 6),
+        ADDRESSES[3]: (4., 8),
+    }
+
+
+def test_failed_batch():
+    def failing(url: str, json: list = None, **_):
+        if any(item['params'][0] == f'0x{ADDRESSES[0]}' for item in json):
+            raise OSError('blop')
+        return post(url, json)
+
+    with patch.object(rpc.session, 'post', side_effect=failing), patch('eth.rpc.ETH_RPC_BATCH_SIZE', 2):
+        res = check_eth(ADDRESSES)
+
+    # Addresses of failed batch are left out instead of being reported empty
+    assert set(res) == set(ADDRESSES[2:4])
+
+
+def test_rejected_batch():
+    response = Mock(json=Mock(return_value=json.loads('{"error": {"code": -32600}}')))
+    with patch.object(rpc.session, 'post', return_value=response):
+        assert check_eth(ADDRESSES) == {}
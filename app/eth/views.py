@@ -5,11 +5,12 @@ import logging
 from typing import Tuple
 
 import requests
-from flask import Blueprint, jsonify
+from flask import Blueprint
 
 from config import DOCK_PER_ETH, ETH_ADDRESS, ETH_BALANCE_ADDRESS
 from customerio.client import customerio
 from eth.models import Cache
+from serializer import jsonify, timestamp
 from user.models import User
 from user.state import CONTRIBUTED
 from user.views import to_eth
@@ -54,11 +55,11 @@ def get_cached_amount(_: int) -> Tuple[float, float, datetime.datetime]:
 
 @blueprint.route('/v1/eth', methods=['GET'])
 def eth_amount():
-    ts = int(datetime.datetime.utcnow().strftime('%s'))
+    ts = timestamp(datetime.datetime.utcnow())
     amount, last_amount, cache_date = get_cached_amount(int(ts / 30))  # Hack to cache data for 5 minutes
     return jsonify({
         'amount': amount,
-        'updated_at': int(cache_date.strftime('%s')),
+        'updated_at': timestamp(cache_date),
         'last_amount': last_amount,
     })
 
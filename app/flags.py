@@ -0,0 +1,124 @@
+"""
+Runtime flags which can be changed without a restart (e.g. to close the whitelist).
+
+Values are stored in Mongo, defaults come from config. Every process keeps a snapshot of all flags, so reading a flag
+is a dict lookup. Snapshot is refreshed in background once it's older than ``FLAGS_TTL`` seconds, so a change made
+by `FlagStore.set` in one process reaches the rest within that time.
+"""
+import datetime
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+import gevent
+from mongoengine import DateTimeField, Document, DynamicField, StringField
+
+from config import (
+    ETH_MAX_CONTRIBUTION,
+    FLAGS_TTL,
+    REGISTRATION_CLOSED,
+    VERIFIED_IDS_CAP,
+    WHITELIST_CLOSED,
+    WHITELIST_OPEN_DATE,
+)
+
+log = logging.getLogger(__name__)
+
+
+def to_bool(value: str) -> bool:
+    return value.lower() in ['yes', 'true', '1', 'y', 't']
+
+
+def to_datetime(value: str) -> Optional[datetime.datetime]:
+    """ Parse UTC timestamp, empty value or 0 mean no date. """
+    return datetime.datetime.utcfromtimestamp(int(value)) if value and int(value) else None
+
+
+#: Flag name -> (default, parser of its value given as text)
+FLAGS: Dict[str, tuple] = {
+    'WHITELIST_CLOSED': (WHITELIST_CLOSED, to_bool),
+    'WHITELIST_OPEN_DATE': (WHITELIST_OPEN_DATE, to_datetime),
+    'REGISTRATION_CLOSED': (REGISTRATION_CLOSED, to_bool),
+    'VERIFIED_IDS_CAP': (VERIFIED_IDS_CAP, int),
+    'ETH_MAX_CONTRIBUTION': (ETH_MAX_CONTRIBUTION, float),
+}
+
+
+class Flag(Document):
+    name = StringField(primary_key=True)
+    value = DynamicField()
+    updated_at = DateTimeField(default=datetime.datetime.utcnow)
+
+
+class FlagStore(object):
+    """
+    In-process snapshot of flags stored as `Flag` documents.
+
+    First read loads the snapshot, later ones return it right away and start a background refresh if it's older than
+    ``ttl`` seconds. With ``ttl`` of 0 the snapshot is refreshed inline on every read (e.g. in tests).
+    """
+
+    def __init__(self, flags: Dict[str, tuple], ttl: float):
+        self.flags = flags
+        self.ttl = ttl
+
+        self._values = {name: default for name, (default, _) in flags.items()}
+        self._loaded_at = None
+        self._refreshing = None
+
+    def setup(self, ttl: float):
+        self.ttl = ttl
+
+    def __getitem__(self, name: str) -> Any:
+        if self._loaded_at is None or not self.ttl:
+            self.refresh()
+        elif time.monotonic() - self._loaded_at >= self.ttl and not self._refreshing:
+            self._refreshing = gevent.spawn(self._refresh_in_background)
+        return self._values[name]
+
+    def parse(self, name: str, value: str) -> Any:
+        """ Convert text ``value`` (e.g. typed in a bot command) to the type of flag ``name``. """
+        parser: Callable = self.flags[name][1]
+        return parser(value)
+
+    def set(self, name: str, value: Any):
+        """ Store new value of the flag. It's used by this process right away and by others after their refresh. """
+        if name not in self.flags:
+            raise KeyError(name)
+
+        Flag.objects(name=name).update_one(
+            set__value=value,
+            set__updated_at=datetime.datetime.utcnow(),
+            upsert=True,
+        )
+        self._values = dict(self._values, **{name: value})
+
+    def reset(self, name: str):
+        """ Drop stored value of the flag, so it's back to its default. """
+        Flag.objects(name=name).delete()
+        self._values = dict(self._values, **{name: self.flags[name][0]})
+
+    def refresh(self):
+        values = {name: default for name, (default, _) in self.flags.items()}
+        for flag in Flag.objects(name__in=list(self.flags)):
+            values[flag.name] = flag.value
+
+        # Snapshot is replaced as a whole, readers never see it half updated
+        self._values = values
+        self._loaded_at = time.monotonic()
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception as ex:
+            # Keep serving the old snapshot, next read after ttl will retry
+            self._loaded_at = time.monotonic()
+            log.exception('Failed to refresh flags: %s', ex)
+        finally:
+            self._refreshing = None
+
+    def to_json(self) -> dict:
+        return dict(self._values)
+
+
+flags = FlagStore(FLAGS, FLAGS_TTL)
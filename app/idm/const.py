@@ -16,3 +16,6 @@ USER_REPUTATION_TRUSTED = 'TRUSTED'
 USER_REPUTATION_UNKNOWN = 'UNKNOWN'
 USER_REPUTATION_SUSPICIOUS = 'SUSPICIOUS'
 USER_REPUTATION_BAD = 'BAD'
+
+# Request fields holding base64 encoded ID images (front and back)
+IMAGE_FIELDS = ('scanData', 'backsideImageData')
@@ -9,3 +9,14 @@ class IDMError(Exception):
     @property
     def text(self):
         return self.error.response.text
+
+
+class IDMBusy(IDMError):
+    """ Request wasn't made because there were too many requests to the IDM in progress. Safe to retry later. """
+
+    def __init__(self):
+        super().__init__(None)
+
+    @property
+    def text(self):
+        return 'IDM is busy'
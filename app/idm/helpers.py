@@ -1,8 +1,11 @@
 import datetime
+import json
+from typing import Dict, Iterable, Iterator
 
 from bson import ObjectId
 
 from idm.const import STATUS_MAP
+from serializer import timestamp
 from user.models import User
 
 
@@ -37,8 +40,8 @@ def build_request(user: User, **kwargs) -> dict:
         'bz': user.zip_code,
         'bc': user.city,
         'bs': user.state_code,
-        'tti': int(datetime.datetime.utcnow().strftime('%s')),
-        'accountCreationTime': int(user.created_at.strftime('%s')),
+        'tti': timestamp(datetime.datetime.utcnow()),
+        'accountCreationTime': timestamp(user.created_at),
         'phn': user.phone,
         'memo1': user.eth_address,
         'memo2': user.eth_amount,
@@ -46,3 +49,27 @@ def build_request(user: User, **kwargs) -> dict:
         'docState': kwargs.get('doc_state'),
         'docType': kwargs.get('doc_type'),
     }
+
+
+def stream_body(body: dict, streams: Dict[str, Iterable[str]]) -> Iterator[bytes]:
+    """
+    Encode request body as JSON by chunks.
+
+    Values of ``streams`` are iterables of string pieces (e.g. base64 encoded image data). Each one is written into
+    the body as a single JSON string without ever being joined in memory.
+    """
+    static = json.dumps({key: value for key, value in body.items() if key not in streams})
+    if not streams:
+        yield static.encode('utf-8')
+        return
+
+    separator = ', ' if static != '{}' else ''
+    yield f'{static[:-1]}{separator}'.encode('utf-8')
+
+    for idx, (key, pieces) in enumerate(streams.items()):
+        yield f'{", " if idx else ""}{json.dumps(key)}: "'.encode('utf-8')
+        for piece in pieces:
+            yield json.dumps(piece)[1:-1].encode('utf-8')
+        yield b'"'
+
+    yield b'}'
@@ -0,0 +1,130 @@
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import gevent.event
+
+from config import IDM_CONCURRENCY, IDM_CONCURRENCY_MAX, IDM_CONCURRENCY_MIN, IDM_LATENCY_TARGET, IDM_MAX_WAIT
+from idm.errors import IDMBusy
+
+
+class Call(object):
+    """ Single call made under the limiter. Set ``failed`` if the response shows that remote side is overloaded. """
+
+    def __init__(self):
+        self.failed = False
+        self.counted = True  #: Unset if the call wasn't made after all, so it doesn't affect the limit
+        self.started = time.time()
+
+    def start(self):
+        """ Restart latency measurement, e.g. once the slot was used to prepare the call. """
+        self.started = time.time()
+
+
+class Limiter(object):
+    """
+    AIMD concurrency limiter for outbound calls, safe to use from greenlets.
+
+    Allowed concurrency grows by one per ``limit`` successful calls (about one per round trip) up to ``max_limit``,
+    only while it's fully used, so it doesn't drift up during quiet periods. It's cut by ``backoff`` when a call fails
+    or takes longer than ``latency_target``. Cuts happen at most once per
+    ``latency_target``, so a burst of failures of calls started together counts as one overload signal.
+
+    Calls above the limit wait in FIFO order up to ``max_wait`` seconds, then `IDMBusy` is raised.
+    """
+
+    def __init__(
+            self,
+            limit: int = IDM_CONCURRENCY,
+            min_limit: int = IDM_CONCURRENCY_MIN,
+            max_limit: int = IDM_CONCURRENCY_MAX,
+            latency_target: float = IDM_LATENCY_TARGET,
+            max_wait: float = IDM_MAX_WAIT,
+            backoff: float = 0.5,
+    ):
+        self.limit = float(limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.max_wait = max_wait
+        self.backoff = backoff
+
+        self.in_flight = 0
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+
+        self._waiters = deque()
+        self._decreased_at = 0.
+
+    @contextmanager
+    def call(self):
+        """ Hold a slot while making the call. Exceptions raised from the block count as failures. """
+        self._acquire()
+        call = Call()
+        try:
+            yield call
+        except BaseException:
+            call.failed = True
+            raise
+        finally:
+            if call.counted:
+                self._adjust(call.failed, time.time() - call.started)
+            self._release()
+
+    def _acquire(self):
+        if not self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return
+
+        waiter = gevent.event.Event()
+        self._waiters.append(waiter)
+        try:
+            waiter.wait(self.max_wait)
+        except BaseException:
+            if waiter.is_set():  # Slot was handed over, but we won't use it
+                self._release()
+            raise
+        finally:
+            if not waiter.is_set():
+                self._waiters.remove(waiter)
+
+        if not waiter.is_set():
+            self.rejected += 1
+            raise IDMBusy()
+
+    def _release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        """ Hand free slots to waiting calls. Slot is taken on behalf of the waiter. """
+        while self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            self._waiters.popleft().set()
+
+    def _adjust(self, failed: bool, latency: float):
+        self.calls += 1
+        if failed:
+            self.failures += 1
+
+        if failed or latency > self.latency_target:
+            now = time.time()
+            if now - self._decreased_at >= self.latency_target:
+                self._decreased_at = now
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+        elif self.in_flight >= self.limit - 1:  # This call still holds its slot
+            self.limit = min(self.max_limit, self.limit + 1. / self.limit)
+
+    def stats(self) -> dict:
+        return {
+            'limit': int(self.limit),
+            'in_flight': self.in_flight,
+            'queued': len(self._waiters),
+            'calls': self.calls,
+            'failures': self.failures,
+            'rejected': self.rejected,
+        }
+
+
+limiter = Limiter()
@@ -1,16 +1,20 @@
 import datetime
 import logging
+from typing import List
 
 from blinker import Signal
 from bson import ObjectId
-from mongoengine import DateTimeField, DictField, Document, IntField, ReferenceField, StringField
-from requests import HTTPError
+from mongoengine import DateTimeField, DictField, Document, IntField, ListField, ReferenceField, StringField
+from requests import HTTPError, Response
 
 from config import IDM_PASSWORD, IDM_URL, IDM_USERNAME
-from idm.const import STATUS_PENDING
+from idm.const import IMAGE_FIELDS, STATUS_PENDING
 from idm.errors import IDMError
-from idm.helpers import build_request, parse_response
+from idm.helpers import build_request, parse_response, stream_body
+from idm.limiter import Call, limiter
 from session import build_session
+from upload.models import Upload, open_uploads
+from upload.s3 import s3
 from user.models import User
 
 log = logging.getLogger(__name__)
@@ -35,13 +39,17 @@ class IDMRequest(Document):
     request_data = DictField()
     response_status = IntField()
 
+    #: ID images sent along with request. Those are streamed from s3 into the request body and never stored here.
+    images = ListField(ReferenceField(Upload))
+
     on_create = Signal()
 
     @classmethod
-    def create(cls, user: User, **data) -> 'IDMRequest':
+    def create(cls, user: User, images: List[Upload] = None, **data) -> 'IDMRequest':
         body = build_request(user, **data)
         obj = cls(
             user=user,
+            images=images or [],
             request_data=body,
             transaction_id=body['tid'],
         ).save()
@@ -53,7 +61,10 @@ class IDMRequest(Document):
             return IDMResponse.empty()
 
         try:
-            res = session.request('POST', IDM_URL, json=self.request_data)
+            if self.images:
+                res = self.send_with_images()
+            else:
+                res = self.post(json=self.request_data)
             self.update(
                 requested_at=datetime.datetime.utcnow(),
                 response_status=res.status_code,
@@ -66,6 +77,48 @@ class IDMRequest(Document):
             log.exception('IDM request error: %s', err)
             raise IDMError(err)
 
+    @classmethod
+    def post(cls, **kwargs) -> Response:
+        """ Post to the IDM, waiting for a free slot of the shared limiter (see `idm.limiter`). """
+        with limiter.call() as call:
+            return cls._send(call, **kwargs)
+
+    @staticmethod
+    def _send(call: Call, **kwargs) -> Response:
+        res = session.request('POST', IDM_URL, **kwargs)
+        call.failed = res.status_code == 429 or res.status_code >= 500
+        return res
+
+    def send_with_images(self) -> Response:
+        """
+        Post request with images streamed from s3 into the body.
+
+        Images are requested only once there's a free slot for the request, so requests waiting for one don't hold
+        pooled s3 connections.
+        """
+        with limiter.call() as call:
+            try:
+                keys = open_uploads(self.images)
+            except BaseException:
+                call.counted = False  # IDM wasn't called, s3 errors aren't a sign of its overload
+                raise
+
+            call.start()
+            try:
+                streams = {
+                    field: image.iter_base64(key=key)
+                    for field, image, key in zip(IMAGE_FIELDS, self.images, keys)
+                }
+                return self._send(
+                    call,
+                    data=stream_body(self.request_data, streams),
+                    headers={'Content-Type': 'application/json'},
+                )
+            finally:
+                for key in keys:
+                    if key:
+                        s3.close(key)
+
 
 class IDMResponse(Document):
     """ Keeps track of all responses we've received from the IDM. """
@@ -0,0 +1,16 @@
+import json
+
+from idm.helpers import stream_body
+
+
+def test_stream_body():
+    body = {'man': 'blop', 'scanData': None, 'stage': 2}
+    streams = {'scanData': iter(['image/png;base64,', 'SGVs', 'bG8=']), 'backsideImageData': iter([])}
+
+    res = json.loads(b''.join(stream_body(body, streams)))
+    assert res == {'man': 'blop', 'stage': 2, 'scanData': 'image/png;base64,SGVsbG8=', 'backsideImageData': ''}
+
+
+def test_stream_body_no_streams():
+    assert json.loads(b''.join(stream_body({'man': 'blop'}, {}))) == {'man': 'blop'}
+    assert json.loads(b''.join(stream_body({}, {'scanData': iter(['a"b'])}))) == {'scanData': 'a"b'}
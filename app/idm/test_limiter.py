@@ -0,0 +1,102 @@
+import gevent
+import pytest
+from mock import patch
+
+from idm.errors import IDMBusy
+from idm.limiter import Limiter
+from idm.models import IDMRequest
+from upload.models import Upload
+
+
+def test_additive_increase():
+    limiter = Limiter(limit=2, max_limit=3)
+
+    def work():
+        with limiter.call():
+            gevent.sleep(0.001)
+
+    gevent.joinall([gevent.spawn(work) for _ in range(20)], raise_error=True)
+    assert limiter.limit == 3
+    assert limiter.stats()['calls'] == 20
+
+
+def test_no_increase_when_idle():
+    limiter = Limiter(limit=4)
+    for _ in range(20):
+        with limiter.call():
+            pass
+
+    # Single call at a time doesn't show the limit is too low
+    assert limiter.limit == 4
+
+
+def test_multiplicative_decrease():
+    limiter = Limiter(limit=16, latency_target=60)
+
+    for _ in range(3):
+        with pytest.raises(IOError), limiter.call():
+            raise IOError('blop')
+
+    # Failures close to each other are one overload signal
+    assert limiter.limit == 8
+    assert limiter.failures == 3
+
+    limiter._decreased_at = 0
+    with limiter.call() as call:
+        call.failed = True
+    assert limiter.limit == 4
+
+
+def test_queue():
+    limiter = Limiter(limit=1, max_wait=1)
+    order = []
+
+    def work(num: int):
+        with limiter.call():
+            order.append(num)
+            gevent.sleep(0.01)
+
+    jobs = [gevent.spawn(work, num) for num in range(3)]
+    gevent.sleep(0)
+    assert limiter.stats()['queued'] == 2
+
+    gevent.joinall(jobs, raise_error=True)
+    assert order == [0, 1, 2]
+    assert limiter.in_flight == 0
+
+
+def test_max_wait():
+    limiter = Limiter(limit=1, max_wait=0.01)
+
+    with limiter.call():
+        with pytest.raises(IDMBusy):
+            with limiter.call():
+                pass
+
+    assert limiter.rejected == 1
+    assert limiter.in_flight == 0
+    assert limiter.stats()['queued'] == 0
+
+
+def test_not_counted():
+    limiter = Limiter(limit=16, latency_target=60)
+
+    with pytest.raises(IOError), limiter.call() as call:
+        call.counted = False
+        raise IOError('blop')
+
+    assert limiter.limit == 16
+    assert limiter.calls == 0
+    assert limiter.in_flight == 0
+
+
+def test_images_opened_in_slot(user):
+    request = IDMRequest(user=user, images=[Upload(user=user, original_filename='front.jpg')])
+
+    limiter = Limiter(limit=1, max_wait=0.01)
+    with patch('idm.models.limiter', limiter), patch('idm.models.open_uploads') as open_uploads, limiter.call():
+        with pytest.raises(IDMBusy):
+            request.send_with_images()
+
+    # Request waiting for a free slot doesn't hold s3 connections
+    assert not open_uploads.called
@@ -1,7 +1,7 @@
-from config import VERIFIED_IDS_CAP
+from flags import flags
 from idm.const import STATUS_ACCEPTED
 from idm.models import IDMRequest, IDMResponse
-from user.models import User
+from user.models import StateCount, User
 from user.state import BANNED_COUNTRIES, ID_VERIFIED
 
 
@@ -9,8 +9,7 @@ def verify(user: User, kyc: bool = True, **kwargs) -> IDMResponse:
     req = IDMRequest.create(
         user=user,
         stage=1 if kyc else 2,
-        image1=kwargs.get('image1'),
-        image2=kwargs.get('image2'),
+        images=kwargs.get('images'),
         doc_country=kwargs.get('doc_country'),
         doc_state=kwargs.get('doc_state'),
         doc_type=kwargs.get('doc_type'),
@@ -22,7 +21,7 @@ def verify(user: User, kyc: bool = True, **kwargs) -> IDMResponse:
         should_request = should_request and user.kyc_result == STATUS_ACCEPTED
 
     # Hard cap on number of verified ids
-    should_request = should_request and User.objects(state=ID_VERIFIED).count() < VERIFIED_IDS_CAP
+    should_request = should_request and StateCount.get(ID_VERIFIED) < flags['VERIFIED_IDS_CAP']
 
     if should_request:
         return req.request()
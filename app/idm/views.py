@@ -3,12 +3,13 @@ import functools
 import logging
 from typing import Callable
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, request
 from werkzeug.exceptions import Unauthorized
 
 from config import IDM_WEBHOOK_PASSWORD, IDM_WEBHOOK_USERNAME
 from customerio.client import customerio
 from idm.models import IDMResponse
+from serializer import jsonify
 from user.state import INFO_DECLINED, INFO_NOT_VERIFIED, INFO_PENDING_VERIFICATION, INFO_VERIFIED
 from user.verifications import apply_response
 
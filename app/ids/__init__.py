@@ -0,0 +1 @@
+import ids.signals
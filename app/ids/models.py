@@ -4,6 +4,7 @@ from blinker import Signal
 from mongoengine import DateTimeField, Document, ReferenceField, StringField
 
 from ids.const import DOC_TYPES
+from serializer import Serializer
 from upload.models import Upload
 from user.models import User
 
@@ -46,15 +47,18 @@ class IDUpload(Document):
         return True, 'blop'
 
     def to_json(self):
-        return {
-            'id': str(self.id),
-            'upload1': str(self.upload1.id) if self.upload1 else None,
-            'upload2': str(self.upload2.id) if self.upload2 else None,
-            'doc_type': self.doc_type,
-            'doc_country': self.doc_country,
-            'doc_state': self.doc_state,
-            'created_at': int(self.created_at.strftime('%s')) if self.created_at else None,
-            'submitted_at': int(self.submitted_at.strftime('%s')) if self.submitted_at else None,
-            'verified_at': int(self.verified_at.strftime('%s')) if self.verified_at else None,
-            'status': self.status,
-        }
+        return id_upload_json(self)
+
+
+id_upload_json = Serializer(IDUpload, [
+    'id',
+    'upload1',
+    'upload2',
+    'doc_type',
+    'doc_country',
+    'doc_state',
+    'created_at',
+    'submitted_at',
+    'verified_at',
+    'status',
+])
@@ -0,0 +1,18 @@
+import gevent
+
+from ids.models import IDUpload
+from signals import connect, log_exception
+from upload.s3 import s3
+
+
+@log_exception
+def prefetch_images(upload: IDUpload):
+    for image in [upload.upload1, upload.upload2]:
+        s3.fetch(image.filename, etag=image.s3_etag)
+
+
+@connect(IDUpload.on_create)
+def start_images_prefetch(upload: IDUpload, **_):
+    """ Download images into local cache in background, so verification will likely find them there. """
+    if s3.connection:
+        gevent.spawn(prefetch_images, upload)
@@ -7,11 +7,20 @@ from mock import patch
 from conftest import error
 from errors import ObjectNotFound, ValidationError
 from ids.const import PASSPORT
+from idm.const import STATUS_ACCEPTED
+from idm.models import IDMResponse
 from ids.models import IDUpload
+from jobs.models import Job
+from jobs.worker import process
 from upload.models import Upload
 from user.errors import InvalidState
 from user.models import User
-from user.state import ID_NOT_VERIFIED, INFO_VERIFIED
+from user.state import ID_NOT_VERIFIED, ID_PENDING_VERIFICATION, ID_VERIFIED, INFO_VERIFIED
+from user.verifications import verify_ids
+
+
+def stat(size: int) -> dict:
+    return {'size': size, 'etag': 'd41d8cd98f00b204e9800998ecf8427e', 'content_type': 'image/jpg'}
 
 
 @pytest.fixture
@@ -55,11 +64,34 @@ def test_create_package(service, user, token, upload):
         'doc_country': 'AU',
         'doc_state': None,
     }
-    with patch('upload.models.Upload.stored_size', 500 * 1024):
+    with patch('upload.s3.S3.stat', return_value=stat(500 * 1024)):
         res = service.post('/v1/ids', data, auth=token(user))
         assert res.status_code == 201, res.json
 
 
+def test_recorded_sizes(service, user, token, upload):
+    upload1 = upload(user)
+    upload2 = upload(user)
+    upload1.update(s3_size=5 * 1024 * 1024, s3_etag='recorded')
+
+    user.transition(INFO_VERIFIED)
+
+    data = {
+        'upload1': str(upload1.id),
+        'upload2': str(upload2.id),
+        'doc_type': PASSPORT,
+        'doc_country': 'AU',
+        'doc_state': None,
+    }
+    # Size recorded on confirm is reused, only the upload which wasn't confirmed is looked up
+    with patch('upload.s3.S3.stat', return_value=stat(500 * 1024)) as s3_stat:
+        res = service.post('/v1/ids', data, auth=token(user))
+        assert error(res, ValidationError)
+    s3_stat.assert_called_once_with(upload2.filename)
+
+    assert Upload.objects(id=upload2.id).get().s3_size == 500 * 1024
+
+
 def test_invalid_doc_id(service, user, token, upload):
     upload1 = upload(user)
     upload2 = upload(user)
@@ -116,6 +148,22 @@ def test_verify_package(service, user, token, ids_upload):
     with patch('upload.models.Upload.to_base64', return_value='blop'):
         res = service.post(f'/v1/ids/{ids.id}/verify', auth=token(user))
         assert res.status_code == 200, res.json
+        assert res.json['state'] == ID_PENDING_VERIFICATION
+
+
+def test_process_package(service, user, token, ids_upload):
+    ids = ids_upload(user)
+    user.transition(ID_NOT_VERIFIED)
+    verify_ids(ids)
+
+    job = Job.claim()
+    assert job.params == {'upload': str(ids.id)}
+
+    response = IDMResponse(result=STATUS_ACCEPTED, transaction_id='123', user=user)
+    with patch('user.verifications.verify', return_value=response):
+        process(job)
+
+    assert user.reload().state == ID_VERIFIED
 
 
 def test_verify_invalid_image(service, user, token, upload):
@@ -130,6 +178,6 @@ def test_verify_invalid_image(service, user, token, upload):
         'doc_state': '',
     }
 
-    with patch('upload.models.Upload.stored_size', 100):
+    with patch('upload.s3.S3.stat', return_value=stat(100)):
         res = service.post('/v1/ids', data, auth=token(user))
         assert error(res, ValidationError)
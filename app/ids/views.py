@@ -1,13 +1,14 @@
 from bson import ObjectId
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, request
 from voluptuous import All, Any, Coerce, In, Length, Optional, REMOVE_EXTRA
 
 from errors import ValidationError
 from ids.const import DOC_TYPES
 from ids.models import IDUpload
-from schema import Schema
+from schema import validator
+from serializer import jsonify
 from upload.errors import MissingFile
-from upload.models import Upload
+from upload.models import Upload, stored_sizes
 from user.auth import authenticate
 from user.errors import InvalidState
 from user.models import User
@@ -16,6 +17,14 @@ from user.verifications import verify_ids
 
 blueprint = Blueprint('ids', __name__)
 
+ids_schema = validator('submit_ids', {
+    'upload1': Coerce(ObjectId),
+    'upload2': Coerce(ObjectId),
+    'doc_type': In(DOC_TYPES),
+    'doc_country': All(Length(2, 2), str),
+    Optional('doc_state', default=None): Any(None, All(Length(2, 20), str)),
+}, extra=REMOVE_EXTRA, required=True)
+
 
 @blueprint.route('/v1/ids', methods=['POST'])
 @authenticate()
@@ -31,26 +40,18 @@ def submit_ids(user: User):
     if user.state != INFO_VERIFIED:
         raise InvalidState(user.state)
 
-    schema = Schema({
-        'upload1': Coerce(ObjectId),
-        'upload2': Coerce(ObjectId),
-        'doc_type': In(DOC_TYPES),
-        'doc_country': All(Length(2, 2), str),
-        Optional('doc_state', default=None): Any(None, All(Length(2, 20), str)),
-    }, extra=REMOVE_EXTRA, required=True)
-    data = schema(request.json)
+    data = ids_schema.load(request)
     upload1 = Upload.objects(user=user, id=data['upload1']).get()
     upload2 = Upload.objects(user=user, id=data['upload2']).get()
 
     try:
-        if not (upload1.stored_size <= 4 * 1024 * 1024):
-            raise ValidationError('Invalid image size')
-
-        if not (upload2.stored_size <= 4 * 1024 * 1024):
-            raise ValidationError('Invalid image size')
+        sizes = stored_sizes([upload1, upload2])
     except KeyError as err:
         raise MissingFile(str(err))
 
+    if not all(size <= 4 * 1024 * 1024 for size in sizes):
+        raise ValidationError('Invalid image size')
+
     id_upload = IDUpload.create(
         user=user,
         upload1=upload1,
@@ -70,20 +71,18 @@ def submit_ids(user: User):
 @authenticate()
 def verify_ids_package(id: str, user: User):
     """
-    Route that does id package verification. This can be a lengthy call, so it's moved into a separate one.
+    Route that submits id package to verification.
 
     Expects user to be in `ID_NOT_VERIFIED` state.
-    Will transition user to `ID_VERIFIED` on success.
-
-    Returns result of verification in `status` key
+    Will transition user to `ID_PENDING_VERIFICATION` and queue package to be sent to the IDM. Once it's processed
+    user is moved to `ID_VERIFIED` on success, client should poll user's state to find out.
     """
     if user.state != ID_NOT_VERIFIED:
         raise InvalidState(user.state)
 
-    try:
-        upload_id = ObjectId(id)
-    except ValueError:
+    if not ObjectId.is_valid(id):
         raise ValidationError()
+    upload_id = ObjectId(id)
 
     upload = IDUpload.objects(user=user, id=upload_id).get()
 
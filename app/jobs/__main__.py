@@ -0,0 +1,21 @@
+from gevent import monkey
+monkey.patch_all()
+
+import logging
+import os
+import signal
+
+import gevent
+
+from app import create_app
+from jobs.worker import Worker
+import user.verifications  # noqa - registers tasks
+
+_ = create_app(os.environ.get('CONFIG', 'prod'))
+log = logging.getLogger(__name__)
+
+if __name__ == '__main__':
+    worker = Worker()
+    gevent.signal(signal.SIGTERM, worker.stop)
+    worker.run()
+    log.info('Worker stopped')
@@ -0,0 +1,12 @@
+# Job states
+QUEUED = 'queued'  #: Waiting for a worker (or for a retry delay to pass)
+RUNNING = 'running'  #: Taken by a worker. Becomes available again if not finished within visibility timeout
+DONE = 'done'  #: Successfully processed
+FAILED = 'failed'  #: Failed on the last attempt, won't be retried
+
+JOB_STATES = [
+    QUEUED,
+    RUNNING,
+    DONE,
+    FAILED,
+]
@@ -0,0 +1,96 @@
+import datetime
+from typing import Optional
+
+from mongoengine import DateTimeField, DictField, Document, IntField, StringField
+
+from config import JOBS_MAX_ATTEMPTS, JOBS_RETRY_DELAY, JOBS_VISIBILITY_TIMEOUT
+from jobs.const import DONE, FAILED, JOB_STATES, QUEUED, RUNNING
+
+
+class Job(Document):
+    """
+    Background job stored in mongo.
+
+    Workers take jobs with atomic `claim`, which hides the job from others for a visibility timeout. A job not
+    finished within that time (e.g. its worker died) becomes available again and is retried, unless that was its
+    last attempt (see `jobs.worker.process`).
+    """
+
+    meta = {
+        'indexes': [('state', 'visible_at'), 'name'],
+    }
+
+    name = StringField(required=True)  #: Name of the task, see `jobs.worker.task`
+    params = DictField()  #: Keyword arguments the task is called with
+
+    state = StringField(choices=JOB_STATES, default=QUEUED)
+    attempts = IntField(default=0)
+    max_attempts = IntField(default=JOBS_MAX_ATTEMPTS)
+    error = StringField()  #: Error of the last failed attempt
+
+    created_at = DateTimeField(default=datetime.datetime.utcnow)
+    visible_at = DateTimeField(default=datetime.datetime.utcnow)  #: Job can't be claimed before this time
+    finished_at = DateTimeField()
+
+    @classmethod
+    def enqueue(cls, name: str, delay: int = 0, max_attempts: int = JOBS_MAX_ATTEMPTS, **params) -> 'Job':
+        now = datetime.datetime.utcnow()
+        return cls(
+            name=name,
+            params=params,
+            max_attempts=max_attempts,
+            created_at=now,
+            visible_at=now + datetime.timedelta(seconds=delay),
+        ).save(force_insert=True)
+
+    @classmethod
+    def claim(cls, timeout: int = JOBS_VISIBILITY_TIMEOUT) -> Optional['Job']:
+        """ Atomically take the oldest available job, or return `None` if there's nothing to do. """
+        now = datetime.datetime.utcnow()
+        return cls.objects(state__in=[QUEUED, RUNNING], visible_at__lte=now).order_by('visible_at').modify(
+            new=True,
+            set__state=RUNNING,
+            set__visible_at=now + datetime.timedelta(seconds=timeout),
+            inc__attempts=1,
+        )
+
+    def complete(self) -> bool:
+        return self._finish(state=DONE, finished_at=datetime.datetime.utcnow())
+
+    def retry(self, error: str) -> bool:
+        """ Put job back into the queue, delaying it exponentially by number of attempts made. """
+        delay = JOBS_RETRY_DELAY * 2 ** max(self.attempts - 1, 0)
+        return self._finish(
+            state=QUEUED,
+            error=error,
+            visible_at=datetime.datetime.utcnow() + datetime.timedelta(seconds=delay),
+        )
+
+    def fail(self, error: str) -> bool:
+        return self._finish(state=FAILED, error=error, finished_at=datetime.datetime.utcnow())
+
+    def _finish(self, **values) -> bool:
+        """
+        Update job unless it was already retaken by another worker after visibility timeout.
+
+        :return: Whether job was updated
+        """
+        updated = Job.objects(id=self.id, state=RUNNING, attempts=self.attempts).update(
+            **{f'set__{key}': value for key, value in values.items()}
+        )
+        if updated:
+            for key, value in values.items():
+                setattr(self, key, value)
+        return bool(updated)
+
+    @classmethod
+    def stats(cls) -> dict:
+        """ Return number of jobs by state and age in seconds of the oldest job waiting in the queue. """
+        res = {state: 0 for state in JOB_STATES}
+        for item in cls.objects.aggregate({'$group': {'_id': '$state', 'count': {'$sum': 1}}}):
+            res[item['_id']] = item['count']
+
+        now = datetime.datetime.utcnow()
+        oldest = cls.objects(state=QUEUED, visible_at__lte=now).order_by('created_at').only('created_at').first()
+        res['age'] = (now - oldest.created_at).total_seconds() if oldest else 0.
+        return res
@@ -0,0 +1,96 @@
+import pytest
+from mock import Mock, patch
+
+from jobs.const import DONE, FAILED, QUEUED, RUNNING
+from jobs.models import Job
+from jobs.worker import TASKS, Task, Worker, process
+
+
+def test_claim(service):
+    assert Job.claim() is None
+
+    first = Job.enqueue('blop', value=1)
+    Job.enqueue('blop', delay=60)
+
+    job = Job.claim()
+    assert job.id == first.id
+    assert job.state == RUNNING
+    assert job.attempts == 1
+    assert job.params == {'value': 1}
+
+    # Second one is delayed
+    assert Job.claim() is None
+
+
+def test_visibility_timeout(service):
+    Job.enqueue('blop')
+
+    stale = Job.claim(timeout=0)
+    job = Job.claim()
+    assert job.id == stale.id
+    assert job.attempts == 2
+
+    # Worker which lost the job can't finish it anymore
+    assert not stale.complete()
+    assert job.complete()
+    assert Job.objects(id=job.id).get().state == DONE
+
+
+def test_process(service):
+    func = Mock()
+    Job.enqueue('blop', value=1)
+
+    with patch.dict(TASKS, {'blop': Task(func, None)}):
+        process(Job.claim())
+
+    func.assert_called_once_with(value=1)
+    assert Job.objects.get().state == DONE
+
+
+def test_retry(service):
+    func = Mock(side_effect=IOError('blop'))
+    on_failure = Mock()
+    Job.enqueue('blop', max_attempts=2, value=1)
+
+    with patch.dict(TASKS, {'blop': Task(func, on_failure)}), patch('jobs.models.JOBS_RETRY_DELAY', 0):
+        process(Job.claim())
+        job = Job.objects.get()
+        assert job.state == QUEUED
+        assert job.error == repr(OSError('blop'))
+        assert not on_failure.called
+
+        process(Job.claim())
+        assert Job.objects.get().state == FAILED
+        on_failure.assert_called_once_with(error=repr(OSError('blop')), value=1)
+
+
+def test_lost_last_attempt(service):
+    func = Mock()
+    on_failure = Mock()
+    Job.enqueue('blop', max_attempts=1, value=1)
+
+    # Worker died during the only attempt, so the job is reclaimed once visibility timeout passes
+    Job.claim(timeout=0)
+    with patch.dict(TASKS, {'blop': Task(func, on_failure)}):
+        process(Job.claim())
+
+    assert not func.called
+    assert Job.objects.get().state == FAILED
+    on_failure.assert_called_once_with(error='Lost on the last attempt', value=1)
+
+
+def test_worker_timeouts():
+    with pytest.raises(ValueError):
+        Worker(timeout=300, visibility_timeout=300)
+
+
+def test_stats(service):
+    Job.enqueue('blop')
+    Job.enqueue('blop')
+    Job.claim()
+
+    stats = Job.stats()
+    assert stats[QUEUED] == 1
+    assert stats[RUNNING] == 1
+    assert stats[DONE] == 0
+    assert stats['age'] >= 0
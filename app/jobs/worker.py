@@ -0,0 +1,117 @@
+import logging
+from typing import Callable, Dict, NamedTuple, Optional
+
+import gevent
+import gevent.pool
+
+from config import JOBS_CONCURRENCY, JOBS_POLL_INTERVAL, JOBS_TIMEOUT, JOBS_VISIBILITY_TIMEOUT
+from jobs.models import Job
+
+log = logging.getLogger(__name__)
+
+
+class Task(NamedTuple):
+    func: Callable
+    on_failure: Optional[Callable]
+
+
+class JobTimeout(Exception):
+    pass
+
+
+TASKS: Dict[str, Task] = {}
+
+
+def task(name: str, on_failure: Callable = None) -> Callable:
+    """
+    Decorator to register function as a task jobs with given ``name`` are processed with.
+
+    :param on_failure: Called with job params and ``error`` when the last attempt of a job fails
+    """
+    def decorator(func):
+        TASKS[name] = Task(func, on_failure)
+        return func
+
+    return decorator
+
+
+def process(job: Job, timeout: int = JOBS_TIMEOUT):
+    """
+    Run the job, then mark it as done or schedule a retry depending on the result.
+
+    ``timeout`` must be less than visibility timeout the job was claimed with, so the job is stopped and its result
+    recorded before other workers can take it.
+    """
+    registered = TASKS.get(job.name)
+    if not registered:
+        job.fail(f'Unknown task: {job.name}')
+        return
+
+    if job.attempts > job.max_attempts:
+        # The last attempt never finished (e.g. the job killed its worker), so it isn't run again
+        log.error('Job %s (%s) was lost on its last attempt', job.id, job.name)
+        _fail(job, registered, job.error or 'Lost on the last attempt')
+        return
+
+    try:
+        with gevent.Timeout(timeout, JobTimeout):
+            registered.func(**job.params)
+    except Exception as ex:
+        error = repr(ex)
+        if job.attempts < job.max_attempts:
+            log.warning('Job %s (%s) failed on attempt %s, retrying: %s', job.id, job.name, job.attempts, error)
+            job.retry(error)
+            return
+
+        log.exception('Job %s (%s) failed: %s', job.id, job.name, error)
+        _fail(job, registered, error)
+    else:
+        job.complete()
+
+
+def _fail(job: Job, registered: Task, error: str):
+    if job.fail(error) and registered.on_failure:
+        registered.on_failure(error=error, **job.params)
+
+
+class Worker(object):
+    """ Claims jobs from the queue and processes up to ``concurrency`` of them at once. """
+
+    def __init__(
+            self,
+            concurrency: int = JOBS_CONCURRENCY,
+            poll_interval: float = JOBS_POLL_INTERVAL,
+            timeout: int = JOBS_TIMEOUT,
+            visibility_timeout: int = JOBS_VISIBILITY_TIMEOUT,
+    ):
+        if timeout >= visibility_timeout:
+            raise ValueError(f'Job timeout {timeout}s must be less than visibility timeout {visibility_timeout}s')
+
+        self.pool = gevent.pool.Pool(concurrency)
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.visibility_timeout = visibility_timeout
+        self.running = False
+
+    def run(self):
+        self.running = True
+        log.info('Processing jobs of %s', ', '.join(sorted(TASKS)))
+
+        while self.running:
+            self.pool.wait_available()
+            try:
+                job = Job.claim(self.visibility_timeout)
+            except Exception as ex:
+                log.exception('Unable to claim job: %s', ex)
+                job = None
+
+            if job:
+                self.pool.spawn(process, job, self.timeout)
+            else:
+                gevent.sleep(self.poll_interval)
+
+        self.pool.join()
+
+    def stop(self):
+        """ Stop taking new jobs. `run` returns once jobs in progress are finished. """
+        self.running = False
@@ -1,6 +1,7 @@
 from onfid.const import CHECK_COMPLETE
 from onfid.models import Check
 from signals import connect
+from user import status
 
 
 @connect(Check.on_update)
@@ -9,3 +10,4 @@ def update_user_property_on_complete(check: Check, **_):
         return
 
     check.user.modify(onfid_status=check.result)
+    status.invalidate(check.user.eth_address)
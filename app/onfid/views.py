@@ -1,10 +1,11 @@
 import logging
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, request
 from werkzeug.routing import ValidationError
 
 from config import ONFIDO_TOKEN
 from onfid.models import Check, Report, Webhook
+from serializer import jsonify
 
 log = logging.getLogger(__name__)
 blueprint = Blueprint('onfido', __name__)
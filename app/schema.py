@@ -1,3 +1,74 @@
+from typing import Any as AnyType, Dict
+
+from flask import Request
 from voluptuous import Schema, Optional, Coerce, MultipleInvalid, In, All, ALLOW_EXTRA, Any, Required # noqa
 
+from errors import PayloadTooLarge, ValidationError
+
 _ = MultipleInvalid  # Dummy line to Make PyCharm formatter happy
+
+MAX_BODY_SIZE = 16 * 1024  #: Default max size of request body, none of our payloads comes close
+
+
+class Validator(object):
+    """
+    Request payload validator built once at import time.
+
+    Before running full ``schema`` validation it rejects bodies larger than ``max_size`` bytes and payloads that
+    aren't an object with all required keys, which is way cheaper for garbage requests.
+    """
+
+    def __init__(self, name: str, schema: Schema, max_size: int = MAX_BODY_SIZE):
+        self.name = name
+        self.schema = schema
+        self.max_size = max_size
+        self.required = frozenset(
+            str(key) for key in schema.schema
+            if not isinstance(key, Optional) and (schema.required or isinstance(key, Required))
+        )
+
+    def __call__(self, data: AnyType) -> dict:
+        if not isinstance(data, dict):
+            raise ValidationError('Invalid payload')
+
+        missing = self.required.difference(data)
+        if missing:
+            raise ValidationError('Missing fields', details=sorted(missing))
+
+        return self.schema(data)
+
+    def payload(self, request: Request) -> AnyType:
+        """
+        Return decoded, but not yet validated body of the ``request``.
+
+        Body without Content-Length (chunked) is read up to ``max_size`` bytes first, so it can't skip the size check.
+        """
+        if request.content_length is None:
+            body = b''
+            while len(body) <= self.max_size:
+                chunk = request.stream.read(self.max_size + 1 - len(body))
+                if not chunk:
+                    break
+                body += chunk
+            if len(body) > self.max_size:
+                raise PayloadTooLarge(details={'max_size': self.max_size})
+            request._cached_data = body  # Stream is consumed, `get_json` parses what was read
+        elif request.content_length > self.max_size:
+            raise PayloadTooLarge(details={'max_size': self.max_size})
+
+        return request.get_json(silent=True)
+
+    def load(self, request: Request) -> dict:
+        """ Validate body of the ``request``. """
+        return self(self.payload(request))
+
+
+#: All request validators by name, see `validator`
+validators: Dict[str, Validator] = {}
+
+
+def validator(name: str, schema: dict, max_size: int = MAX_BODY_SIZE, **kwargs) -> Validator:
+    """ Compile and register validator of ``schema`` (``kwargs`` are passed to `Schema`). """
+    compiled = Validator(name, Schema(schema, **kwargs), max_size)
+    validators[name] = compiled
+    return compiled
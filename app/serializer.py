@@ -0,0 +1,130 @@
+"""
+Fast serialization of documents into JSON responses.
+
+`Serializer` compiles a plan of getters for model fields once, so serializing an object is a single pass over that
+plan: no per-call introspection, no ``strftime`` for timestamps and no dereferencing of referenced documents.
+Responses are encoded with ujson when it's installed. Values ujson encodes differently from flask are pre-encoded the
+way flask does it first (see `prepare`), anything ujson can't handle sends the response through flask's encoder.
+"""
+import datetime
+import json
+import math
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union
+
+from flask import Response, current_app, json as flask_json
+from mongoengine import DateTimeField, Document, ObjectIdField, ReferenceField
+from werkzeug.http import http_date
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None
+
+EPOCH = datetime.datetime(1970, 1, 1)
+SECOND = datetime.timedelta(seconds=1)
+
+_SCALARS = {str, int, bool, type(None)}  # Encoded the same way by ujson and flask
+
+Getter = Callable[[Any], Any]
+FieldSpec = Union[str, Tuple[str, Getter]]
+
+
+def timestamp(value: Optional[datetime.datetime]) -> Optional[int]:
+    """ Unix timestamp of the datetime. Naive datetimes are treated as UTC, as they're all stored in UTC. """
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return (value - EPOCH) // SECOND
+
+
+def _field_getter(model: Type[Document], name: str) -> Getter:
+    field = model._fields.get(name)
+    get = attrgetter(name)
+
+    if isinstance(field, DateTimeField):
+        return lambda obj: timestamp(get(obj))
+
+    if isinstance(field, ReferenceField):
+        # Take the id from the stored reference, so the document isn't fetched
+        def get_reference(obj):
+            value = obj._data.get(name)
+            if value is None:
+                return None
+            return str(getattr(value, 'id', value))
+
+        return get_reference
+
+    if isinstance(field, ObjectIdField) or name == 'id':
+        return lambda obj: str(get(obj)) if get(obj) is not None else None
+
+    return get
+
+
+class Serializer(object):
+    """
+    Converts documents of given ``model`` into dicts.
+
+    ``fields`` are field names (converted according to field type: datetimes to timestamps, ids and references to
+    strings) or ``(key, getter)`` pairs for computed values.
+    """
+
+    def __init__(self, model: Type[Document], fields: List[FieldSpec]):
+        self.plan: List[Tuple[str, Getter]] = [
+            field if isinstance(field, tuple) else (field, _field_getter(model, field))
+            for field in fields
+        ]
+
+    def __call__(self, obj: Document) -> Dict[str, Any]:
+        return {key: get(obj) for key, get in self.plan}
+
+
+class Raw(object):
+    """ Already encoded JSON, ujson inserts it as is. """
+    __slots__ = ('json',)
+
+    def __init__(self, encoded: str):
+        self.json = encoded
+
+    def __json__(self) -> str:
+        return self.json
+
+
+def prepare(value: Any) -> Any:
+    """
+    Replace values ujson would encode differently from flask with their encoding by flask, as `Raw`.
+
+    ujson rounds floats to 10 decimal places (``eth_amount`` is one) and turns dates into unix timestamps, while flask
+    keeps floats exact and encodes dates as HTTP dates. Containers with nothing to replace are returned as they are.
+    """
+    if type(value) in _SCALARS:
+        return value
+    if isinstance(value, dict):
+        if all(type(item) in _SCALARS for item in value.values()):
+            return value
+        return {key: prepare(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [prepare(item) for item in value]
+    if isinstance(value, float):
+        return Raw(float.__repr__(value) if math.isfinite(value) else json.dumps(value))
+    if isinstance(value, datetime.date):
+        return Raw(f'"{http_date(value.timetuple())}"')
+    return value
+
+
+def dumps(value: Any) -> str:
+    if ujson is not None:
+        try:
+            return ujson.dumps(prepare(value), escape_forward_slashes=False)
+        except (TypeError, OverflowError, ValueError):
+            pass  # Something ujson can't handle, let flask's encoder deal with it
+    return json.dumps(value, cls=flask_json.JSONEncoder, separators=(',', ':'))
+
+
+def jsonify(*args, **kwargs) -> Response:
+    """ Same as `flask.jsonify`, but faster. """
+    if args and kwargs:
+        raise TypeError('jsonify() behavior undefined when passed both args and kwargs')
+    data = args[0] if len(args) == 1 else (list(args) if args else kwargs)
+    return current_app.response_class(dumps(data) + '\n', mimetype='application/json')
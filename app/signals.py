@@ -1,14 +1,87 @@
 import functools
 import logging
-from typing import Callable, Optional, Tuple
+import time
+from typing import Callable, Dict, Optional, Tuple
 
 import blinker
+import gevent.pool
 
-from user.models import User
+from config import SIGNALS_POOL_SIZE
+from user import machine
 
 log = logging.getLogger(__name__)
 Transition = Tuple[str, str]
 
+#: Pool background receivers run on, `None` to run them inline (see `setup`)
+pool = gevent.pool.Pool(SIGNALS_POOL_SIZE) if SIGNALS_POOL_SIZE else None
+
+
+class ReceiverStats(object):
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.
+        self.max_time = 0.
+
+    def to_json(self) -> dict:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'avg_time': self.total_time / self.calls if self.calls else 0.,
+            'max_time': self.max_time,
+        }
+
+
+receivers_stats: Dict[str, ReceiverStats] = {}
+
+
+def setup(pool_size: int):
+    """ Set size of the pool background receivers run on. With 0 they are called inline (e.g. in tests). """
+    global pool
+    pool = gevent.pool.Pool(pool_size) if pool_size else None
+
+
+def stats() -> dict:
+    return {
+        'pool': {
+            'size': pool.size if pool else 0,
+            'running': len(pool) if pool else 0,
+        },
+        'receivers': {name: item.to_json() for name, item in receivers_stats.items()},
+        'transitions': machine.timings,
+    }
+
+
+def background(func: Callable) -> Callable:
+    """
+    Make receiver run on the background pool, so sender doesn't wait for it.
+
+    Sender is blocked only while the pool is full. Errors are logged and counted, not raised.
+    """
+    receiver_stats = receivers_stats.setdefault(f'{func.__module__}.{func.__name__}', ReceiverStats())
+
+    def run(*args, **kwargs):
+        started = time.time()
+        try:
+            func(*args, **kwargs)
+        except Exception as ex:
+            receiver_stats.errors += 1
+            log.exception('Unhandled signal exception: %s', ex)
+        finally:
+            elapsed = time.time() - started
+            receiver_stats.calls += 1
+            receiver_stats.total_time += elapsed
+            receiver_stats.max_time = max(receiver_stats.max_time, elapsed)
+
+    @functools.wraps(func)
+    def dispatch(*args, **kwargs):
+        if pool is None:
+            run(*args, **kwargs)
+        else:
+            pool.spawn(run, *args, **kwargs)
+
+    return dispatch
+
 
 def connect(*signals, **kwargs):
     """
@@ -21,14 +94,21 @@ def connect(*signals, **kwargs):
         and automatically disconnect when *receiver* goes out of scope or
         is garbage collected.  Defaults to ``True``.
 
+    :param background: If true, receiver runs on a pool of greenlets (see `background`). Use it for side effects
+        like calls to external services, never for receivers that change state sender relies on. Defaults to
+        ``False``.
+
     """
     sender = kwargs.get('sender', blinker.ANY)
     weak = kwargs.get('weak', True)
+    in_background = kwargs.get('background', False)
 
     def decorator(func):
+        receiver = background(func) if in_background else func
 
         for signal in signals:
-            signal.connect(func, sender=sender, weak=weak)
+            # Wrapper isn't referenced anywhere else, weak reference would let it go right away
+            signal.connect(receiver, sender=sender, weak=weak and not in_background)
 
         return func
 
@@ -36,19 +116,8 @@ def connect(*signals, **kwargs):
 
 
 def transition(state_before: Optional[str], state_now: str) -> Callable:
-    def wrapper(func):
-        def handler(user: User, transition: Transition, **kwargs):
-
-            if state_before and transition != (state_before, state_now):
-                return
-            elif not state_before and transition[1] != state_now:
-                return
-
-            return func(user, transition=transition, **kwargs)
-
-        User.on_transition.connect(handler, weak=False)
-
-    return wrapper
+    """ Decorator to call function on given transition only, see `user.machine.handler`. """
+    return machine.handler(state_before, state_now)
 
 
 def log_exception(func: Callable) -> Callable:
@@ -6,11 +6,20 @@ echo ${SOMAXCONN} 2>/dev/null > /proc/sys/net/core/somaxconn
 sysctl net.core.somaxconn=${SOMAXCONN} 2>/dev/null
 
 _term() {
+    kill -TERM "$worker" 2>/dev/null
     kill -HUP "$child" 2>/dev/null
 }
 
 trap _term TERM
 
+if [ -f eths.txt ]; then
+    python -m eth.index eths.txt
+fi
+
+python -m jobs &
+worker=$!
+
 uwsgi uwsgi.ini &
 child=$!
 wait "$child"
+wait "$worker"
@@ -0,0 +1,65 @@
+import gevent
+from mock import Mock, patch
+
+from cache import cached
+
+
+def test_negative_ttl():
+    func = Mock(return_value=None)
+    cached_func = cached(60, negative_ttl=10)(func)
+
+    with patch('time.time', return_value=1000):
+        assert cached_func('blop') is None
+    with patch('time.time', return_value=1005):
+        assert cached_func('blop') is None
+        assert func.call_count == 1
+    with patch('time.time', return_value=1011):
+        assert cached_func('blop') is None
+        assert func.call_count == 2
+
+
+def test_single_flight():
+    calls = []
+
+    @cached(60)
+    def load(key):
+        calls.append(key)
+        gevent.sleep(0.01)
+        return key * 2
+
+    jobs = [gevent.spawn(load, 'blop') for _ in range(10)]
+    gevent.joinall(jobs, raise_error=True)
+    assert [job.value for job in jobs] == ['blopblop'] * 10
+    assert calls == ['blop']
+
+
+def test_single_flight_error():
+    calls = []
+
+    @cached(60)
+    def load(key):
+        calls.append(key)
+        gevent.sleep(0.01)
+        raise ValueError(key)
+
+    jobs = [gevent.spawn(load, 'blop') for _ in range(3)]
+    gevent.joinall(jobs)
+    assert all(isinstance(job.exception, ValueError) for job in jobs)
+    assert calls == ['blop']
+
+    gevent.spawn(load, 'blop').join()
+    assert len(calls) == 2  # Errors aren't cached
+
+
+def test_invalidated_while_loading():
+    @cached(60)
+    def load(key):
+        gevent.sleep(0.01)
+        return key
+
+    job = gevent.spawn(load, 'blop')
+    gevent.sleep(0)
+    load.cache.invalidate(('blop',))
+    job.join()
+
+    assert load.cache.get(('blop',)) is None
@@ -0,0 +1,90 @@
+import pytest
+from mock import patch
+
+from cursor import Checkpoint, Partitions, iter_chunks, partitions, resumable, shared_partitions
+from user.models import User
+
+
+@pytest.fixture
+def users(service):
+    return [User(email=f'user{i}@example.com', telegram=f'user{i}', eth_address=f'{i:040x}').save() for i in range(10)]
+
+
+def ids(chunks) -> list:
+    return [[obj.id for obj in chunk] for chunk in chunks]
+
+
+def test_iter_chunks(users):
+    expected = [obj.id for obj in users]
+    assert ids(iter_chunks(User.objects, 4)) == [expected[:4], expected[4:8], expected[8:]]
+    assert ids(iter_chunks(User.objects, 5)) == [expected[:5], expected[5:]]
+    assert ids(iter_chunks(User.objects, 3, (users[2].id, users[6].id))) == [expected[3:6], expected[6:7]]
+
+
+def test_partitions(users):
+    for count in [1, 3, 4, 10, 15]:
+        parts = partitions(User.objects, count)
+        assert len(parts) == count
+
+        processed = [obj.id for part in parts for chunk in iter_chunks(User.objects, 2, part) for obj in chunk]
+        assert processed == [obj.id for obj in users]
+
+
+def test_shared_partitions(users):
+    parts = shared_partitions('blop/3', User.objects, 3)
+    assert parts == partitions(User.objects, 3)
+
+    # Process started later splits the collection the same way
+    users[0].delete()
+    User(email='late@example.com', telegram='late', eth_address='f' * 40).save()
+    assert shared_partitions('blop/3', User.objects, 3) == parts
+    assert shared_partitions('blop/3', User.objects, 3) != partitions(User.objects, 3)
+
+    Partitions.objects(name='blop/3').delete()
+    assert shared_partitions('blop/3', User.objects, 3) == partitions(User.objects, 3)
+
+
+def test_retry(users):
+    processed = []
+    for chunk in resumable('blop', User.objects, 4):
+        failed = [obj.id for obj in chunk if obj in users[1:3] and obj not in processed]
+        processed.extend(chunk)
+        Checkpoint.fail('blop', failed)
+
+    # Failed documents are yielded again after the range, until they stop failing
+    assert processed == users + users[1:3]
+    assert Checkpoint.objects.get(name='blop').failed == []
+
+    for chunk in resumable('blop', User.objects, 4, restart=True):
+        Checkpoint.fail('blop', [users[5].id])
+    assert Checkpoint.objects.get(name='blop').failed == [users[5].id]
+
+    # Next run retries them even if the range is done
+    assert ids(resumable('blop', User.objects, 4)) == [[users[5].id]]
+    assert Checkpoint.objects.get(name='blop').failed == []
+    assert list(resumable('blop', User.objects, 4)) == []
+
+
+def test_resume(users):
+    processed = []
+    with pytest.raises(OSError):
+        for chunk in resumable('blop', User.objects, 3):
+            if len(processed) == 6:
+                raise OSError('blop')
+            processed.extend(chunk)
+
+    checkpoint = Checkpoint.objects.get(name='blop')
+    assert checkpoint.last_id == users[5].id
+    assert checkpoint.processed == 6
+
+    # Chunk which failed is processed again
+    for chunk in resumable('blop', User.objects, 3):
+        processed.extend(chunk)
+    assert processed == users
+    assert Checkpoint.objects.get(name='blop').done
+
+    with patch.object(User, 'objects') as objects:
+        assert list(resumable('blop', objects, 3)) == []
+        assert not objects.called
+
+    assert len(list(resumable('blop', User.objects, 3, restart=True))) == 4
@@ -0,0 +1,65 @@
+import datetime
+
+import gevent
+from mock import patch
+
+from conftest import error
+from errors import WhitelistClosed
+from flags import FLAGS, Flag, FlagStore, flags
+
+
+def test_defaults(service):
+    assert flags['WHITELIST_CLOSED'] is False
+    assert flags['ETH_MAX_CONTRIBUTION'] == FLAGS['ETH_MAX_CONTRIBUTION'][0]
+
+
+def test_set(service):
+    flags.set('VERIFIED_IDS_CAP', 10)
+    assert flags['VERIFIED_IDS_CAP'] == 10
+    assert Flag.objects(name='VERIFIED_IDS_CAP').get().value == 10
+
+    flags.reset('VERIFIED_IDS_CAP')
+    assert flags['VERIFIED_IDS_CAP'] == FLAGS['VERIFIED_IDS_CAP'][0]
+
+
+def test_parse():
+    assert flags.parse('WHITELIST_CLOSED', 'yes') is True
+    assert flags.parse('WHITELIST_CLOSED', 'no') is False
+    assert flags.parse('WHITELIST_OPEN_DATE', '1514764800') == datetime.datetime(2018, 1, 1)
+    assert flags.parse('WHITELIST_OPEN_DATE', '0') is None
+    assert flags.parse('ETH_MAX_CONTRIBUTION', '1.5') == 1.5
+
+
+def test_background_refresh(service):
+    store = FlagStore(FLAGS, ttl=60)
+    assert store['WHITELIST_CLOSED'] is False
+
+    # Changed by another process
+    Flag(name='WHITELIST_CLOSED', value=True).save()
+    with patch.object(store, 'refresh', wraps=store.refresh) as refresh:
+        assert store['WHITELIST_CLOSED'] is False
+        assert not refresh.called
+
+    with patch('time.monotonic', return_value=store._loaded_at + 61):
+        assert store['WHITELIST_CLOSED'] is False  # Stale value is served while refreshing
+        gevent.sleep(0)
+    assert store['WHITELIST_CLOSED'] is True
+
+
+def test_refresh_error(service):
+    store = FlagStore(FLAGS, ttl=60)
+    assert store['WHITELIST_CLOSED'] is False
+
+    with patch('time.monotonic', return_value=store._loaded_at + 61), \
+            patch.object(Flag, 'objects', side_effect=OSError('blop')):
+        assert store['WHITELIST_CLOSED'] is False
+        gevent.sleep(0)
+        assert not store._refreshing
+        assert store['WHITELIST_CLOSED'] is False
+
+
+def test_closed_status(service):
+    assert service.get('/v1/status').json == {'status': 'open'}
+
+    flags.set('WHITELIST_CLOSED', True)
+    assert error(service.get('/v1/status'), WhitelistClosed)
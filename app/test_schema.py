@@ -0,0 +1,63 @@
+import json
+from io import BytesIO
+
+import pytest
+from flask import Request
+from voluptuous import Optional
+from werkzeug.test import EnvironBuilder
+
+from conftest import error
+from errors import PayloadTooLarge, ValidationError
+from schema import MAX_BODY_SIZE, Validator, Schema, validators
+
+
+def test_required_fields():
+    validator = Validator('blop', Schema({'a': int, Optional('b'): int}, required=True))
+    assert validator.required == {'a'}
+
+    validator = Validator('blop', Schema({'a': int, Optional('b'): int}))
+    assert validator.required == set()
+
+
+def test_shape_precheck():
+    validator = Validator('blop', Schema({'a': int, 'b': int}, required=True))
+    assert validator({'a': 1, 'b': 2}) == {'a': 1, 'b': 2}
+
+    for data in [None, [], 'blop', {'a': 1}]:
+        with pytest.raises(ValidationError):
+            validator(data)
+
+
+def test_registered():
+    assert {'provide_info', 'submit_ids', 'new_upload'} <= set(validators)
+
+
+def test_payload_too_large(service, user, token):
+    res = service.post('/v1/upload', {'filename': 'a' * 20000, 'content_type': 'image/png', 'size': 1000},
+                       auth=token(user))
+    assert error(res, PayloadTooLarge)
+
+
+def chunked(data: dict) -> Request:
+    """ Request without Content-Length, server tells that the body ends on its own. """
+    environ = EnvironBuilder(method='POST', content_type='application/json').get_environ()
+    environ.pop('CONTENT_LENGTH', None)
+    environ.update({'wsgi.input': BytesIO(json.dumps(data).encode()), 'wsgi.input_terminated': True})
+    return Request(environ)
+
+
+def test_chunked_payload(app):
+    validator = Validator('blop', Schema({'a': str}))
+
+    request = chunked({'a': 'blop'})
+    assert request.content_length is None
+    assert validator.load(request) == {'a': 'blop'}
+
+    with pytest.raises(PayloadTooLarge):
+        validator.load(chunked({'a': 'a' * MAX_BODY_SIZE}))
+
+
+def test_missing_fields(service, user, token):
+    res = service.post('/v1/upload', {'filename': 'blop.png'}, auth=token(user))
+    assert error(res, ValidationError)
+    assert res.json['details'] == ['content_type', 'size']
@@ -0,0 +1,76 @@
+import datetime
+from collections import OrderedDict
+
+import flask
+from bson import ObjectId
+from mock import patch
+
+import serializer
+from ids.models import IDUpload
+from serializer import Raw, dumps, jsonify, prepare, timestamp
+from upload.models import Upload
+from user.models import User
+
+
+def test_timestamp():
+    assert timestamp(None) is None
+    assert timestamp(datetime.datetime(2018, 1, 1)) == 1514764800
+    tz = datetime.timezone(datetime.timedelta(hours=2))
+    assert timestamp(datetime.datetime(2018, 1, 1, 2, tzinfo=tz)) == 1514764800
+
+
+def test_user_json(service):
+    user = User(id=ObjectId(), email='blop@example.com', dob=datetime.datetime(2000, 1, 1))
+    res = user.to_json()
+
+    assert res['id'] == str(user.id)
+    assert res['dob'] == 946684800
+    assert res['email'] == 'blop@example.com'
+    assert res['token']
+
+
+def test_references_not_fetched(service, user):
+    upload1 = Upload.create(user=user, original_filename='blop.jpg')
+    upload2 = Upload.create(user=user, original_filename='blop.jpg')
+    IDUpload.create(user=user, upload1=upload1, upload2=upload2, doc_type='PP', doc_country='AU', doc_state=None)
+
+    id_upload = IDUpload.objects.get()
+    with patch.object(Upload, '_get_db', side_effect=AssertionError):
+        res = id_upload.to_json()
+
+    assert res['upload1'] == str(upload1.id)
+    assert res['upload2'] == str(upload2.id)
+    assert res['created_at'] is None
+
+
+def test_jsonify(app):
+    with app.app_context():
+        res = jsonify({'a': 'b/c', 'd': datetime.date(2018, 1, 1)})
+        assert res.mimetype == 'application/json'
+        assert res.json['a'] == 'b/c'
+        assert res.json['d'] == 'Mon, 01 Jan 2018 00:00:00 GMT'  # Encoded by flask, ujson would give a timestamp
+
+        res = jsonify({'eth_amount': 1.2345678901234, 'amounts': [0.1 + 0.2]})
+        assert res.json == {'eth_amount': 1.2345678901234, 'amounts': [0.30000000000000004]}
+
+    assert serializer.dumps([1, 'a']) in ['[1,"a"]', '[1, "a"]']
+
+
+def test_prepare():
+    value = {'a': 1, 'b': 'c'}
+    assert prepare(value) is value
+
+    res = prepare(OrderedDict(a=[1, 'b', 2.5], c={'d': datetime.date(2018, 1, 1)}))
+    assert res['a'][:2] == [1, 'b']
+    assert isinstance(res['a'][2], Raw) and res['a'][2].json == '2.5'
+    assert res['c']['d'].json == '"Mon, 01 Jan 2018 00:00:00 GMT"'
+
+
+def test_dumps_like_flask(app):
+    value = {'a': [0.1 + 0.2, float('inf'), True], 'b': {'c': datetime.datetime(2018, 1, 1, 12)}, 'd': None}
+    with patch('serializer.json.dumps', wraps=serializer.json.dumps) as stdlib:
+        res = dumps(value)
+    assert all(args[0] is not value for args, _ in stdlib.call_args_list)  # Encoded by ujson
+
+    with app.app_context():
+        assert res == flask.json.dumps(value, separators=(',', ':'))
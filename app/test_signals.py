@@ -0,0 +1,45 @@
+import gevent
+from blinker import Signal
+
+import signals
+from signals import connect
+
+
+def test_background_receiver():
+    signal = Signal()
+    calls = []
+
+    @connect(signal, background=True)
+    def blop_receiver(sender, **_):
+        gevent.sleep(0.01)
+        calls.append(sender)
+        raise ValueError('blop')
+
+    signals.setup(1)
+    try:
+        signal.send('first')
+        signal.send('second')  # Waits for a free slot
+        assert calls == ['first']
+
+        signals.pool.join()
+        assert calls == ['first', 'second']
+    finally:
+        signals.setup(0)
+
+    stats = signals.stats()['receivers']['test_signals.blop_receiver']
+    assert stats['calls'] == 2
+    assert stats['errors'] == 2
+    assert stats['max_time'] > 0
+
+
+def test_inline_receiver():
+    signal = Signal()
+    calls = []
+
+    @connect(signal, background=True)
+    def receiver(sender, **_):
+        calls.append(sender)
+
+    signals.setup(0)
+    signal.send('blop')
+    assert calls == ['blop']
@@ -1,21 +1,93 @@
+"""
+User auth tokens.
+
+Current (v2) token is urlsafe base64 of a fixed binary layout::
+
+    version (1 byte) | user id (12 bytes) | expiry, unix time (4 bytes) | truncated HMAC-SHA256 (16 bytes)
+
+Legacy tokens are itsdangerous signed JSON. They always contain a dot, which v2 tokens never do, and are still accepted
+by `verify_token`, until ``LEGACY_TOKENS_EXPIRE_TS`` if it's set.
+"""
+import base64
+import binascii
+import functools
+import hashlib
+import hmac
+import struct
+import time
+from typing import Optional, Tuple
+
 from bson import ObjectId
 from itsdangerous import BadSignature, URLSafeSerializer
 
-from config import SALT
+from config import LEGACY_TOKENS_EXPIRE_TS, SALT, TOKEN_TTL, TOKENS_CACHE_SIZE
+
+VERSION = 2
+HEADER = struct.Struct('>B12sI')  # version, user id, expiry
+DIGEST_SIZE = 16
+TOKEN_SIZE = HEADER.size + DIGEST_SIZE
+EXPIRY_STEP = 60 * 60  #: Expiry is rounded to this many seconds, so the same token is issued for a while
+
+_signer = URLSafeSerializer(SALT, salt=f'whitelist')
+_key = hashlib.sha256(f'whitelist-v{VERSION}:{SALT}'.encode()).digest()
 
 
 def signer() -> URLSafeSerializer:
-    return URLSafeSerializer(SALT, salt=f'whitelist')
+    """ Serializer of legacy tokens. """
+    return _signer
 
 
-def get_token(user_id: ObjectId) -> str:
-    return signer().dumps([str(user_id)])
+def get_token(user_id: ObjectId, ttl: int = TOKEN_TTL) -> str:
+    """ Issue token valid for about ``ttl`` seconds, e.g. pass ``EMAIL_TOKEN_TTL`` for links sent by email. """
+    expires = int(time.time()) // EXPIRY_STEP * EXPIRY_STEP + ttl
+    return _issue(ObjectId(user_id), expires)
 
 
 def verify_token(token: str) -> ObjectId:
+    user_id, expires = _verify(token)
+    if expires is None:  # Legacy token
+        expires = LEGACY_TOKENS_EXPIRE_TS
+    if expires and expires < time.time():
+        raise ValueError()
+    return user_id
+
+
+def _digest(header: bytes) -> bytes:
+    return hmac.new(_key, header, hashlib.sha256).digest()[:DIGEST_SIZE]
+
+
+@functools.lru_cache(maxsize=TOKENS_CACHE_SIZE)
+def _issue(user_id: ObjectId, expires: int) -> str:
+    header = HEADER.pack(VERSION, user_id.binary, expires)
+    return base64.urlsafe_b64encode(header + _digest(header)).decode('ascii')
+
+
+@functools.lru_cache(maxsize=TOKENS_CACHE_SIZE)
+def _verify(token: str) -> Tuple[ObjectId, Optional[int]]:
+    """
+    Check token signature and return user id with token expiry.
+
+    Only valid tokens are cached, bad ones raise every time. Expiry must be checked by the caller, it's `None` for
+    legacy tokens.
+    """
+    if '.' in token:
+        try:
+            [user_id] = _signer.loads(token)
+        except BadSignature:
+            raise ValueError()
+        return ObjectId(user_id), None
+
     try:
-        [user_id] = signer().loads(token)
-    except BadSignature:
+        raw = base64.urlsafe_b64decode(token)
+    except (binascii.Error, ValueError):
+        raise ValueError()
+
+    if len(raw) != TOKEN_SIZE or raw[0] != VERSION:
+        raise ValueError()
+
+    header = raw[:HEADER.size]
+    if not hmac.compare_digest(raw[HEADER.size:], _digest(header)):
         raise ValueError()
 
-    return ObjectId(user_id)
+    _, user_id, expires = HEADER.unpack(header)
+    return ObjectId(user_id), expires
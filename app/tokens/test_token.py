@@ -1,6 +1,11 @@
+import time
+
+import pytest
 from bson import ObjectId
+from mock import patch
 
-from tokens import signer, verify_token
+from config import EMAIL_TOKEN_TTL, LEGACY_TOKENS_EXPIRE_TS, TOKEN_TTL
+from tokens import EXPIRY_STEP, get_token, signer, verify_token
 
 ID = ObjectId('5a6dee770ee97c0001534b3e')
 WRITE_TOKEN = 'WyI1YTZkZWU3NzBlZTk3YzAwMDE1MzRiM2UiXQ.dWfypJfoIo6CD5aOSfrkgUVkKSs'
@@ -12,4 +17,48 @@ def test_read_signer():
 
 
 def test_validate_signer():
+    assert not LEGACY_TOKENS_EXPIRE_TS
     assert verify_token(WRITE_TOKEN) == ID
+
+    cutoff = int(time.time()) + 60
+    with patch('tokens.LEGACY_TOKENS_EXPIRE_TS', cutoff):
+        assert verify_token(WRITE_TOKEN) == ID
+
+        with patch('tokens.time.time', return_value=cutoff + 1):
+            with pytest.raises(ValueError):
+                verify_token(WRITE_TOKEN)
+
+    with patch('tokens.time.time', return_value=cutoff + 1):
+        assert verify_token(WRITE_TOKEN) == ID
+
+
+def test_token():
+    token = get_token(ID)
+    assert '.' not in token
+    assert verify_token(token) == ID
+    assert get_token(ID) is token
+
+
+def test_invalid_token():
+    token = get_token(ID)
+    forged = token[:-2] + ('AA' if token[-2:] != 'AA' else 'BA')
+
+    for bad in [forged, token[:-4], 'blop', WRITE_TOKEN[:-1]]:
+        for _ in range(2):  # Errors aren't cached
+            with pytest.raises(ValueError):
+                verify_token(bad)
+
+
+def test_expired_token():
+    with patch('tokens.time.time', return_value=time.time() - TOKEN_TTL - EXPIRY_STEP):
+        token = get_token(ID)
+        assert verify_token(token) == ID
+
+    with pytest.raises(ValueError):
+        verify_token(token)
+
+
+def test_email_token():
+    with patch('tokens.time.time', return_value=time.time() - TOKEN_TTL - EXPIRY_STEP):
+        token = get_token(ID, EMAIL_TOKEN_TTL)
+    assert verify_token(token) == ID
@@ -0,0 +1,143 @@
+import hashlib
+import logging
+import mmap
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import BinaryIO, Iterable, Iterator, Optional, Union
+
+log = logging.getLogger(__name__)
+
+
+class DiskCache(object):
+    """
+    Size bounded LRU cache of s3 objects on local disk.
+
+    Entries are content addressed: file name is the object's ETag (md5 of its data), so the same data is never
+    stored twice and an entry always holds exactly the data which had that ETag. Whether it's the current version of
+    the object is up to the caller, which looks entries up by the ETag it recorded. Recency is tracked with file
+    mtime, which is bumped on every hit.
+
+    The directory can be shared by several processes. Each of them rescans it for eviction at most once per
+    ``evict_interval`` seconds, or sooner once its own writes alone could have filled the cache.
+    """
+
+    def __init__(self, directory: str, max_size: int, evict_interval: float = 60):
+        self.directory = directory
+        self.max_size = max_size
+        self.evict_interval = evict_interval
+
+        self._size = None  # Size of entries found by the last scan plus ones stored since
+        self._scanned_at = 0.
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory and self.max_size)
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest)
+
+    def contains(self, digest: str) -> bool:
+        return self.enabled and bool(digest) and os.path.exists(self.path(digest))
+
+    @contextmanager
+    def mapped(self, digest: str) -> Iterator[Optional[Union[mmap.mmap, bytes]]]:
+        """
+        Memory map contents of the cached entry for the duration of the block, `None` if there's no such entry.
+
+        Slices of the map are plain bytes, so they stay valid once the block is left and the map is closed.
+        """
+        fh = self.open(digest)
+        if not fh:
+            yield None
+            return
+
+        with fh:
+            if not os.fstat(fh.fileno()).st_size:
+                yield b''
+                return
+            buf = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            yield buf
+        finally:
+            buf.close()
+
+    def open(self, digest: str) -> Optional[BinaryIO]:
+        """ Return cached entry opened for reading or `None` if there's no such entry. """
+        if not self.enabled or not digest:
+            return None
+
+        try:
+            fh = open(self.path(digest), 'rb')
+        except FileNotFoundError:
+            return None
+
+        os.utime(fh.fileno())
+        return fh
+
+    def store(self, digest: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Pass ``chunks`` through while writing them to the cache.
+
+        Entry becomes visible only after all chunks were consumed and their md5 matched ``digest``. Partially
+        consumed or corrupted data is discarded.
+        """
+        if not self.enabled or not digest:
+            yield from chunks
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.', dir=self.directory)
+        md5 = hashlib.md5()
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                for chunk in chunks:
+                    md5.update(chunk)
+                    fh.write(chunk)
+                    yield chunk
+
+            # Multipart upload ETags aren't plain md5 (they contain a dash), trust those as is
+            if '-' in digest or md5.hexdigest() == digest:
+                size = os.path.getsize(tmp_path)
+                os.replace(tmp_path, self.path(digest))
+                self._stored(size)
+            else:
+                log.warning('Cache entry %s does not match its content, discarding', digest)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _stored(self, size: int):
+        if self._size is not None:
+            self._size += size
+
+        stale = time.monotonic() - self._scanned_at >= self.evict_interval
+        if self._size is None or self._size > self.max_size or stale:
+            self.evict()
+
+    def evict(self):
+        """ Remove least recently used entries until cache fits into ``max_size``. """
+        self._scanned_at = time.monotonic()
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.startswith('.'):  # Entries being written
+                continue
+            path = self.path(name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
@@ -2,16 +2,25 @@ import base64
 import datetime
 import logging
 import mimetypes
+from typing import Dict, Iterable, Iterator, List
 
+import gevent
+import gevent.pool
 from blinker import Signal
+from boto.s3.key import Key
 from mongoengine import DateTimeField, Document, IntField, ReferenceField, StringField
 
+from config import S3_FETCH_POOL_SIZE, S3_FETCH_TIMEOUT
 from upload.s3 import s3
 from user.models import User
 
 log = logging.getLogger(__name__)
 
 PUT_URL_DEFAULT_EXPIRE = 60 * 60 * 24 * 7
+URL_DEFAULT_EXPIRE = 60 * 60 * 24 * 365  # 1Y
+BASE64_CHUNK_SIZE = 48 * 1024  # Must be divisible by 3 so chunks can be encoded independently
+
+fetch_pool = gevent.pool.Pool(S3_FETCH_POOL_SIZE)
 
 
 class Upload(Document):
@@ -29,6 +38,11 @@ class Upload(Document):
     url = StringField()
     put_url = StringField()
 
+    # Details of the object actually stored on s3, recorded on first lookup
+    s3_size = IntField()
+    s3_etag = StringField()
+    s3_content_type = StringField()
+
     on_create = Signal()
 
     @property
@@ -36,7 +50,7 @@ class Upload(Document):
         return s3.sign_url(
             filename=self.filename,
             method='GET',
-            expire=60 * 60 * 24 * 365,  # 1Y
+            expire=URL_DEFAULT_EXPIRE,
         )
 
     @property
@@ -64,6 +78,13 @@ class Upload(Document):
             expire=PUT_URL_DEFAULT_EXPIRE,
         )
 
+    @staticmethod
+    def urls(uploads: Iterable['Upload']) -> Dict[str, str]:
+        """ Return download urls for many uploads at once (e.g. for exports), mapped by upload id. """
+        uploads = list(uploads)
+        signed = s3.sign_urls([upload.filename for upload in uploads], method='GET', expire=URL_DEFAULT_EXPIRE)
+        return {str(upload.id): signed[upload.filename] for upload in uploads}
+
     @classmethod
     def create(cls, user: User, original_filename: str, content_type: str = None, size: int = None, **kwargs):
         if not content_type:
@@ -89,15 +110,80 @@ class Upload(Document):
         )
 
     def to_base64(self) -> str:
-        data = s3.get(self.filename)
+        data = s3.get(self.filename, etag=self.s3_etag)
         b64 = base64.b64encode(data).decode('ascii')
         return f'{self.content_type};base64,{b64}'
 
+    def iter_base64(self, chunk_size: int = BASE64_CHUNK_SIZE, key: Key = None) -> Iterator[str]:
+        """
+        Same as `to_base64`, but streams file from s3 and yields encoded data by chunks.
+
+        :param key: Already opened s3 key (see `open_uploads`)
+        """
+        yield f'{self.content_type};base64,'
+
+        tail = b''
+        for chunk in s3.stream(self.filename, chunk_size, key=key, etag=self.s3_etag):
+            if tail:
+                chunk = tail + chunk
+            size = len(chunk) - len(chunk) % 3
+            tail = bytes(chunk[size:])
+            if size:
+                yield base64.b64encode(memoryview(chunk)[:size]).decode('ascii')
+
+        if tail:
+            yield base64.b64encode(tail).decode('ascii')
+
     @property
     def stored_size(self):
         """ Return size in bytes of the file stored on s3. This is more reliable than data provided by user. """
-        return s3.file_size(self.filename)
+        if self.s3_size is None:
+            self.lookup()
+        return self.s3_size
+
+    def lookup(self) -> 'Upload':
+        """ Check the file stored on s3 and record its size, ETag and content type. """
+        stat = s3.stat(self.filename)
+        self.s3_size = stat['size']
+        self.s3_etag = stat['etag']
+        self.s3_content_type = stat['content_type']
+
+        if self.id:
+            self.update(s3_size=self.s3_size, s3_etag=self.s3_etag, s3_content_type=self.s3_content_type)
+        return self
 
     @property
     def fh(self):
-        return s3.key(self.filename)
\ No newline at end of file
+        return s3.file(self.filename, etag=self.s3_etag)
+
+
+def open_uploads(uploads: List[Upload], timeout: float = S3_FETCH_TIMEOUT) -> List[Key]:
+    """
+    Request files of all ``uploads`` from s3 concurrently.
+
+    All requests share single ``timeout``. If any of them fails, the rest are cancelled and error is re-raised.
+    Returned keys must be read with `Upload.iter_base64` or released with `S3.close`.
+    """
+    jobs = [fetch_pool.spawn(s3.open, upload.filename, etag=upload.s3_etag) for upload in uploads]
+    try:
+        with gevent.Timeout(timeout):
+            for job in gevent.iwait(jobs):
+                job.get()
+    except BaseException:
+        gevent.killall(jobs)
+        for job in jobs:
+            if job.successful() and isinstance(job.value, Key):
+                s3.close(job.value)
+        raise
+
+    return [job.value for job in jobs]
+
+
+def stored_sizes(uploads: List[Upload]) -> List[int]:
+    """
+    Return sizes of files of ``uploads`` stored on s3, looking up concurrently only those not recorded on confirm.
+
+    Object can be replaced while its put url is valid, but then reading it by the recorded ETag fails (see `S3.open`),
+    so a replaced file is never sent on.
+    """
+    return fetch_pool.map(lambda upload: upload.stored_size, uploads)
@@ -0,0 +1,80 @@
+from typing import Callable, Optional, Union
+
+import gevent
+import gevent.pool
+
+MIN_PART_SIZE = 5 * 1024 * 1024  # s3 doesn't accept smaller parts (except the last one)
+
+#: Called as ``progress(uploaded_bytes, uploaded_parts)`` after each part is uploaded
+ProgressCallback = Callable[[int, int], None]
+
+
+class MultipartWriter(object):
+    """
+    File-like object that sends data written into it as parts of a multipart upload.
+
+    Data is buffered until there's ``part_size`` of it, then the part is handed to ``upload_part`` on a pool of
+    ``concurrency`` greenlets. Writing blocks while the pool is busy, so memory usage stays at about
+    ``part_size * (concurrency + 1)`` no matter how much data is written.
+    """
+
+    def __init__(
+            self,
+            upload_part: Callable[[int, bytes], None],
+            part_size: int = MIN_PART_SIZE,
+            concurrency: int = 4,
+            progress: Optional[ProgressCallback] = None,
+    ):
+        self.upload_part = upload_part
+        self.part_size = part_size
+        self.progress = progress
+
+        self.parts = 0  #: Number of parts sent to upload
+        self.uploaded_parts = 0
+        self.uploaded_bytes = 0
+
+        self._buffer = bytearray()
+        self._pool = gevent.pool.Pool(concurrency)
+        self._jobs = []
+
+    def write(self, data: Union[bytes, str]) -> int:
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+
+        self._buffer += data
+        while len(self._buffer) >= self.part_size:
+            self._send(bytes(self._buffer[:self.part_size]))
+            del self._buffer[:self.part_size]
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        """ Send the rest of buffered data and wait for all parts to be uploaded. """
+        if self._buffer or not self.parts:  # Upload should have at least one part, even if it's empty
+            self._send(bytes(self._buffer))
+            self._buffer = bytearray()
+
+        gevent.joinall(self._jobs, raise_error=True)
+
+    def abort(self):
+        self._pool.kill()
+        self._buffer = bytearray()
+
+    def _send(self, data: bytes):
+        # Fail early if one of previous parts failed
+        for job in self._jobs:
+            if job.ready() and not job.successful():
+                raise job.exception
+
+        self.parts += 1
+        self._jobs.append(self._pool.spawn(self._upload, self.parts, data))
+
+    def _upload(self, part_num: int, data: bytes):
+        self.upload_part(part_num, data)
+
+        self.uploaded_parts += 1
+        self.uploaded_bytes += len(data)
+        if self.progress:
+            self.progress(self.uploaded_bytes, self.uploaded_parts)
@@ -0,0 +1,81 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Callable
+
+from gevent.queue import Empty, LifoQueue
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class Pool(object):
+    """
+    Fixed size pool of reusable objects (e.g. s3 bucket handles with their own connections), safe to use from greenlets.
+
+    Objects are created lazily with ``factory`` until there's ``size`` of them, after that callers wait for a free
+    one up to ``timeout`` seconds. The most recently returned object is handed out first, so a quiet process keeps
+    reusing a few connections with alive sockets instead of cycling through all of them.
+    """
+
+    def __init__(self, factory: Callable[[], Any], size: int, timeout: float = None):
+        self.factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.created = 0
+
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0.
+        self.max_wait = 0.
+
+        self._idle = LifoQueue()
+
+    def checkout(self) -> Any:
+        self.checkouts += 1
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            pass
+
+        if self.created < self.size:
+            # Slot is taken before the factory yields to other greenlets and given back if it fails
+            self.created += 1
+            try:
+                return self.factory()
+            except BaseException:
+                self.created -= 1
+                raise
+
+        started = time.time()
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except Empty:
+            raise PoolTimeout(f'No free object in pool after {self.timeout}s')
+        finally:
+            waited = time.time() - started
+            self.waits += 1
+            self.wait_time += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def checkin(self, obj: Any):
+        self._idle.put(obj)
+
+    @contextmanager
+    def item(self):
+        obj = self.checkout()
+        try:
+            yield obj
+        finally:
+            self.checkin(obj)
+
+    def stats(self) -> dict:
+        return {
+            'size': self.size,
+            'created': self.created,
+            'idle': self._idle.qsize(),
+            'checkouts': self.checkouts,
+            'waits': self.waits,
+            'avg_wait': self.wait_time / self.waits if self.waits else 0.,
+            'max_wait': self.max_wait,
+        }
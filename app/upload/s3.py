@@ -1,39 +1,95 @@
 import shutil
+import tempfile
+import time
+from collections import OrderedDict
 from gzip import GzipFile
 from io import BytesIO
+from typing import Dict, Iterable
 
 import boto
 from boto.s3.connection import S3Connection
 from boto.s3.key import Key
+from boto.s3.multipart import MultiPartUpload
 
-from config import AWS_ACCESS_KEY_ID, AWS_BUCKET, AWS_SECRET_ACCESS_KEY
+from config import (
+    AWS_ACCESS_KEY_ID,
+    AWS_BUCKET,
+    AWS_POOL_SIZE,
+    AWS_POOL_TIMEOUT,
+    AWS_SECRET_ACCESS_KEY,
+    S3_CACHE_DIR,
+    S3_CACHE_SIZE,
+    S3_PART_SIZE,
+    S3_SIGNED_URLS_CACHE_SIZE,
+    S3_SIGNED_URLS_MIN_TTL,
+    S3_UPLOAD_CONCURRENCY,
+)
+from upload.cache import DiskCache
+from upload.multipart import MultipartWriter
+from upload.pool import Pool
+
+cache = DiskCache(S3_CACHE_DIR, S3_CACHE_SIZE)
+
+
+def etag_of(key):
+    return key.etag.strip('"') if key.etag else None
 
 
 class S3(object):
     _connection = None
+    _pool = None
+
+    def __init__(self):
+        self._signed_urls = OrderedDict()  # (filename, method, expire, headers) -> (expires_at, url)
 
     @property
     def connection(self):
+        """ Connection used to sign urls. This doesn't do any network calls, see `pool` for ones that do. """
         if not self._connection and not AWS_ACCESS_KEY_ID:
             return
 
         if not self._connection:
-            self._connection = S3Connection(
-                AWS_ACCESS_KEY_ID,
-                AWS_SECRET_ACCESS_KEY,
-                calling_format=boto.s3.connection.OrdinaryCallingFormat()
-            )
+            self._connection = self.new_connection()
         return self._connection
 
-    def file_size(self, filename):
-        bkt = self.connection.get_bucket(AWS_BUCKET, validate=False)
-        key = bkt.lookup(filename)
+    @property
+    def pool(self) -> Pool:
+        """ Pool of bucket handles, each bound to its own connection with keep-alive http connections. """
+        if not self._pool:
+            self._pool = Pool(self.new_bucket, AWS_POOL_SIZE, AWS_POOL_TIMEOUT)
+        return self._pool
+
+    @staticmethod
+    def new_connection():
+        return S3Connection(
+            AWS_ACCESS_KEY_ID,
+            AWS_SECRET_ACCESS_KEY,
+            calling_format=boto.s3.connection.OrdinaryCallingFormat()
+        )
+
+    def new_bucket(self):
+        return self.new_connection().get_bucket(AWS_BUCKET, validate=False)
+
+    def stats(self) -> dict:
+        return self.pool.stats()
+
+    def stat(self, filename):
+        """ Make HEAD request for the file and return its size, ETag and content type. """
+        with self.pool.item() as bkt:
+            key = bkt.lookup(filename)
         if not key:
             raise KeyError(filename)
-        return key.size
+        return {
+            'size': key.size,
+            'etag': etag_of(key),
+            'content_type': key.content_type,
+        }
 
-    def key(self, filename):
-        bkt = self.connection.get_bucket(AWS_BUCKET, validate=False)
+    def file_size(self, filename):
+        return self.stat(filename)['size']
+
+    def key(self, filename, bucket=None):
+        bkt = bucket or self.connection.get_bucket(AWS_BUCKET, validate=False)
         key = Key(bkt)
         key.key = filename
         return key
@@ -41,28 +97,117 @@ class S3(object):
     def put(self, filename, data, content_type=None, **meta):
         if not self.connection:
             return None
-        key = self.key(filename)
-        if content_type:
-            key.content_type = content_type
-        for k, v in meta.items():
-            key.set_metadata(k, v)
-        key.set_contents_from_string(data)
+        with self.pool.item() as bkt:
+            key = self.key(filename, bkt)
+            if content_type:
+                key.content_type = content_type
+            for k, v in meta.items():
+                key.set_metadata(k, v)
+            key.set_contents_from_string(data)
         return key
 
-    def get(self, filename):
-        if not self.connection:
+    def get(self, filename, etag=None):
+        """ Return file contents. Pass ``etag`` of the object to serve it from local cache if possible. """
+        with cache.mapped(etag) as cached:
+            if cached is not None:
+                return cached[:]
+
+        key = self.open(filename, etag)
+        if not key:
             return None
-        key = self.key(filename)
-        return key.read()
+        try:
+            return b''.join(cache.store(etag_of(key), key))
+        finally:
+            self.close(key)
+
+    def open(self, filename, etag=None):
+        """
+        Send GET request for the file and return key to read response body from.
+
+        Key holds a pooled connection until it's passed to `close` (`stream` does that once it's done).
+        Returns `None` if file with given ``etag`` is already in local cache and there's nothing to request. If the
+        object was replaced since ``etag`` was recorded, request fails instead of returning other data.
+        """
+        if not self.connection or cache.contains(etag):
+            return None
+
+        key = self.key(filename, self.pool.checkout())
+        key.checked_out = True
+        try:
+            key.open_read(headers={'If-Match': f'"{etag}"'} if etag else None)
+        except BaseException:
+            self.close(key)
+            raise
+        return key
+
+    def close(self, key):
+        """ Close key returned by `open` and return its connection to the pool. Safe to call several times. """
+        if not getattr(key, 'checked_out', False):
+            return
+        key.checked_out = False
+        key.close(fast=True)
+        self.pool.checkin(key.bucket)
+
+    def stream(self, filename, chunk_size=64 * 1024, key=None, etag=None):
+        """
+        Yield file contents by chunks of ``chunk_size`` without loading whole file into memory.
+
+        Cached copy is used if there's one for ``etag``, otherwise file is saved into the cache while being read.
+        Pass ``key`` returned by `open` to read already requested file.
+        """
+        if not key:
+            with cache.mapped(etag) as cached:
+                if cached is not None:
+                    for offset in range(0, len(cached), chunk_size):
+                        yield cached[offset:offset + chunk_size]
+                    return
+
+            key = self.open(filename, etag)
+            if not key:
+                return
+
+        try:
+            yield from cache.store(etag_of(key), iter(lambda: key.read(chunk_size), b''))
+        finally:
+            self.close(key)
+
+    def fetch(self, filename, etag=None):
+        """ Download file into local cache unless it's already there. Returns ETag the file is cached with. """
+        if cache.contains(etag):
+            return etag
+
+        if not cache.enabled:
+            return None
+
+        key = self.open(filename, etag)
+        if not key:
+            return None
+
+        for _ in self.stream(filename, key=key):
+            pass
+        return etag_of(key)
+
+    def file(self, filename, etag=None):
+        """ Return file-like object to read the file from. Served from local cache whenever possible. """
+        fh = cache.open(self.fetch(filename, etag))
+        if fh:
+            return fh
+
+        fh = tempfile.TemporaryFile()
+        for chunk in self.stream(filename, etag=etag):
+            fh.write(chunk)
+        fh.seek(0)
+        return fh
 
     def delete(self, filename):
         if not self.connection:
             return None
 
-        key = self.key(filename)
-        if key.exists():
-            key.delete()
-            return True
+        with self.pool.item() as bkt:
+            key = self.key(filename, bkt)
+            if key.exists():
+                key.delete()
+                return True
         return False
 
     def public_url(self, filename, bucket_as_domain=True, protocol='https'):
@@ -72,10 +217,23 @@ class S3(object):
             return self.key(filename).generate_url(expires_in=0, query_auth=False)
 
     def sign_url(self, filename, method='PUT', expire=600, headers=None):
+        """
+        Return presigned url for the file.
+
+        Urls are cached and the same one is returned while at least ``S3_SIGNED_URLS_MIN_TTL`` part of its lifetime
+        remains.
+        """
         if not self.connection:
             return None
 
-        return self.connection.generate_url(
+        now = time.time()
+        cache_key = (filename, method, expire, tuple(sorted(headers.items())) if headers else None)
+        cached = self._signed_urls.get(cache_key)
+        if cached and cached[0] - now >= expire * S3_SIGNED_URLS_MIN_TTL:
+            self._signed_urls.move_to_end(cache_key)
+            return cached[1]
+
+        url = self.connection.generate_url(
             bucket=AWS_BUCKET,
             expires_in=expire,
             force_http=False,
@@ -85,6 +243,17 @@ class S3(object):
             query_auth=True,
         )
 
+        self._signed_urls[cache_key] = (now + expire, url)
+        self._signed_urls.move_to_end(cache_key)
+        while len(self._signed_urls) > S3_SIGNED_URLS_CACHE_SIZE:
+            self._signed_urls.popitem(last=False)
+
+        return url
+
+    def sign_urls(self, filenames: Iterable[str], method='GET', expire=600, headers=None) -> Dict[str, str]:
+        """ Bulk version of `sign_url`. Returns mapping of filename to url. """
+        return {filename: self.sign_url(filename, method, expire, headers) for filename in filenames}
+
     def upload(
             self,
             filename,
@@ -93,14 +262,34 @@ class S3(object):
             content_type=None,
             signed_duration=36000,
             signed_method='GET',
+            multipart=False,
+            part_size=S3_PART_SIZE,
+            concurrency=S3_UPLOAD_CONCURRENCY,
+            progress=None,
     ):
+        """
+        Upload file to s3 and return signed url to it (or its name if ``signed_duration`` is not set).
+
+        With ``multipart`` file is streamed to s3 by parts (compressed on the fly if ``gzip`` is set), see
+        `upload_multipart`. Otherwise whole file is read into memory.
+        """
         opened = False
         if not fileobj:
-            fileobj = open(filename, 'r')
+            fileobj = open(filename, 'rb' if multipart else 'r')
             opened = True
 
         try:
-            if gzip in [None, False]:
+            if multipart:
+                filename = self.upload_multipart(
+                    filename,
+                    fileobj,
+                    gzip=gzip,
+                    content_type=content_type,
+                    part_size=part_size,
+                    concurrency=concurrency,
+                    progress=progress,
+                )
+            elif gzip in [None, False]:
                 self.put(
                     filename,
                     fileobj.read(),
@@ -135,5 +324,67 @@ class S3(object):
             if opened:
                 fileobj.close()
 
+    def upload_multipart(
+            self,
+            filename,
+            fileobj,
+            gzip=False,  # False or gzip compression level (0..9)
+            content_type=None,
+            part_size=S3_PART_SIZE,
+            concurrency=S3_UPLOAD_CONCURRENCY,
+            progress=None,
+    ):
+        """
+        Stream file to s3 as multipart upload, sending up to ``concurrency`` parts at once.
+
+        Memory usage stays at about ``part_size * concurrency`` whatever the file size. ``progress`` is called as
+        ``progress(uploaded_bytes, uploaded_parts)`` after each part. Returns name of uploaded file.
+        """
+        if gzip is True:
+            gzip = 7
+        compress = gzip not in [None, False]
+        source_name = filename
+        if compress:
+            filename = '{}.gz'.format(filename)
+            content_type = 'application/gzip'
+
+        headers = {'Content-Disposition': 'attachment; filename=' + filename}
+        if content_type:
+            headers['Content-Type'] = content_type
+
+        with self.pool.item() as bkt:
+            upload_id = bkt.initiate_multipart_upload(filename, headers=headers).id
+
+        def upload_part(part_num: int, data: bytes):
+            with self.pool.item() as part_bkt:
+                self._multipart(part_bkt, filename, upload_id).upload_part_from_file(BytesIO(data), part_num)
+
+        writer = MultipartWriter(upload_part, part_size, concurrency, progress)
+        try:
+            if compress:
+                with GzipFile(source_name, 'wb', gzip, writer) as gzfileobj:
+                    shutil.copyfileobj(fileobj, gzfileobj)
+            else:
+                shutil.copyfileobj(fileobj, writer)
+            writer.close()
+
+            with self.pool.item() as bkt:
+                self._multipart(bkt, filename, upload_id).complete_upload()
+        except BaseException:
+            writer.abort()
+            with self.pool.item() as bkt:
+                self._multipart(bkt, filename, upload_id).cancel_upload()
+            raise
+
+        return filename
+
+    @staticmethod
+    def _multipart(bucket, filename, upload_id):
+        """ Bind multipart upload to given (pooled) bucket handle. """
+        mp = MultiPartUpload(bucket)
+        mp.key_name = filename
+        mp.id = upload_id
+        return mp
+
 
 s3 = S3()
@@ -0,0 +1,72 @@
+import hashlib
+import os
+import time
+
+from mock import patch
+
+from upload.cache import DiskCache
+
+
+def md5(data: bytes) -> str:
+    return hashlib.md5(data).hexdigest()
+
+
+def test_store_and_get(tmpdir):
+    cache = DiskCache(str(tmpdir), 1024)
+    data = b'Hello world'
+
+    with cache.mapped(md5(data)) as cached:
+        assert cached is None
+    assert b''.join(cache.store(md5(data), [b'Hello', b' world'])) == data
+    with cache.mapped(md5(data)) as cached:
+        assert cached[:] == data
+    assert cached.closed
+
+
+def test_corrupted_entry_is_discarded(tmpdir):
+    cache = DiskCache(str(tmpdir), 1024)
+
+    assert b''.join(cache.store(md5(b'blop'), [b'blip'])) == b'blip'
+    assert not cache.contains(md5(b'blop'))
+    assert not os.listdir(str(tmpdir))
+
+
+def test_partial_read_is_discarded(tmpdir):
+    cache = DiskCache(str(tmpdir), 1024)
+
+    chunks = cache.store(md5(b'blipblop'), [b'blip', b'blop'])
+    next(chunks)
+    chunks.close()
+    assert not cache.contains(md5(b'blipblop'))
+    assert not os.listdir(str(tmpdir))
+
+
+def test_lru_eviction(tmpdir):
+    cache = DiskCache(str(tmpdir), 10)
+    first, second, third = b'a' * 4, b'b' * 4, b'c' * 4
+
+    list(cache.store(md5(first), [first]))
+    list(cache.store(md5(second), [second]))
+    os.utime(cache.path(md5(first)), (time.time() - 10, time.time() - 10))
+    os.utime(cache.path(md5(second)), (time.time() - 5, time.time() - 5))
+
+    cache.open(md5(first)).close()  # Touch first one, so second becomes least recently used
+    list(cache.store(md5(third), [third]))
+
+    assert cache.contains(md5(first))
+    assert not cache.contains(md5(second))
+    assert cache.contains(md5(third))
+
+
+def test_eviction_amortized(tmpdir):
+    cache = DiskCache(str(tmpdir), 1024)
+
+    with patch.object(cache, 'evict', wraps=cache.evict) as evict:
+        for data in [b'blip', b'blop', b'blup']:
+            list(cache.store(md5(data), [data]))
+        assert evict.call_count == 1  # First store finds out the size of the directory
+
+        cache.max_size = 10
+        list(cache.store(md5(b'blap'), [b'blap']))
+        assert evict.call_count == 2
+    assert len(os.listdir(str(tmpdir))) == 2
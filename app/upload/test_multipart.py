@@ -0,0 +1,70 @@
+import gzip
+import shutil
+from io import BytesIO
+
+import gevent
+import pytest
+
+from upload.multipart import MultipartWriter
+
+
+def test_parts():
+    parts = {}
+    progress = []
+
+    def upload_part(num: int, data: bytes):
+        parts[num] = data
+
+    writer = MultipartWriter(upload_part, part_size=4, progress=lambda *args: progress.append(args))
+    shutil.copyfileobj(BytesIO(b'0123456789'), writer, 3)
+    writer.close()
+
+    assert parts == {1: b'0123', 2: b'4567', 3: b'89'}
+    assert progress[-1] == (10, 3)
+
+
+def test_empty_file():
+    parts = {}
+    writer = MultipartWriter(parts.__setitem__, part_size=4)
+    writer.close()
+    assert parts == {1: b''}
+
+
+def test_bounded_concurrency():
+    running = []
+    max_running = []
+
+    def upload_part(num: int, data: bytes):
+        running.append(num)
+        max_running.append(len(running))
+        gevent.sleep(0.01)
+        running.remove(num)
+
+    writer = MultipartWriter(upload_part, part_size=1, concurrency=2)
+    writer.write(b'x' * 10)
+    writer.close()
+
+    assert max(max_running) == 2
+    assert writer.uploaded_parts == 10
+
+
+def test_failed_part():
+    def upload_part(num: int, data: bytes):
+        if num == 2:
+            raise IOError('blop')
+
+    writer = MultipartWriter(upload_part, part_size=1)
+    with pytest.raises(IOError):
+        writer.write(b'xyz')
+        writer.close()
+
+
+def test_gzip_stream():
+    parts = {}
+    writer = MultipartWriter(parts.__setitem__, part_size=16)
+    with gzip.GzipFile('blop', 'wb', 7, writer) as fh:
+        fh.write(b'blop' * 100)
+    writer.close()
+
+    data = b''.join(parts[num] for num in sorted(parts))
+    assert gzip.decompress(data) == b'blop' * 100
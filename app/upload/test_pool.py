@@ -0,0 +1,41 @@
+import gevent
+import pytest
+from mock import Mock
+
+from upload.pool import Pool, PoolTimeout
+
+
+def test_reuse():
+    pool = Pool(object, 2)
+    with pool.item() as first:
+        pass
+    with pool.item() as second:
+        assert second is first
+    assert pool.created == 1
+
+
+def test_wait_for_free_item():
+    pool = Pool(object, 1, timeout=1)
+    obj = pool.checkout()
+    gevent.spawn_later(0.05, pool.checkin, obj)
+
+    assert pool.checkout() is obj
+    stats = pool.stats()
+    assert stats['waits'] == 1
+    assert stats['max_wait'] >= 0.04
+
+
+def test_timeout():
+    pool = Pool(object, 1, timeout=0.01)
+    pool.checkout()
+    with pytest.raises(PoolTimeout):
+        pool.checkout()
+
+
+def test_factory_error_frees_slot():
+    pool = Pool(Mock(side_effect=[OSError('blop'), 'item']), 1, timeout=0.01)
+    with pytest.raises(OSError):
+        pool.checkout()
+
+    assert pool.created == 0
+    assert pool.checkout() == 'item'
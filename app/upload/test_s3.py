@@ -0,0 +1,81 @@
+import pytest
+from boto.exception import S3ResponseError
+from mock import Mock, patch
+
+from upload.cache import DiskCache
+from upload.pool import Pool
+from upload.s3 import S3
+
+
+def signing_s3() -> S3:
+    s3 = S3()
+    s3._connection = Mock()
+    generate_url = s3._connection.generate_url
+    generate_url.side_effect = lambda **kwargs: f'{kwargs["key"]}?n={generate_url.call_count}'
+    return s3
+
+
+def test_sign_url_cached():
+    s3 = signing_s3()
+    url = s3.sign_url('blop.jpg', method='GET', expire=100)
+    assert s3.sign_url('blop.jpg', method='GET', expire=100) == url
+    assert s3.sign_url('blop.jpg', method='PUT', expire=100) != url
+    assert s3.sign_url('blop.jpg', method='GET', expire=100, headers={'Content-Type': 'image/png'}) != url
+    assert s3._connection.generate_url.call_count == 3
+
+
+def test_sign_url_expiring():
+    s3 = signing_s3()
+    with patch('upload.s3.time.time', return_value=1000.):
+        url = s3.sign_url('blop.jpg', method='GET', expire=100)
+
+    with patch('upload.s3.time.time', return_value=1040.):
+        assert s3.sign_url('blop.jpg', method='GET', expire=100) == url
+
+    # Less than a half of lifetime remains
+    with patch('upload.s3.time.time', return_value=1060.):
+        assert s3.sign_url('blop.jpg', method='GET', expire=100) != url
+
+
+def test_sign_urls():
+    s3 = signing_s3()
+    urls = s3.sign_urls(['a.jpg', 'b.jpg'], expire=100)
+    assert set(urls) == {'a.jpg', 'b.jpg'}
+    assert s3.sign_urls(['a.jpg', 'b.jpg'], expire=100) == urls
+    assert s3.sign_url('a.jpg', method='GET', expire=100) == urls['a.jpg']
+
+
+def test_open_checked_version():
+    s3 = signing_s3()
+    s3._pool = Pool(Mock, 1)
+    with patch('upload.s3.Key.open_read') as open_read:
+        key = s3.open('blop.jpg', etag='abc')
+        open_read.assert_called_once_with(headers={'If-Match': '"abc"'})
+        s3.close(key)
+
+        s3.open('blop.jpg')
+        open_read.assert_called_with(headers=None)
+
+
+def test_replaced_object(tmpdir):
+    s3 = signing_s3()
+    s3._pool = Pool(Mock, 1)
+    error = S3ResponseError(412, 'Precondition Failed')
+
+    with patch('upload.s3.cache', DiskCache(str(tmpdir), 1024 * 1024)):
+        with patch('upload.s3.Key.open_read', side_effect=error) as open_read:
+            for read in [
+                lambda: s3.get('blop.jpg', etag='abc'),
+                lambda: list(s3.stream('blop.jpg', etag='abc')),
+                lambda: s3.fetch('blop.jpg', etag='abc'),
+                lambda: s3.file('blop.jpg', etag='abc'),
+            ]:
+                with pytest.raises(S3ResponseError):
+                    read()
+                open_read.assert_called_with(headers={'If-Match': '"abc"'})
+
+    with patch('upload.s3.Key.open_read', side_effect=error):
+        with pytest.raises(S3ResponseError):
+            s3.file('blop.jpg', etag='abc')  # Without cache too
+
+    assert s3.pool.stats()['idle'] == s3.pool.stats()['created'] == 1  # Connection is returned every time
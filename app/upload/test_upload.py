@@ -1,10 +1,13 @@
 from io import BytesIO
 
+import gevent
+import pytest
 from mock import patch
 
 from conftest import error
 from errors import ValidationError
-from upload.models import Upload
+from upload.errors import MissingFile
+from upload.models import Upload, open_uploads
 
 
 def test_upload(service, user, token):
@@ -28,10 +31,81 @@ def test_base64(user):
         assert res == 'image/png;base64,SGVsbG8='
 
 
+def test_iter_base64(user):
+    # Chunk boundaries are not aligned to 3 bytes on purpose
+    with patch('upload.s3.s3.stream', return_value=iter([b'He', b'llo', b' world'])):
+        res = Upload(user=user, original_filename='blop', content_type='image/png').iter_base64()
+        assert ''.join(res) == 'image/png;base64,SGVsbG8gd29ybGQ='
+
+
+def test_open_uploads(user):
+    uploads = [Upload(user=user, original_filename='front.jpg'), Upload(user=user, original_filename='back.jpg')]
+    with patch('upload.s3.s3.open', side_effect=lambda filename, etag=None: filename):
+        assert open_uploads(uploads) == [upload.filename for upload in uploads]
+
+
+def test_open_uploads_cancels_sibling(user):
+    opened = []
+
+    def fake_open(filename: str, etag: str = None):
+        if filename.endswith('.png'):
+            raise KeyError(filename)
+        gevent.sleep(0.1)
+        opened.append(filename)
+
+    uploads = [Upload(user=user, original_filename='front.jpg'), Upload(user=user, original_filename='back.png')]
+    with patch('upload.s3.s3.open', side_effect=fake_open):
+        with pytest.raises(KeyError):
+            open_uploads(uploads)
+
+    gevent.sleep(0.2)
+    assert not opened
+
+
+def test_urls(user):
+    uploads = [Upload.create(user=user, original_filename=name) for name in ['front.jpg', 'back.jpg']]
+    with patch('upload.s3.s3.sign_url', side_effect=lambda filename, *args: f'https://s3/{filename}') as sign_url:
+        urls = Upload.urls(Upload.objects.no_dereference())
+    assert urls == {str(upload.id): f'https://s3/{upload.filename}' for upload in uploads}
+    assert sign_url.call_count == 2
+
+
+STAT = {'size': 1234, 'etag': 'd41d8cd98f00b204e9800998ecf8427e', 'content_type': 'image/png'}
+
+
 def test_stored_size(user):
-    with patch('upload.s3.S3.file_size', return_value=1234):
-        res = Upload(user=user, original_filename='blop', content_type='image/png').stored_size
-        assert res == 1234
+    with patch('upload.s3.S3.stat', return_value=STAT) as stat:
+        upload = Upload.create(user=user, original_filename='blop.png', content_type='image/png')
+        assert upload.stored_size == 1234
+        assert upload.stored_size == 1234
+        assert stat.call_count == 1
+
+    upload.reload()
+    assert upload.s3_size == 1234
+    assert upload.s3_etag == STAT['etag']
+    assert upload.s3_content_type == 'image/png'
+
+
+def test_confirm_upload(service, user, token):
+    upload = Upload.create(user=user, original_filename='blop.png', content_type='image/png')
+    with patch('upload.s3.S3.stat', return_value=STAT):
+        res = service.post(f'/v1/upload/{upload.id}/confirm', auth=token(user))
+        assert res.status_code == 200, res.json
+        assert res.json['size'] == 1234
+
+    assert Upload.objects(id=upload.id).get().s3_size == 1234
+
+
+def test_confirm_missing_upload(service, user, token):
+    upload = Upload.create(user=user, original_filename='blop.png', content_type='image/png')
+    with patch('upload.s3.S3.stat', side_effect=KeyError(upload.filename)):
+        res = service.post(f'/v1/upload/{upload.id}/confirm', auth=token(user))
+        assert error(res, MissingFile)
+
+
+def test_confirm_invalid_id(service, user, token):
+    res = service.post('/v1/upload/blop/confirm', auth=token(user))
+    assert error(res, ValidationError)
 
 
 def test_no_extension(service, user, token):
@@ -1,24 +1,28 @@
-from flask import Blueprint, jsonify, request
+from bson import ObjectId
+from flask import Blueprint, request
 from voluptuous import All, Length, REMOVE_EXTRA, Range
 
 from errors import ValidationError
-from schema import Schema
+from schema import validator
+from serializer import jsonify
+from upload.errors import MissingFile
 from upload.models import Upload
 from user.auth import authenticate
 from user.models import User
 
 blueprint = Blueprint('uploads', __name__)
 
+upload_schema = validator('new_upload', {
+    'filename': All(Length(3, 250), str),
+    'content_type': All(Length(5, 20), str),
+    'size': Range(100, 4 * 1024 * 1024),  # 400KB..4MB
+}, extra=REMOVE_EXTRA, required=True)
+
 
 @blueprint.route('/v1/upload', methods=['POST'])
-@authenticate()
+@authenticate(fields=['id'])
 def new_upload(user: User):
-    schema = Schema({
-        'filename': All(Length(3, 250), str),
-        'content_type': All(Length(5, 20), str),
-        'size': Range(100, 4 * 1024 * 1024),  # 400KB..4MB
-    }, extra=REMOVE_EXTRA, required=True)
-    data = schema(request.json)
+    data = upload_schema.load(request)
 
     try:
         ext = data['filename'].split('.')[1].lower()
@@ -35,3 +39,30 @@ def new_upload(user: User):
         size=data['size'],
     )
     return jsonify({'put_url': upload.put_url, 'id': str(upload.id)})
+
+
+@blueprint.route('/v1/upload/<id>/confirm', methods=['POST'])
+@authenticate(fields=['id'])
+def confirm_upload(id: str, user: User):
+    """
+    Route to be called once file was uploaded to s3.
+
+    Checks the stored file and records its size, ETag and content type, so later checks won't hit s3 again.
+    """
+    if not ObjectId.is_valid(id):
+        raise ValidationError()
+    upload_id = ObjectId(id)
+
+    upload = Upload.objects(user=user, id=upload_id).get()
+
+    try:
+        upload.lookup()
+    except KeyError as err:
+        raise MissingFile(str(err))
+
+    return jsonify({
+        'id': str(upload.id),
+        'size': upload.s3_size,
+        'etag': upload.s3_etag,
+        'content_type': upload.s3_content_type,
+    })
@@ -1,27 +1,62 @@
 import datetime
 import functools
-from typing import Callable
+from typing import Callable, List
 
-from flask import request
+from bson import ObjectId
+from flask import g, has_request_context, request
 from mongoengine import DoesNotExist
 from werkzeug.exceptions import Unauthorized
 
-from config import WHITELIST_CLOSED, WHITELIST_OPEN_DATE
 from errors import WhitelistClosed
+from flags import flags
+from serializer import timestamp
+from signals import Transition, connect
 from tokens import verify_token
 from user.errors import UserNotFound
 from user.models import User
 
 
-def authenticate(should_exist: bool = True, bypass_closing: bool = False) -> Callable:
+def load_user(user_id: ObjectId, fields: List[str] = None) -> User:
+    """
+    Load user once per request.
+
+    User loaded earlier in the same request is reused if it has all requested ``fields`` (all of them if not set).
+    """
+    user = getattr(g, 'user', None)
+    if user is not None and user.id == user_id:
+        if not user._partial or (fields and set(fields) <= g.user_fields):
+            return user
+
+    user = User.load(user_id, fields)
+    user._fresh = True
+    g.user = user
+    g.user_fields = set(fields or [])
+    return user
+
+
+@connect(User.on_transition)
+def expire_request_user(user: User, transition: Transition):
+    """ Make request user reload if it was transitioned through another instance (e.g. ``IDUpload.user``). """
+    request_user = getattr(g, 'user', None) if has_request_context() else None
+    if request_user is not None and request_user is not user and request_user.id == user.id:
+        request_user._fresh = False
+
+
+def authenticate(should_exist: bool = True, bypass_closing: bool = False, fields: List[str] = None) -> Callable:
+    """
+    Decorator to pass authenticated user into the route as ``user`` argument.
+
+    :param fields: Fields route needs, only those are fetched from DB. Whole user is loaded if not set.
+    """
     def wrapper(func: Callable) -> Callable:
         @functools.wraps(func)
         def inner(*args, **kwargs):
-            if not bypass_closing and WHITELIST_CLOSED:
+            if not bypass_closing and flags['WHITELIST_CLOSED']:
                 raise WhitelistClosed()
 
-            if not bypass_closing and WHITELIST_OPEN_DATE and WHITELIST_OPEN_DATE > datetime.datetime.utcnow():
-                raise WhitelistClosed(details=dict(open_ts=int(WHITELIST_OPEN_DATE.strftime('%s'))))
+            open_date = flags['WHITELIST_OPEN_DATE']
+            if not bypass_closing and open_date and open_date > datetime.datetime.utcnow():
+                raise WhitelistClosed(details=dict(open_ts=timestamp(open_date)))
 
             auth = request.headers.get('Authorization')
             if not auth:
@@ -37,7 +72,7 @@ def authenticate(should_exist: bool = True, bypass_closing: bool = False) -> Cal
                 raise Unauthorized()
 
             try:
-                user = User.objects(id=user_id).get()
+                user = load_user(user_id, fields)
             except DoesNotExist:
                 if not should_exist:
                     user = User(id=user_id)
@@ -0,0 +1,93 @@
+"""
+User state machine.
+
+Allowed transitions are built once from `STATE_FLOW` and `FINAL_STATES`, so checking one is a dict and set lookup.
+Transition handlers are kept in a table keyed by ``(state_before, state_now)`` (``state_before`` is `None` for handlers
+of any transition into ``state_now``), so only matching handlers are called.
+"""
+import logging
+import time
+from collections import defaultdict
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from user.errors import InvalidState
+from user.state import (
+    ALL_STATES,
+    APPROVED_CAP,
+    APPROVED_NO_CAP,
+    CONTRIBUTED,
+    DECLINED,
+    FINAL_STATES,
+    ID_DECLINED,
+    ID_VERIFIED,
+    INFO_DECLINED,
+    INFO_VERIFIED,
+    STATE_FLOW,
+)
+
+log = logging.getLogger(__name__)
+Transition = Tuple[str, str]
+
+#: States admin can move user to from any state
+ADMIN_STATES = [APPROVED_NO_CAP, APPROVED_CAP, DECLINED, CONTRIBUTED]
+
+#: IDM can overturn its decline after a manual review
+REVIEWED = {
+    INFO_DECLINED: [INFO_VERIFIED],
+    ID_DECLINED: [ID_VERIFIED],
+}
+
+
+def build_transitions() -> Dict[str, FrozenSet[str]]:
+    allowed = {}
+    for state in ALL_STATES:
+        targets = {state, *ADMIN_STATES, *REVIEWED.get(state, [])}
+        if state in STATE_FLOW:
+            targets.update(STATE_FLOW[STATE_FLOW.index(state) + 1:])
+            targets.update(FINAL_STATES)
+        allowed[state] = frozenset(targets)
+    return allowed
+
+
+ALLOWED: Dict[str, FrozenSet[str]] = build_transitions()
+
+handlers: Dict[Tuple[Optional[str], str], List[Callable]] = defaultdict(list)
+timings: Dict[str, Dict[str, float]] = {}
+
+
+def allowed(state_before: str, state_now: str) -> bool:
+    return state_now in ALLOWED.get(state_before, ())
+
+
+def check(state_before: str, state_now: str):
+    """ Raise `InvalidState` if user can't be moved from ``state_before`` to ``state_now``. """
+    if not allowed(state_before, state_now):
+        raise InvalidState(state_before, details={'to': state_now})
+
+
+def handler(state_before: Optional[str], state_now: str) -> Callable:
+    """ Decorator to call function on transitions from ``state_before`` (any state if it's `None`) to ``state_now``. """
+    check_state = [state_now] if state_before is None else [state_before, state_now]
+    for state in check_state:
+        if state not in ALLOWED:
+            raise ValueError(f'Unknown state: {state}')
+
+    def decorator(func):
+        handlers[(state_before, state_now)].append(func)
+        return func
+
+    return decorator
+
+
+def dispatch(user, transition: Transition):
+    """ Call handlers registered for the ``transition``, recording their execution time. """
+    for func in handlers.get(transition, []) + handlers.get((None, transition[1]), []):
+        started = time.time()
+        try:
+            func(user, transition=transition)
+        finally:
+            elapsed = time.time() - started
+            stats = timings.setdefault(f'{func.__module__}.{func.__name__}', {'calls': 0, 'total': 0., 'max': 0.})
+            stats['calls'] += 1
+            stats['total'] += elapsed
+            stats['max'] = max(stats['max'], elapsed)
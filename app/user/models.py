@@ -1,14 +1,77 @@
 import datetime
+from typing import Dict, List
 
 from blinker import Signal
 from bson import ObjectId
 from mongoengine import BooleanField, DateTimeField, Document, EmailField, FloatField, IntField, StringField, ListField
 
+from cache import cached
+from config import STATE_COUNTS_TTL
+from serializer import Serializer
 from tokens import get_token
+from user import machine
 from user.errors import UserNotFound
 from user.state import ALL_DECLINE_REASONS, ALL_STATES, NEW_USER
 
 
+class StateCount(Document):
+    """
+    Number of users in each state, kept up to date by `User.create` and `User.transition` with atomic increments.
+
+    This saves a count over users collection when we need to know e.g. number of verified users. Counter of a state
+    is started from a real count the first time it's needed, so there's nothing to prepare after deploy. Users
+    changed in some other way aren't counted, use `reconcile` to repair that.
+    """
+
+    state = StringField(primary_key=True)
+    count = IntField(default=0)
+
+    @classmethod
+    def increment(cls, state: str, delta: int = 1):
+        if not cls.objects(state=state).update_one(inc__count=delta):
+            cls.start(state)
+        cls.get.cache.invalidate((cls, state))
+
+    @classmethod
+    @cached(STATE_COUNTS_TTL)
+    def get(cls, state: str) -> int:
+        """ Return number of users in given ``state``. This might be a few seconds stale. """
+        obj = cls.objects(state=state).first()
+        return obj.count if obj else cls.start(state)
+
+    @classmethod
+    def start(cls, state: str) -> int:
+        """
+        Create counter of ``state`` from a real count of users, unless another process did that meanwhile.
+
+        Users counted by increments racing with the first count may be missed, `reconcile` fixes that.
+        """
+        count = User.objects(state=state).count()
+        cls.objects(state=state).update_one(set_on_insert__count=count, upsert=True)
+        return cls.objects(state=state).get().count
+
+    @classmethod
+    def reconcile(cls) -> Dict[str, int]:
+        """
+        Recount users by state. Returns differences found as state -> (actual - stored) mapping.
+
+        Counts and increments aren't atomic together, so users moved while it runs may be counted twice or missed.
+        Run it when there's little traffic, a repeated run fixes what the previous one got wrong.
+        """
+        actual = {item['_id']: item['count'] for item in User.objects.aggregate(
+            {'$group': {'_id': '$state', 'count': {'$sum': 1}}}
+        )}
+        stored = {obj.state: obj.count for obj in cls.objects}
+
+        diff = {}
+        for state in set(actual) | set(stored):
+            delta = actual.get(state, 0) - stored.get(state, 0)
+            if delta:
+                cls.increment(state, delta)
+                diff[state] = delta
+        return diff
+
+
 class User(Document):
     """
     User object in whitelist service.
@@ -48,6 +111,31 @@ class User(Document):
         'action',
         'eth_cap',
     ]
+
+    #: Fields used by `to_json`, enough to load for routes which only return user's data
+    JSON_FIELDS = [
+        'address',
+        'city',
+        'state_code',
+        'zip_code',
+        'country_code',
+        'dob',
+        'email',
+        'confirmed_location',
+        'eth_address',
+        'eth_amount',
+        'state',
+        'eth_cap',
+        'decline_reason',
+        'id',
+        'first_name',
+        'last_name',
+        'phone',
+    ]
+
+    _partial = False  #: Only some of the fields were loaded, see `load`
+    _fresh = False  #: Loaded for current request (see `user.auth.authenticate`) and not written to since
+
     created_at = DateTimeField(default=datetime.datetime.utcnow)
 
     state = StringField(choices=ALL_STATES, default=NEW_USER)
@@ -103,34 +191,30 @@ class User(Document):
 
         return user
 
+    @classmethod
+    def load(cls, uid: ObjectId, fields: List[str] = None) -> 'User':
+        """ Load user, fetching only given ``fields`` if they're set. Raises `DoesNotExist` if there's no such user. """
+        query = cls.objects(id=uid)
+        if fields:
+            query = query.only(*fields)
+        user = query.get()
+        user._partial = bool(fields)
+        return user
+
+    @classmethod
+    def eth_address_exists(cls, eth_address: str) -> bool:
+        """ Check if there's user with given address. Answered from ``eth_address`` index alone (covered query). """
+        return cls._get_collection().find_one({'eth_address': eth_address}, {'_id': 0, 'eth_address': 1}) is not None
+
     @classmethod
     def create(cls, **data) -> 'User':
         obj = cls(id=ObjectId(), **data).save(force_insert=True)
+        StateCount.increment(obj.state)
         cls.on_create.send(obj)
         return obj
 
     def to_json(self):
-        return {
-            'address': self.address,
-            'city': self.city,
-            'state_code': self.state_code,
-            'zip_code': self.zip_code,
-            'country_code': self.country_code,
-            'dob': int(self.dob.strftime('%s')) if self.dob else None,
-            'email': self.email,
-            # 'telegram': self.telegram,
-            'confirmed_location': self.confirmed_location,
-            'eth_address': self.eth_address,
-            'eth_amount': self.eth_amount,
-            'state': self.state,
-            'eth_cap': self.eth_cap,
-            'decline_reason': self.decline_reason,
-            'id': str(self.id),
-            'first_name': self.first_name,
-            'last_name': self.last_name,
-            'phone': self.phone,
-            'token': get_token(self.id),
-        }
+        return user_json(self)
 
     def to_csv(self) -> dict:
         res = {}
@@ -151,29 +235,68 @@ class User(Document):
             res.update({field: value})
         return res
 
-    def transition(self, new_state: str, decline_reason: str = None, details: str = None) -> str:
+    def update(self, **kwargs):
+        self._fresh = False
+        return super().update(**kwargs)
+
+    def reload(self, *fields, **kwargs) -> 'User':
+        """ Reload user from DB. Does nothing for a fully loaded user that wasn't written to in current request. """
+        if self._fresh and not self._partial and not fields:
+            return self
+
+        super().reload(*fields, **kwargs)
+        if not fields:
+            self._partial = False
+        return self
+
+    def modify(self, query: dict = None, **update) -> bool:
+        modified = super().modify(query, **update)
+        if modified:  # Whole document was fetched
+            self._partial = False
+        return modified
+
+    def transition(self, new_state: str, decline_reason: str = None, details: str = None, **extra) -> str:
         """
         Transition user to new state.
 
-        This will trigger signal to perform operations required for new state.
+        State is changed atomically and only if user is still in the state this object has. If the state was changed
+        by someone else meanwhile, only ``extra`` fields (e.g. ``kyc_result``) are stored and the signal is not sent.
+
+        This will trigger signal and handlers registered in `user.machine` to perform operations required for new
+        state. Raises `InvalidState` if transition is not allowed.
 
         :return: Updated state after all signals
 
         """
         previous = self.state
-        self.state = new_state
+        machine.check(previous, new_state)
+
+        values = dict(extra, state=new_state)
         if decline_reason:
-            self.decline_reason = decline_reason
+            values['decline_reason'] = decline_reason
 
         if details:
-            self.info = details
+            values['info'] = details
 
-        self.save()
+        if not self.modify({'state': previous}, **values):
+            if extra:
+                self.modify(**extra)
+            else:
+                self._fresh = False
+                self.reload()
+            return self.state
+
+        if previous != self.state:
+            StateCount.increment(previous, -1)
+            StateCount.increment(self.state)
         self.on_transition.send(self, transition=(previous, self.state))
+        machine.dispatch(self, (previous, self.state))
 
-        # Our state can be changed after signals are completed
-        self.reload()
+        # Receivers work with this object, so any state change they made is already here
         return self.state
 
     def __str__(self):
         return f'<User:{self.id}:{self.state}>'
+
+
+user_json = Serializer(User, User.JSON_FIELDS + [('token', lambda user: get_token(user.id))])
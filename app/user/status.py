@@ -0,0 +1,102 @@
+"""
+Verification status of users by eth address, as shown by public ``GET /v1/user/<addr>``.
+
+The route is polled hard, so statuses (and misses) are cached in process. When user with the address is created or gets
+onfido check result, its entry is dropped right away in the process that made the change (see `invalidate`) and the
+change is recorded as `StatusChange`. Other processes poll those every ``ETH_STATUS_SYNC_INTERVAL`` seconds and drop
+their entries too, so they serve a stale status for about that long rather than for ``ETH_STATUS_TTL``.
+"""
+import datetime
+import logging
+import time
+from typing import Optional
+
+import gevent
+from mongoengine import DateTimeField, Document, StringField
+
+from cache import cached
+from config import ETH_STATUS_CACHE_SIZE, ETH_STATUS_NEGATIVE_TTL, ETH_STATUS_SYNC_INTERVAL, ETH_STATUS_TTL
+from signals import connect
+from user.models import User
+
+log = logging.getLogger(__name__)
+
+STATUSES = {
+    'clear': 'approved',
+    'consider': 'declined'
+}
+
+CLOCK_SKEW = datetime.timedelta(seconds=5)  # Changes are polled with this overlap, clocks of hosts may differ a bit
+
+
+class StatusChange(Document):
+    meta = {
+        'indexes': [
+            {'fields': ['created_at'], 'expireAfterSeconds': 600},
+        ]
+    }
+    address = StringField(required=True)
+    created_at = DateTimeField(default=datetime.datetime.utcnow)
+
+
+@cached(ETH_STATUS_TTL, ETH_STATUS_CACHE_SIZE, negative_ttl=ETH_STATUS_NEGATIVE_TTL)
+def eth_status(address: str) -> Optional[str]:
+    """ Return status of the user with given (normalized) eth ``address`` or `None` if there's no such user. """
+    user = User.objects(eth_address=address).only('onfid_status').first()
+    if not user:
+        return None
+
+    return STATUSES.get(user.onfid_status, 'declined')
+
+
+class Changes(object):
+    """
+    Poller of `StatusChange` records made by other processes.
+
+    `check` is cheap enough to be called on every request, it starts a background poll once the last one is older than
+    ``interval`` seconds.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+
+        # Cache is empty before the first poll, so earlier changes don't matter
+        self._since = datetime.datetime.utcnow()
+        self._polled_at = time.monotonic()
+        self._polling = None
+
+    def check(self):
+        if time.monotonic() - self._polled_at >= self.interval and not self._polling:
+            self._polling = gevent.spawn(self._poll_in_background)
+
+    def poll(self):
+        """ Drop cached statuses of addresses changed since the previous poll. """
+        now = datetime.datetime.utcnow()
+        for address in StatusChange.objects(created_at__gte=self._since - CLOCK_SKEW).scalar('address'):
+            eth_status.cache.invalidate((address,))
+        self._since = now
+        self._polled_at = time.monotonic()
+
+    def _poll_in_background(self):
+        try:
+            self.poll()
+        except Exception as ex:
+            # Try again after interval, entries still expire by their ttl meanwhile
+            self._polled_at = time.monotonic()
+            log.exception('Failed to poll eth status changes: %s', ex)
+        finally:
+            self._polling = None
+
+
+changes = Changes(ETH_STATUS_SYNC_INTERVAL)
+
+
+def invalidate(address: Optional[str]):
+    if address:
+        eth_status.cache.invalidate((address,))
+        StatusChange(address=address).save()
+
+
+@connect(User.on_create)
+def invalidate_created(user: User, **_):
+    invalidate(user.eth_address)
@@ -4,7 +4,10 @@ from mock import patch
 
 from conftest import error
 from errors import WhitelistClosed
+from flags import flags
 from tokens import get_token
+from user.auth import load_user
+from user.models import User
 from user.test_user_info import new_user
 
 
@@ -14,13 +17,41 @@ def test_valid_token_auth(service, user):
 
 
 def test_closed_whitelist(service):
-    with patch('user.views.WHITELIST_CLOSED', True):
-        res = service.post('/v1/user', new_user())
-        assert error(res, WhitelistClosed)
+    flags.set('WHITELIST_CLOSED', True)
+    res = service.post('/v1/user', new_user())
+    assert error(res, WhitelistClosed)
 
 
 def test_whitelist_not_yet_opened(service):
-    ts = datetime.datetime(2020, 10, 10)
-    with patch('user.views.WHITELIST_OPEN_DATE', ts):
-        res = service.post('/v1/user', new_user())
-        assert error(res, WhitelistClosed)
+    flags.set('WHITELIST_OPEN_DATE', datetime.datetime.utcnow() + datetime.timedelta(days=1))
+    res = service.post('/v1/user', new_user())
+    assert error(res, WhitelistClosed)
+
+
+def test_projected_user(service, user):
+    with patch('user.auth.User.load', wraps=User.load) as load:
+        res = service.get('/v1/user', auth=get_token(user.id))
+        assert res.status_code == 200
+        assert res.json['email'] == user.email
+
+    load.assert_called_once_with(user.id, User.JSON_FIELDS)
+
+
+def test_request_user(app, user):
+    with app.test_request_context():
+        loaded = load_user(user.id, ['id'])
+        assert loaded._partial
+        assert load_user(user.id, ['id']) is loaded
+
+        # Needs more fields than were loaded
+        full = load_user(user.id)
+        assert full is not loaded
+        assert load_user(user.id, ['id']) is full
+
+        with patch('mongoengine.Document.reload') as reload:
+            assert full.reload() is full
+            assert not reload.called
+
+            full.update(first_name='blop')
+            full.reload()
+            assert reload.called
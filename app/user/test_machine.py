@@ -0,0 +1,83 @@
+import pytest
+
+from idm.const import STATUS_ACCEPTED
+from idm.models import IDMResponse
+from user import machine
+from user.errors import InvalidState
+from user.state import (
+    APPROVED_CAP,
+    DECLINED,
+    ID_VERIFIED,
+    INFO_DECLINED,
+    INFO_NOT_VERIFIED,
+    INFO_PENDING_VERIFICATION,
+    INFO_VERIFIED,
+    NEW_USER,
+)
+from user.verifications import apply_response
+
+
+def test_allowed_transitions():
+    machine.check(NEW_USER, INFO_NOT_VERIFIED)
+    machine.check(NEW_USER, INFO_VERIFIED)
+    machine.check(INFO_PENDING_VERIFICATION, INFO_DECLINED)
+    machine.check(INFO_DECLINED, DECLINED)
+    machine.check(INFO_DECLINED, INFO_VERIFIED)
+    machine.check(ID_VERIFIED, ID_VERIFIED)
+
+    for before, now in [
+        (INFO_VERIFIED, INFO_NOT_VERIFIED),
+        (INFO_DECLINED, ID_VERIFIED),
+        (APPROVED_CAP, INFO_PENDING_VERIFICATION),
+    ]:
+        with pytest.raises(InvalidState):
+            machine.check(before, now)
+
+
+def test_invalid_transition(service, user):
+    user.transition(INFO_VERIFIED)
+
+    with pytest.raises(InvalidState):
+        user.transition(INFO_NOT_VERIFIED)
+    assert user.reload().state == INFO_VERIFIED
+
+
+def test_handlers(service, user):
+    calls = []
+
+    def exact(user, transition):
+        calls.append(('exact', transition))
+
+    def wildcard(user, transition):
+        calls.append(('wildcard', transition))
+
+    exact = machine.handler(NEW_USER, INFO_NOT_VERIFIED)(exact)
+    wildcard = machine.handler(None, INFO_VERIFIED)(wildcard)
+    try:
+        user.transition(INFO_NOT_VERIFIED)
+        user.transition(INFO_VERIFIED)
+    finally:
+        machine.handlers[(NEW_USER, INFO_NOT_VERIFIED)].remove(exact)
+        machine.handlers[(None, INFO_VERIFIED)].remove(wildcard)
+
+    assert calls == [
+        ('exact', (NEW_USER, INFO_NOT_VERIFIED)),
+        ('wildcard', (INFO_NOT_VERIFIED, INFO_VERIFIED)),
+    ]
+    assert machine.timings['user.test_machine.exact']['calls'] >= 1
+
+
+def test_unknown_state():
+    with pytest.raises(ValueError):
+        machine.handler(None, 'blop')
+
+
+def test_late_idm_result(service, user):
+    user.transition(APPROVED_CAP)
+
+    response = IDMResponse(result=STATUS_ACCEPTED, transaction_id='123')
+    assert apply_response(user, response, False) == APPROVED_CAP
+
+    stored = user.reload()
+    assert stored.state == APPROVED_CAP
+    assert stored.idm_result == STATUS_ACCEPTED
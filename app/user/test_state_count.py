@@ -0,0 +1,44 @@
+from mock import patch
+
+from user.models import StateCount, User
+from user.state import ID_VERIFIED, INFO_NOT_VERIFIED, NEW_USER
+
+
+def test_counts(service):
+    user = User.create(email='blop@example.com', telegram='blop')
+    assert StateCount.get(NEW_USER) == 1
+
+    user.transition(INFO_NOT_VERIFIED)
+    assert StateCount.get(NEW_USER) == 0
+    assert StateCount.get(INFO_NOT_VERIFIED) == 1
+
+    # Repeated transitions to the same state don't count
+    user.transition(INFO_NOT_VERIFIED)
+    assert StateCount.get(INFO_NOT_VERIFIED) == 1
+
+
+def test_cached(service):
+    assert StateCount.get(ID_VERIFIED) == 0
+
+    with patch.object(StateCount, 'objects') as objects:
+        assert StateCount.get(ID_VERIFIED) == 0
+        assert not objects.called
+
+
+def test_started_from_real_count(service, user):
+    # Fixture user is saved directly, but there's no counter yet, so it's counted
+    assert StateCount.get(NEW_USER) == 1
+
+    User.create(email='blop@example.com', telegram='blop')
+    StateCount.get.cache.invalidate()
+    assert StateCount.get(NEW_USER) == 2
+
+
+def test_reconcile(service, user):
+    StateCount.increment(NEW_USER)
+    User.objects(id=user.id).update(state=INFO_NOT_VERIFIED)
+
+    assert StateCount.reconcile() == {NEW_USER: -1, INFO_NOT_VERIFIED: 1}
+    assert StateCount.get(NEW_USER) == 0
+    assert StateCount.get(INFO_NOT_VERIFIED) == 1
+    assert StateCount.reconcile() == {}
@@ -0,0 +1,71 @@
+import gevent
+from mock import patch
+
+from onfid.const import CHECK_COMPLETE
+from onfid.models import Check
+from onfid.signals import update_user_property_on_complete
+from user.models import User
+from user.status import Changes, StatusChange, eth_status
+
+ADDRESS = '0000000000000000000000000000000000000001'
+
+
+def test_status(service, user):
+    res = service.get(f'/v1/user/0x{user.eth_address}')
+    assert res.json == {'status': 'declined'}
+
+    res = service.get(f'/v1/user/{ADDRESS}')
+    assert res.json == {'status': 'not-found'}
+
+    res = service.get('/v1/user/blop')
+    assert res.json == {'status': 'not-found'}
+
+
+def test_cached(service, user):
+    assert eth_status(user.eth_address) == 'declined'
+    assert eth_status(ADDRESS) is None
+
+    with patch.object(User, 'objects') as objects:
+        assert eth_status(user.eth_address) == 'declined'
+        assert eth_status(ADDRESS) is None
+        assert not objects.called
+
+
+def test_invalidated_on_create(service):
+    assert eth_status(ADDRESS) is None
+
+    User.create(email='blop@example.com', eth_address=ADDRESS)
+    assert eth_status(ADDRESS) == 'declined'
+
+
+def test_invalidated_on_check(service, user):
+    assert eth_status(user.eth_address) == 'declined'
+
+    update_user_property_on_complete(Check(user=user, status=CHECK_COMPLETE, result='clear'))
+    assert eth_status(user.eth_address) == 'approved'
+
+
+def test_invalidated_by_other_process(service, user):
+    changes = Changes(interval=60)
+    assert eth_status(user.eth_address) == 'declined'
+
+    # Another process got the check result, this one only learns it from the recorded change
+    user.modify(onfid_status='clear')
+    StatusChange(address=user.eth_address).save()
+    assert eth_status(user.eth_address) == 'declined'
+
+    changes.poll()
+    assert eth_status(user.eth_address) == 'approved'
+
+
+def test_changes_polled_in_background(service):
+    changes = Changes(interval=0.01)
+    with patch.object(changes, 'poll') as poll:
+        changes.check()
+        assert not poll.called
+
+        gevent.sleep(0.02)
+        changes.check()
+        changes.check()
+        gevent.sleep(0)
+        assert poll.call_count == 1
@@ -0,0 +1,40 @@
+from mock import Mock
+
+from user.models import StateCount, User
+from user.state import DECLINED, DECLINE_ADMIN, INFO_NOT_VERIFIED, INFO_VERIFIED, NEW_USER
+
+
+def test_transition(service, user):
+    receiver = Mock()
+    User.on_transition.connect(receiver, weak=False)
+    try:
+        state = user.transition(INFO_VERIFIED, details='blop', kyc_result='ACCEPT')
+    finally:
+        User.on_transition.disconnect(receiver)
+
+    assert state == INFO_VERIFIED
+    receiver.assert_called_once_with(user, transition=(NEW_USER, INFO_VERIFIED))
+
+    stored = User.objects(id=user.id).get()
+    assert stored.state == INFO_VERIFIED
+    assert stored.info == 'blop'
+    assert stored.kyc_result == 'ACCEPT'
+
+
+def test_concurrent_transition(service, user):
+    other = User.objects(id=user.id).get()
+    other.transition(DECLINED, decline_reason=DECLINE_ADMIN)
+
+    receiver = Mock()
+    User.on_transition.connect(receiver, weak=False)
+    try:
+        # State has changed since user was loaded, so it's kept as is
+        state = user.transition(INFO_NOT_VERIFIED, kyc_result='ACCEPT')
+    finally:
+        User.on_transition.disconnect(receiver)
+
+    assert state == DECLINED
+    assert user.decline_reason == DECLINE_ADMIN
+    assert user.kyc_result == 'ACCEPT'
+    assert not receiver.called
+    assert StateCount.get(INFO_NOT_VERIFIED) == 0
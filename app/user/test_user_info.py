@@ -5,10 +5,13 @@ from mock import patch
 from requests import HTTPError, Response
 
 from conftest import error
-from errors import ObjectExists, ValidationError
+from errors import ObjectExists, ValidationError, WhitelistClosed
+from flags import flags
 from idm.const import STATUS_ACCEPTED, STATUS_DECLINED, USER_REPUTATION_SUSPICIOUS
-from idm.errors import IDMError
+from idm.errors import IDMBusy, IDMError
 from idm.models import IDMResponse
+from jobs.models import Job
+from jobs.worker import process
 from tokens import get_token
 from user.models import User
 from user.state import DECLINE_COUNTRY, INFO_DECLINED, INFO_FAILED, INFO_PENDING_VERIFICATION, INFO_VERIFIED
@@ -39,6 +42,11 @@ def new_user(**kwargs) -> dict:
     return default
 
 
+@pytest.fixture(autouse=True)
+def open_registration(service):
+    flags.set('REGISTRATION_CLOSED', False)
+
+
 def test_to_eth():
     failed = [
         'DEADBEEF',
@@ -101,6 +109,21 @@ def test_failed_verification_request(service):
     # assert user.info == 'blop'
 
 
+def test_busy_verification(service):
+    """ IDM wasn't called when local limiter rejects the request, so verification is retried by a job. """
+    with patch('user.verifications.verify', side_effect=IDMBusy()):
+        service.post('/v1/user', new_user())
+
+    user = User.objects.get()
+    assert user.state == INFO_PENDING_VERIFICATION
+
+    accepted = IDMResponse(result=STATUS_ACCEPTED, transaction_id='123')
+    with patch('user.verifications.verify', return_value=accepted):
+        process(Job.claim())
+
+    assert user.reload().state == INFO_VERIFIED
+
+
 def test_successful_verification(service):
     with patch('user.verifications.verify', return_value=IDMResponse(result=STATUS_ACCEPTED, transaction_id='123')):
         service.post('/v1/user', new_user())
@@ -154,6 +177,22 @@ def test_start_as_existing_user(service, user):
     assert User.objects.count() == 1
 
 
+def test_registration_closed(service, user):
+    flags.set('REGISTRATION_CLOSED', True)
+
+    # New users are answered without validation or loading anything but index entries
+    with patch('user.views.info_schema.load') as load, patch.object(User, 'objects') as objects:
+        for data in [new_user(), new_user(eth_address='blop'), new_user(eth_address=None), 'blop']:
+            res = service.post('/v1/user', data)
+            assert error(res, WhitelistClosed)
+        assert not load.called
+        assert not objects.called
+
+    res = service.post('/v1/user', new_user(email=user.email, eth_address=user.eth_address))
+    assert res.status_code == 200, res.json
+    assert res.json['id'] == str(user.id)
+
+
 def test_try_using_existing_eth(service, user):
     res = service.post('/v1/user', new_user(email='another@example.com', eth_address=user.eth_address))
     assert error(res, ObjectExists)
@@ -1,10 +1,13 @@
 import logging
 
-from idm.errors import IDMError
+from idm.errors import IDMBusy, IDMError
 from idm.models import IDMResponse
 from idm.const import STATUS_ACCEPTED, STATUS_DECLINED, STATUS_PENDING
 from idm.verify import verify
 from ids.models import IDUpload
+from jobs.models import Job
+from jobs.worker import task
+from user import machine
 from user.models import User
 from user.state import (
     DECLINE_IDM_INFO,
@@ -29,12 +32,41 @@ def verify_info(user: User) -> str:
 
     try:
         response = verify(user, kyc=True)
-        apply_response(user, response, True)
+        return apply_response(user, response, True)
+    except IDMBusy:
+        # IDM wasn't called, so user stays pending and job workers retry the check later (see `process_info`)
+        Job.enqueue('verify_info', user=str(user.id))
+        return state
+    except IDMError as err:
+        return user.transition(INFO_FAILED, details=err.text)
+
+
+def fail_info(user: str, error: str):
+    """ Called when all attempts to retry info verification failed. """
+    user = User.objects(id=user).get()
+    if user.state == INFO_PENDING_VERIFICATION:
+        user.transition(INFO_FAILED, details=error)
+
+
+@task('verify_info', on_failure=fail_info)
+def process_info(user: str) -> str:
+    user = User.objects(id=user).get()
+
+    # User could be moved by admin while job was waiting in the queue
+    if user.state != INFO_PENDING_VERIFICATION:
+        return user.state
+
+    try:
+        response = verify(user, kyc=True)
+        return apply_response(user, response, True)
+    except IDMBusy:
+        raise  # Job will be retried later
     except IDMError as err:
         return user.transition(INFO_FAILED, details=err.text)
 
 
 def verify_ids(upload: IDUpload) -> str:
+    """ Move user to pending verification and queue ids to be sent to the IDM by job workers (see `process_ids`). """
     user = upload.user
     state = user.transition(ID_PENDING_VERIFICATION)
 
@@ -42,42 +74,73 @@ def verify_ids(upload: IDUpload) -> str:
     if state != ID_PENDING_VERIFICATION:
         return state
 
-    image1 = upload.upload1.to_base64()
-    image2 = upload.upload2.to_base64()
+    Job.enqueue('verify_ids', upload=str(upload.id))
+    return state
+
+
+def fail_ids(upload: str, error: str):
+    """ Called when all attempts to verify ids failed. """
+    user = IDUpload.objects(id=upload).get().user
+    if user.state == ID_PENDING_VERIFICATION:
+        user.transition(ID_FAILED, details=error)
+
+
+@task('verify_ids', on_failure=fail_ids)
+def process_ids(upload: str) -> str:
+    upload = IDUpload.objects(id=upload).get()
+    user = upload.user
+
+    # User could be moved by admin while job was waiting in the queue
+    if user.state != ID_PENDING_VERIFICATION:
+        return user.state
 
     try:
         response = verify(
             user=user,
             kyc=False,
-            image1=image1,
-            image2=image2,
+            images=[upload.upload1, upload.upload2],
             doc_type=upload.doc_type,
             doc_state=upload.doc_state,
             doc_country=upload.doc_country,
         )
         if response.user:
-            apply_response(user, response, False)
+            return apply_response(user, response, False)
+        return user.state
+    except IDMBusy:
+        raise  # Job will be retried later
     except IDMError as err:
         return user.transition(ID_FAILED, details=err.text)
 
 
 def apply_response(user: User, response: IDMResponse, is_info: bool) -> str:
-    if is_info:
-        user.update(kyc_result=response.status)
-    else:
-        user.update(idm_result=response.status)
+    result = {'kyc_result' if is_info else 'idm_result': response.status}
 
     if response.status == STATUS_DECLINED:
         if is_info:  # KYC is hard-fail
-            return user.transition(
+            return _apply(
+                user,
                 INFO_DECLINED,
+                result,
                 decline_reason=DECLINE_IDM_INFO,
                 details=response.user_reputation,
             )
         else:  # IDs are soft-fail - we do nothing and let admin decide
+            user.modify(**result)
             return user.state
     elif response.status in [STATUS_ACCEPTED, STATUS_PENDING]:
-        return user.transition(INFO_VERIFIED if is_info else ID_VERIFIED)
+        return _apply(user, INFO_VERIFIED if is_info else ID_VERIFIED, result)
     else:
         log.warning('Got different response from IDM: %s', response.status)
+        user.modify(**result)
+        return user.state
+
+
+def _apply(user: User, state: str, result: dict, **kwargs) -> str:
+    """ Move user to ``state`` for IDM response, or only store ``result`` if user has moved on since the request. """
+    if not machine.allowed(user.state, state):
+        # Late result (e.g. webhook for a user admin already approved), answering it with an error would make IDM retry
+        log.info('Ignoring IDM result %s for %s', state, user)
+        user.modify(**result)
         return user.state
+
+    return user.transition(state, **kwargs, **result)
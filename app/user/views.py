@@ -1,20 +1,30 @@
-from flask import Blueprint, jsonify, request
-from voluptuous import All, Any, Coerce, Email, Length, Optional, REMOVE_EXTRA, Range, datetime, re
+import datetime
+import re
+
+from flask import Blueprint, request
+from voluptuous import All, Any, Coerce, Email, Length, Optional, REMOVE_EXTRA, Range
 from werkzeug.exceptions import NotFound
 
-from config import ETH_ADDRESS, WHITELISTED_ADDRESSES, WHITELIST_CLOSED, WHITELIST_OPEN_DATE, ETH_MAX_CONTRIBUTION
+from config import ETH_ADDRESS
 from errors import ValidationError, WhitelistClosed
-from schema import Schema
+from eth.index import index as whitelisted_addresses
+from flags import flags
+from schema import validator
+from serializer import jsonify, timestamp
 from user.auth import authenticate
 from user.models import User
 from user.state import INFO_NOT_VERIFIED
+from user.status import changes as status_changes, eth_status
 from user.verifications import verify_info
 
 blueprint = Blueprint('info', __name__)
 
+ETH_RE = re.compile('^(0x)?(?P<addr>[0-9a-f]{40})$', flags=re.IGNORECASE)
+TELEGRAM_RE = re.compile('^@?(?P<name>[0-9a-z_]{5,25})$', flags=re.IGNORECASE)
+
 
 def to_eth(value: str) -> str:
-    match = re.match('^(0x)?(?P<addr>[0-9a-f]{40})$', value, flags=re.IGNORECASE)
+    match = ETH_RE.match(value)
     if not match:
         raise ValueError(value)
     return match.group('addr').lower()
@@ -28,43 +38,60 @@ def to_datetime(value: str) -> datetime.datetime:
 
 
 def to_telegram(value: str) -> str:
-    match = re.match('^@?(?P<name>[0-9a-z_]{5,25})$', value, flags=re.IGNORECASE)
+    match = TELEGRAM_RE.match(value)
     if not match:
         raise ValueError(value)
     return match.group('name')
 
 
+info_schema = validator('provide_info', {
+    'first_name': All(Length(2, 30), str),
+    'last_name': All(Length(2, 30), str),
+    'email': Email(),
+    'dob': Coerce(to_datetime),
+    'address': All(Length(1, 100), str),
+    'city': All(Length(2, 30), str),
+    Optional('state_code', default=None): Any(None, All(Length(0, 30), str)),
+    'zip_code': All(Length(2, 20), str),
+    'country_code': All(Length(2, 3), str),
+    'phone': All(Length(8, 20), str),
+    Optional('eth_address', default=None): Coerce(to_eth),
+    Optional('eth_amount', default=None): All(Range(0, 100), Any(float, int)),
+    'telegram': Coerce(to_telegram),
+    'confirmed_location': bool,
+    'dfp': All(Length(10, 4096), str),
+    Optional('medium', default=None): Any(None, All(Length(0, 150), str)),
+    Optional('reddit', default=None): Any(None, All(Length(0, 150), str)),
+    Optional('twitter', default=None): Any(None, All(Length(0, 150), str)),
+    Optional('linkedin', default=None): Any(None, All(Length(0, 150), str)),
+    Optional('facebook', default=None): Any(None, All(Length(0, 150), str)),
+}, extra=REMOVE_EXTRA, required=True)
+
+
+def known_eth_address(data: dict) -> bool:
+    """ Check if raw (not validated, so it may be anything) payload has eth address of an existing user. """
+    address = data.get('eth_address') if isinstance(data, dict) else None
+    try:
+        return bool(address) and User.eth_address_exists(to_eth(address))
+    except (TypeError, ValueError):
+        return False
+
+
 @blueprint.route('/v1/user', methods=['POST'])
 def provide_info():
-    if WHITELIST_CLOSED:
+    if flags['WHITELIST_CLOSED']:
         raise WhitelistClosed()
 
-    if WHITELIST_OPEN_DATE and WHITELIST_OPEN_DATE > datetime.datetime.utcnow():
-        raise WhitelistClosed(details=dict(open_ts=int(WHITELIST_OPEN_DATE.strftime('%s'))))
-
-    schema = Schema({
-        'first_name': All(Length(2, 30), str),
-        'last_name': All(Length(2, 30), str),
-        'email': Email(),
-        'dob': Coerce(to_datetime),
-        'address': All(Length(1, 100), str),
-        'city': All(Length(2, 30), str),
-        Optional('state_code', default=None): Any(None, All(Length(0, 30), str)),
-        'zip_code': All(Length(2, 20), str),
-        'country_code': All(Length(2, 3), str),
-        'phone': All(Length(8, 20), str),
-        Optional('eth_address', default=None): Coerce(to_eth),
-        Optional('eth_amount', default=None): All(Range(0, 100), Any(float, int)),
-        'telegram': Coerce(to_telegram),
-        'confirmed_location': bool,
-        'dfp': All(Length(10, 4096), str),
-        Optional('medium', default=None): Any(None, All(Length(0, 150), str)),
-        Optional('reddit', default=None): Any(None, All(Length(0, 150), str)),
-        Optional('twitter', default=None): Any(None, All(Length(0, 150), str)),
-        Optional('linkedin', default=None): Any(None, All(Length(0, 150), str)),
-        Optional('facebook', default=None): Any(None, All(Length(0, 150), str)),
-    }, extra=REMOVE_EXTRA, required=True)
-    data = schema(request.json)
+    open_date = flags['WHITELIST_OPEN_DATE']
+    if open_date and open_date > datetime.datetime.utcnow():
+        raise WhitelistClosed(details=dict(open_ts=timestamp(open_date)))
+
+    registration_closed = flags['REGISTRATION_CLOSED']
+    if registration_closed and not known_eth_address(info_schema.payload(request)):
+        # Turn new users away before validating their data
+        raise WhitelistClosed()
+
+    data = info_schema.load(request)
     data['email'] = data['email'].lower()
 
     if not data['confirmed_location']:
@@ -78,8 +105,8 @@ def provide_info():
     if user:
         return jsonify(user.to_json())
 
-    ####################### WHITELIST IS CLOSED FOR NEW USERS ####################
-    raise WhitelistClosed()
+    if registration_closed:
+        raise WhitelistClosed()
 
     user = User.create(**data)
 
@@ -100,14 +127,14 @@ def address_is_whitelisted(addr: str):
     except ValueError:
         raise NotFound()
 
-    if addr in WHITELISTED_ADDRESSES:
-        return jsonify({"address": ETH_ADDRESS, 'max_contribution': ETH_MAX_CONTRIBUTION})
+    if addr in whitelisted_addresses:
+        return jsonify({"address": ETH_ADDRESS, 'max_contribution': flags['ETH_MAX_CONTRIBUTION']})
     else:
         raise NotFound()
 
 
 @blueprint.route('/v1/user', methods=['GET'])
-@authenticate(bypass_closing=True)
+@authenticate(bypass_closing=True, fields=User.JSON_FIELDS)
 def get_public_info(user: User):
     return jsonify(user.to_json())
 
@@ -119,23 +146,15 @@ def get_info_by_eth(addr: str):
     except ValueError:
         return jsonify({'status': 'not-found'})
 
-    user = User.objects(eth_address=addr).first()
-    if not user:
-        return jsonify({'status': 'not-found'})
-
-    status = {
-        'clear': 'approved',
-        'consider': 'declined'
-    }
-    return jsonify({
-        'status': status.get(user.onfid_status, 'declined'),
-    })
+    status_changes.check()
+    return jsonify({'status': eth_status(addr) or 'not-found'})
 
 
 @blueprint.route('/v1/status', methods=['GET', 'POST'])
 def whitelist_status():
     needs_closed = request.args.get('close')
-    if needs_closed or WHITELIST_CLOSED or (WHITELIST_OPEN_DATE and WHITELIST_OPEN_DATE > datetime.datetime.utcnow()):
+    open_date = flags['WHITELIST_OPEN_DATE']
+    if needs_closed or flags['WHITELIST_CLOSED'] or (open_date and open_date > datetime.datetime.utcnow()):
         raise WhitelistClosed()
 
     return jsonify({'status': 'open'})